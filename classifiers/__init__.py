@@ -1,5 +1,62 @@
-from .core import BaseClassifier
-from .core import Config
-from .core import ConfigSet
-from .core import Parameters
-from .core import Run
+from importlib import import_module
+
+from typing import TYPE_CHECKING, Any
+
+# Classes are imported from the core when they are first accessed (see core)
+__all__ = [
+    "BaseClassifier",
+    "Config",
+    "ConfigSet",
+    "Parameters",
+    "Registry",
+    "ClassifierInfo",
+    "Run",
+    "RunIndex",
+    "Scheduler",
+    "Router",
+    "Provider",
+    "OpenAIProvider",
+    "ReplicateProvider",
+    "StreamParser",
+    "JsonObjectParser",
+    "IdListParser",
+    "Usage",
+    "Predictions",
+    "PackError",
+    "BatchJob",
+    "WorkQueue",
+    "PreFilter",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = globals()[name] = getattr(import_module(f"{__name__}.core"), name)
+    return value
+
+
+if TYPE_CHECKING:
+    from .core import BaseClassifier
+    from .core import Config
+    from .core import ConfigSet
+    from .core import Parameters
+    from .core import Registry
+    from .core import ClassifierInfo
+    from .core import Run
+    from .core import RunIndex
+    from .core import Scheduler
+    from .core import Router
+    from .core import Provider
+    from .core import OpenAIProvider
+    from .core import ReplicateProvider
+    from .core import StreamParser
+    from .core import JsonObjectParser
+    from .core import IdListParser
+    from .core import Usage
+    from .core import Predictions
+    from .core import PackError
+    from .core import BatchJob
+    from .core import WorkQueue
+    from .core import PreFilter
@@ -1,8 +1,5 @@
 from classifiers import BaseClassifier, Parameters, ConfigSet, Config
-from openai import OpenAI
-from dotenv import load_dotenv
 import re
-import os
 
 class Classifier(BaseClassifier):
     """Classify texts by SDG using ChatGPT.
@@ -20,12 +17,6 @@ class Classifier(BaseClassifier):
         Config(model="gpt-4-turbo"),
     )
 
-    def __post_init__(self, configuration: Config) -> None:
-
-        load_dotenv()
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-        self.create_chat_completion = self.with_cache(client.chat.completions.create)
-
     def classify(self, text: str) -> list[int]:
         """Classify the given text and return relevant SDGs in numeric form."""
 
@@ -1,8 +1,5 @@
-from classifiers import BaseClassifier, Config
-from openai import OpenAI
-from dotenv import load_dotenv
+from classifiers import BaseClassifier
 import re
-import os
 
 class Classifier(BaseClassifier):
     """Classify texts by SDG using ChatGPT.
@@ -13,12 +10,6 @@ class Classifier(BaseClassifier):
     """
     # add config
 
-    def __post_init__(self, configuration: Config) -> None:
-
-        load_dotenv()
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-        self.create_chat_completion = self.with_cache(client.chat.completions.create)
-
     def classify(self, text: str) -> list[int]:
         """Classify the given text and return relevant SDGs in numeric form."""
 
@@ -1,8 +1,10 @@
-from classifiers import BaseClassifier, Parameters, ConfigSet, Config
-from openai import OpenAI
-from dotenv import load_dotenv
+from classifiers import BaseClassifier, Parameters, ConfigSet, Config, JsonObjectParser
 import re
-import os
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai.types.chat.chat_completion import ChatCompletion
 
 class Classifier(BaseClassifier):
     """Classify texts by SDG using ChatGPT.
@@ -20,17 +22,23 @@ class Classifier(BaseClassifier):
         Config(model="gpt-4-turbo"),
     )
 
-    def __post_init__(self, configuration: Config) -> None:
-
-        load_dotenv()
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-        self.create_chat_completion = self.with_cache(client.chat.completions.create)
-
     def classify(self, text: str) -> list[int]:
         """Classify the given text and return relevant SDGs in numeric form."""
 
         # Send prompt to ChatGPT
-        completion = self.create_chat_completion(
+        completion = self.create_chat_completion(parser=JsonObjectParser, **self.get_request(text))
+        return self.get_sdgs_from_response(completion)
+
+    async def aclassify(self, text: str) -> list[int]:
+        """Asynchronously classify the given text and return relevant SDGs."""
+
+        # Send prompt to ChatGPT
+        completion = await self.acreate_chat_completion(parser=JsonObjectParser, **self.get_request(text))
+        return self.get_sdgs_from_response(completion)
+
+    def get_request(self, text: str) -> dict:
+        """Get the chat completion request for the given text."""
+        return dict(
             model=self.configuration.model,
             messages=[
                 dict(role="system", content=self.get_prompt("system")),
@@ -39,7 +47,9 @@ class Classifier(BaseClassifier):
             # response_format={"type": "json_object"},
             temperature=0,
         )
-        message = completion.choices[0].message.content
+
+    def get_sdgs_from_response(self, completion: "ChatCompletion") -> list[int]:
+        """Get list of SDGs from a ChatGPT API response."""
         sdgs = re.findall(r'\d+', completion.choices[0].message.content)
 
         return [int(sdg) for sdg in sdgs if sdg != 0]
@@ -1,8 +1,11 @@
-import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
-from classifiers import BaseClassifier, Parameters, ConfigSet, Config
+from classifiers import BaseClassifier, Parameters, ConfigSet, Config, PackError
+from classifiers import JsonObjectParser
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from openai.types.chat.chat_completion import ChatCompletion
 
 
 class Classifier(BaseClassifier):
@@ -12,6 +15,8 @@ class Classifier(BaseClassifier):
     existing knowledge of the SDGs.
 
     Response is in JSON format.
+
+    Supports packing several texts into one request (see `pack_size`).
     """
 
     CONFIGURATIONS = ConfigSet(
@@ -28,22 +33,106 @@ class Classifier(BaseClassifier):
     def __post_init__(self, configuration: Config) -> None:
         self.model = configuration.model
 
-        load_dotenv()
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-        self.create_chat_completion = self.with_cache(client.chat.completions.create)
-
     def classify(self, text: str) -> list[int]:
         """Classify the given text and return relevant SDGs in numeric form."""
 
         # Send prompt to ChatGPT
         response = self.create_chat_completion(
+            parser=JsonObjectParser, **self.get_request(text)
+        )
+        return self.get_sdgs_from_response(response)
+
+    async def aclassify(self, text: str) -> list[int]:
+        """Asynchronously classify the given text and return relevant SDGs."""
+
+        # Send prompt to ChatGPT
+        response = await self.acreate_chat_completion(
+            parser=JsonObjectParser, **self.get_request(text)
+        )
+        return self.get_sdgs_from_response(response)
+
+    def classify_candidates(self, text: str, sdgs: list[int]) -> list[int]:
+        """Classify the given text, considering only its candidate SDGs."""
+
+        # Send prompt to ChatGPT
+        response = self.create_chat_completion(
+            parser=JsonObjectParser, **self.get_request(text, candidates=sdgs)
+        )
+        return self.get_sdgs_from_response(response)
+
+    async def aclassify_candidates(self, text: str, sdgs: list[int]) -> list[int]:
+        """Asynchronously classify the given text, considering only its
+        candidate SDGs."""
+
+        # Send prompt to ChatGPT
+        response = await self.acreate_chat_completion(
+            parser=JsonObjectParser, **self.get_request(text, candidates=sdgs)
+        )
+        return self.get_sdgs_from_response(response)
+
+    def score(self, text: str) -> list[float]:
+        """Get the confidence score of each SDG from the logprobs of the
+        response to the given text."""
+
+        # Same request as classify, so that the response comes from the cache
+        candidates = self.get_candidates(text)
+        response = self.create_chat_completion(
+            parser=JsonObjectParser, **self.get_request(text, candidates=candidates)
+        )
+        return self.get_scores_from_logprobs(response)
+
+    def classify_pack(self, texts: list[str]) -> list[list[int]]:
+        """Classify several texts with a single prompt."""
+
+        # Send prompt to ChatGPT
+        response = self.create_chat_completion(
+            parser=JsonObjectParser, **self.get_pack_request(texts)
+        )
+        return self.get_pack_sdgs_from_response(response, len(texts))
+
+    async def aclassify_pack(self, texts: list[str]) -> list[list[int]]:
+        """Asynchronously classify several texts with a single prompt."""
+
+        # Send prompt to ChatGPT
+        response = await self.acreate_chat_completion(
+            parser=JsonObjectParser, **self.get_pack_request(texts)
+        )
+        return self.get_pack_sdgs_from_response(response, len(texts))
+
+    def get_request(self, text: str, candidates: list[int] | None = None) -> dict:
+        """Get the chat completion request for the given text.
+
+        Args:
+            text: Text to classify
+            candidates: SDGs to narrow the prompt down to (default = all SDGs)
+
+        Returns: Keyword arguments for the chat completion request"""
+        system = self.get_prompt("system")
+        if candidates is not None:
+            system += "\n\n" + self.get_prompt("candidates", sdgs=candidates)
+
+        request: dict[str, Any] = dict(
             model=self.model,
             messages=[
-                dict(role="system", content=self.get_prompt("system")),
+                dict(role="system", content=system),
                 dict(role="user", content=self.get_prompt("user", text=text)),
             ],
             response_format={"type": "json_object"},
         )
+
+        # Alternatives of each token, to derive the scores from
+        if self.scores:
+            request.update(logprobs=True, top_logprobs=20)
+
+        return request
+
+    def get_sdgs_from_response(self, response: "ChatCompletion") -> list[int]:
+        """Get list of SDGs from a ChatGPT API response.
+
+        Args:
+            response: ChatCompletion response from ChatGPT API
+
+        Returns: List of SDGs in numeric form"""
         message = response.choices[0].message.content
 
         # Verify that message is not empty
@@ -54,6 +143,51 @@ class Classifier(BaseClassifier):
         data = json.loads(message)
         return data["sdgs"]
 
+    def get_pack_request(self, texts: list[str]) -> dict:
+        """Get the chat completion request for a pack of texts.
+
+        Args:
+            texts: Texts to classify
+
+        Returns: Keyword arguments for the chat completion request"""
+        return dict(
+            model=self.model,
+            messages=[
+                dict(role="system", content=self.get_prompt("system_packed")),
+                dict(role="user", content=self.get_prompt("user_packed", texts=texts)),
+            ],
+            response_format={"type": "json_object"},
+        )
+
+    def get_pack_sdgs_from_response(
+        self, response: "ChatCompletion", count: int
+    ) -> list[list[int]]:
+        """Get the SDGs of each text from a ChatGPT API response for a pack.
+
+        Args:
+            response: ChatCompletion response from ChatGPT API
+            count: Number of texts in the pack
+
+        Returns: List of SDGs in numeric form for each text
+
+        Raises: PackError if the response is malformed"""
+        message = response.choices[0].message.content
+
+        try:
+            data = json.loads(message or "")
+            sdgs = [data[str(id)] for id in range(1, count + 1)]
+        except (json.JSONDecodeError, TypeError, KeyError) as e:
+            raise PackError(f"Invalid response for pack: {message}") from e
+
+        # Verify that each text has a list of SDGs
+        for text_sdgs in sdgs:
+            if not isinstance(text_sdgs, list) or not all(
+                isinstance(sdg, int) for sdg in text_sdgs
+            ):
+                raise PackError(f"Invalid response for pack: {message}")
+
+        return sdgs
+
 
 # Example code for directly running without going through evaluate script
 # Note that this does not update the READMEs
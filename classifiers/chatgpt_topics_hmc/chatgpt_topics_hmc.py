@@ -1,10 +1,84 @@
-import os
+import re
 import yaml
-from openai import OpenAI
-from dotenv import load_dotenv
-from classifiers import BaseClassifier, Parameters, ConfigSet, Config
+import asyncio
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from frozendict import frozendict
+from classifiers import BaseClassifier, Parameters, ConfigSet, Config, Usage
+from classifiers import IdListParser
 
-from openai.types.chat.chat_completion import ChatCompletion
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    from openai.types.chat.chat_completion import ChatCompletion
+
+
+@dataclass(frozen=True)
+class Topics:
+    """Immutable list of topics, precomputed when topics.yaml is loaded.
+
+    Each topic has a display text, which is shown to ChatGPT and may include
+    examples (e.g. "renewable energy: wind, solar, ..."), and a label without
+    the examples (e.g. "renewable energy"), which is what the classifier
+    returns. Topic IDs start at 1.
+    """
+
+    display: tuple[str, ...]
+    labels: tuple[str, ...]
+
+    # SDG by label, for topics that are associated with an SDG
+    sdgs: frozendict[str, int]
+
+    @classmethod
+    def from_list(cls, topics: list[str], sdg: int | None = None) -> Self:
+        """Create the topics from a list in topics.yaml.
+
+        Args:
+            topics: Display texts of the topics
+            sdg: SDG that all topics are associated with (default = none)
+
+        Returns: Topics"""
+        display = tuple(topics)
+        labels = tuple(
+            topic[: topic.index(":")] if ": " in topic else topic for topic in display
+        )
+        sdgs = frozendict({label: sdg for label in labels} if sdg else {})
+
+        return cls(display=display, labels=labels, sdgs=sdgs)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, label: str) -> bool:
+        return label in self.labels
+
+    def parse(self, content: str) -> list[str]:
+        """Get the labels of the topic IDs in a response, such as "1, 5,7".
+
+        Whitespace is ignored, as are IDs that are not numeric or out of range
+        (including 0, which stands for no relevant topics).
+
+        Args:
+            content: Comma-separated list of topic IDs
+
+        Returns: List of labels, each label only once and in order of the IDs
+        """
+        labels: dict[str, None] = {}
+
+        for id in re.split(r"[,\s]+", content.strip()):
+            if id.isdigit() and 1 <= int(id) <= len(self.labels):
+                labels[self.labels[int(id) - 1]] = None
+
+        return list(labels)
+
+
+@dataclass(frozen=True)
+class Subtopics:
+    """Subtopic tree of a topic, as defined in topics.yaml."""
+
+    # Name of the system prompt in prompts.yaml
+    prompt: str
+    topics: Topics
 
 
 class Classifier(BaseClassifier):
@@ -18,6 +92,11 @@ class Classifier(BaseClassifier):
     broadly mapped to topics. If a topic is found in the text, the classifier
     then checks the text for the list of very specific subtopics.
 
+    The topics and subtopic trees are defined in topics.yaml. Each text takes
+    two rounds of requests, no matter how many subtopic trees are defined: one
+    for the topics and one for the subtopics of all topics that were found,
+    which are sent in parallel.
+
     Example Prompt:
 
     ```
@@ -48,35 +127,81 @@ class Classifier(BaseClassifier):
     # See: https://platform.openai.com/docs/models/overview
     model: str
 
-    topics: list[str]
-    energy_subtopics: list[str]
+    topics: Topics
+
+    # Subtopic trees by topic label (see topics.yaml)
+    subtopics: frozendict[str, Subtopics]
 
     def __post_init__(self, configuration: Config) -> None:
         self.model = configuration.model
 
-        load_dotenv()
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-        self.create_chat_completion = self.with_cache(client.chat.completions.create)
-
         # Load topics
         with open(self.directory.joinpath("topics.yaml")) as f:
             data = yaml.safe_load(f)
-            self.topics = data["topics"]
-            self.energy_subtopics = data["energy_subtopics"]
+
+        self.topics = Topics.from_list(data["topics"])
+        self.subtopics = frozendict(
+            {
+                topic: Subtopics(
+                    prompt=tree["prompt"],
+                    topics=Topics.from_list(tree["topics"], sdg=tree["sdg"]),
+                )
+                for topic, tree in data.get("subtopics", {}).items()
+            }
+        )
+
+        for topic in self.subtopics:
+            if topic not in self.topics:
+                raise Exception(f"Subtopics defined for unknown topic: {topic}")
 
     def classify(self, text: str) -> list[int]:
         """Classify the given text and return relevant SDGs in numeric form."""
-        sdgs: list[int] = []
 
         # Find topics in text
         topics = self.classify_topics(text)
 
-        # If energy topic was found, try to find specific energy subtopics
-        if "energy and electricity" in topics:
-            if len(self.classify_energy_subtopics(text)):
-                sdgs.append(7)
+        # Check the subtopics of each topic that was found, all in parallel.
+        # Subtopic trees of topics that were not found are skipped.
+        stages = [topic for topic in self.subtopics if topic in topics]
+
+        if len(stages) > 1:
+            classify = Usage.propagate(self.classify_subtopics)
+            with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+                results = list(executor.map(lambda t: classify(text, t), stages))
+        else:
+            results = [self.classify_subtopics(text, topic) for topic in stages]
+
+        return self.get_sdgs(stages, results)
+
+    async def aclassify(self, text: str) -> list[int]:
+        """Asynchronously classify the given text and return relevant SDGs."""
+
+        # Find topics in text
+        topics = await self.aclassify_topics(text)
+
+        # Check the subtopics of each topic that was found, all in parallel
+        stages = [topic for topic in self.subtopics if topic in topics]
+        results = await asyncio.gather(
+            *[self.aclassify_subtopics(text, topic) for topic in stages]
+        )
+
+        return self.get_sdgs(stages, list(results))
+
+    def get_sdgs(self, stages: list[str], results: list[list[str]]) -> list[int]:
+        """Get the SDGs of the subtopics that were found.
+
+        Args:
+            stages: Topics whose subtopics were checked
+            results: Subtopics found for each topic, in the same order
 
-        return sdgs
+        Returns: A list of SDGs in numeric form
+        """
+        sdgs = {
+            self.subtopics[topic].topics.sdgs[subtopic]
+            for topic, subtopics in zip(stages, results, strict=True)
+            for subtopic in subtopics
+        }
+        return sorted(sdgs)
 
     def classify_topics(self, text: str) -> list[str]:
         """Classify the given text and return relevant topics.
@@ -91,68 +216,99 @@ class Classifier(BaseClassifier):
 
         # Send prompt to ChatGPT
         response = self.create_chat_completion(
-            model=self.model,
-            messages=[
-                dict(
-                    role="system",
-                    content=self.get_prompt("system_topics", topics=topics),
-                ),
-                dict(role="user", content=self.get_prompt("user", text=text)),
-            ],
-            frequency_penalty=0,
-            presence_penalty=0,
-            # Long enough for 2-digit topic number + whitespace + comma
-            max_tokens=len(topics) * 4,
-            temperature=0,
+            parser=IdListParser,
+            **self.get_request(text, prompt="system_topics", topics=topics),
+        )
+
+        # Get relevant topics as list
+        return self.get_topics_from_response(response, topics=topics)
+
+    async def aclassify_topics(self, text: str) -> list[str]:
+        """Asynchronously classify the given text and return relevant topics."""
+
+        topics = self.topics
+
+        # Send prompt to ChatGPT
+        response = await self.acreate_chat_completion(
+            parser=IdListParser,
+            **self.get_request(text, prompt="system_topics", topics=topics),
         )
 
         # Get relevant topics as list
         return self.get_topics_from_response(response, topics=topics)
 
-    def classify_energy_subtopics(self, text: str) -> list[str]:
-        """Classify the given text and return relevant energy subtopics.
+    def classify_subtopics(self, text: str, topic: str) -> list[str]:
+        """Classify the given text and return relevant subtopics of the topic.
 
         Args:
             text: Text to classify
+            topic: Topic whose subtopics to check
 
-        Returns: List of relevant energy subtopics
+        Returns: List of relevant subtopics
         """
 
-        subtopics = self.energy_subtopics
+        tree = self.subtopics[topic]
 
         # Send prompt to ChatGPT
         response = self.create_chat_completion(
+            parser=IdListParser,
+            **self.get_request(text, prompt=tree.prompt, topics=tree.topics),
+        )
+
+        # Get relevant subtopics as list
+        return self.get_topics_from_response(response, topics=tree.topics)
+
+    async def aclassify_subtopics(self, text: str, topic: str) -> list[str]:
+        """Asynchronously classify the given text and return relevant subtopics
+        of the topic."""
+
+        tree = self.subtopics[topic]
+
+        # Send prompt to ChatGPT
+        response = await self.acreate_chat_completion(
+            parser=IdListParser,
+            **self.get_request(text, prompt=tree.prompt, topics=tree.topics),
+        )
+
+        # Get relevant subtopics as list
+        return self.get_topics_from_response(response, topics=tree.topics)
+
+    def get_request(self, text: str, prompt: str, topics: Topics) -> dict:
+        """Get the chat completion request for classifying text by topics.
+
+        Args:
+            text: Text to classify
+            prompt: Name of the system prompt
+            topics: Topics to include in the system prompt
+
+        Returns: Keyword arguments for the chat completion request
+        """
+        return dict(
             model=self.model,
             messages=[
                 dict(
                     role="system",
-                    content=self.get_prompt(
-                        "system_energy_subtopics", topics=subtopics
-                    ),
+                    content=self.get_prompt(prompt, topics=topics.display),
                 ),
                 dict(role="user", content=self.get_prompt("user", text=text)),
             ],
             frequency_penalty=0,
             presence_penalty=0,
             # Long enough for 2-digit topic number + whitespace + comma
-            max_tokens=len(subtopics) * 4,
+            max_tokens=len(topics) * 4,
             temperature=0,
         )
 
-        # Get relevant topics as list
-        return self.get_topics_from_response(response, topics=subtopics)
-
     def get_topics_from_response(
-        self, response: ChatCompletion, topics: list[str]
+        self, response: "ChatCompletion", topics: Topics
     ) -> list[str]:
         """Get list of topics from a ChatGPT API response.
 
-        Converts numeric topic IDs into their string equivalent.
+        Converts numeric topic IDs into their labels (see `Topics.parse`).
 
         Args:
             response: ChatCompletion response from ChatGPT API
-            topics: List of all topic strings in the same order they were sent
-                    to ChatGPT
+            topics: Topics that were sent to ChatGPT
 
         Returns: List of topics referenced in the response
         """
@@ -162,14 +318,4 @@ class Classifier(BaseClassifier):
         if not topic_ids:
             raise Exception("ChatGPT response was empty")
 
-        # No relevant topics
-        if topic_ids == "0":
-            return []
-
-        # Remove examples from topics, if any
-        for i, topic in enumerate(topics):
-            if ": " in topic:
-                topics[i] = topic[: topic.index(":")]
-
-        # Return list of topics in string format
-        return [topics[int(id) - 1] for id in topic_ids.split(",")]
+        return topics.parse(topic_ids)
@@ -1,15 +1,50 @@
-import importlib
+import re
+import math
+import time
+import asyncio
+from functools import wraps
 from pathlib import Path
-from yaml import safe_load
-from diskcache import Cache
-from jinja2 import Template, StrictUndefined
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from diskcache import ENOVAL
+from diskcache.core import args_to_key
 from .ConfigSet import ConfigSet
+from .Cache import Cache
+from .Completion import Completion
+from .PackError import PackError
+from .PendingRequest import PendingRequest
 from .Config import Config
 from .Parameters import Parameters
+from .Prompts import Prompts
+from .Scheduler import Scheduler
+from .Usage import Usage
+from .Registry import Registry
+from .Router import Router
+from .StreamParser import StreamParser
 
-from typing import TypeVar, Callable, Self, Type
+from typing import (
+    TYPE_CHECKING,
+    TypeVar,
+    Callable,
+    Awaitable,
+    Iterable,
+    Iterator,
+    Self,
+    Type,
+)
+
+if TYPE_CHECKING:
+    from openai.types.chat.chat_completion import ChatCompletion
+    from .PreFilter import PreFilter
 
 C = TypeVar("C", bound=Callable)
+A = TypeVar("A", bound=Callable[..., Awaitable])
+
+# Name under which chat completions were cached before they were stored as
+# Completion records (the full name of `Completions.create` in openai 1.14).
+# Used to migrate old cache entries.
+LEGACY_CHAT_COMPLETIONS_CACHE_NAME = (
+    "openai.resources.chat.completions.Completions.create"
+)
 
 
 class classproperty(object):
@@ -25,17 +60,92 @@ class BaseClassifier:
     configuration: Config
     CONFIGURATIONS: ConfigSet = ConfigSet(Parameters(), Config())
 
-    def __init__(self, config: int = 1) -> None:
+    # Maximum number of texts that classify_many classifies in parallel. Can be
+    # set per configuration with the optional `concurrency` parameter.
+    concurrency: int = 8
+
+    # Number of texts that classify_many puts into a single request. Can be set
+    # per configuration with the optional `pack_size` parameter.
+    pack_size: int = 1
+
+    # Streams responses and cancels them as soon as the answer is complete, for
+    # requests that pass a parser to create_chat_completion. Can be set per
+    # configuration with the optional `stream` parameter.
+    stream: bool = False
+
+    # Requests token logprobs, so that `score` can derive a confidence score for
+    # each SDG from the response that `classify` received. Can be set per
+    # configuration with the optional `scores` parameter.
+    scores: bool = False
+
+    # Skips texts without candidate SDGs. Enabled per configuration with the
+    # optional `prefilter` (threshold) and `embeddings` (model) parameters.
+    prefilter: "PreFilter | None" = None
+
+    # Chat completion requests that are not cached, by cache key. Set to a dict
+    # to collect requests for a batch instead of sending them (see `BatchJob`).
+    pending_requests: dict[str, dict] | None = None
+
+    def __init__(
+        self,
+        config: int = 1,
+        concurrency: int | None = None,
+        cache: Cache | None = None,
+        stream: bool | None = None,
+        scores: bool | None = None,
+    ) -> None:
         """Initialize a classifier.
 
         Args:
             config: The index of the configuration to load (default = 1)
+            concurrency: Maximum number of texts to classify in parallel
+                         (defaults to the configuration's concurrency)
+            cache: Cache to use, such as one shared by several classifiers
+                   (defaults to the cache configured by `Cache.from_env`)
+            stream: Whether to stream responses and stop them early (defaults
+                    to the configuration's stream parameter)
+            scores: Whether to request logprobs for confidence scores (defaults
+                    to the configuration's scores parameter)
         """
         # Set up configuration
         self.configuration = self.CONFIGURATIONS.get_config(config)
 
+        # Set up concurrency
+        self.concurrency = concurrency or self.configuration.get(
+            "concurrency", self.concurrency
+        )
+
+        # Set up packing
+        self.pack_size = self.configuration.get("pack_size", self.pack_size)
+
+        # Set up streaming
+        if stream is None:
+            stream = self.configuration.get("stream", self.stream)
+        self.stream = stream
+
+        # Set up scoring. Packed responses have no logprobs per text, so texts
+        # are classified one at a time.
+        if scores is None:
+            scores = self.configuration.get("scores", self.scores)
+        self.scores = scores
+        if self.scores:
+            self.pack_size = 1
+
         # Set up cache
-        self.cache = Cache(self.directory.joinpath(".cache"))
+        if cache is None:
+            cache = Cache.from_env(default_directory=self.directory.joinpath(".cache"))
+        self.cache = cache
+
+        # Set up pre-filter
+        if "prefilter" in self.configuration:
+            from .PreFilter import PreFilter
+            from .Embeddings import Embeddings
+
+            spec = self.configuration.get("embeddings", PreFilter.DEFAULT_EMBEDDINGS)
+            self.prefilter = PreFilter(
+                Embeddings.from_spec(spec, cache=self.cache),
+                threshold=self.configuration["prefilter"],
+            )
 
         # Run optional post initialization
         self.__post_init__(self.configuration)
@@ -59,30 +169,560 @@ class BaseClassifier:
         Returns: A list of SDGs in numeric form, eg: 1, 5, 9"""
         raise Exception("classify method must be implemented")
 
+    def score(self, text: str) -> list[float]:
+        """Get the confidence score of each SDG for the given text.
+
+        Classifiers that support scores override this method. It should make
+        the same request as `classify` in scoring mode (see `scores`), so that
+        the response comes from the cache, and derive the scores from its
+        logprobs (see `get_scores_from_logprobs`).
+
+        Args:
+            text: The text to score
+
+        Returns: A list of 17 scores between 0 and 1, one for each SDG"""
+        raise NotImplementedError(f"{type(self).__name__} does not support scores")
+
+    @classproperty
+    def supports_scores(cls) -> bool:
+        """Whether the classifier implements `score`."""
+        return cls.score is not BaseClassifier.score
+
+    def get_scores(self, text: str) -> list[float]:
+        """Get the confidence score of each SDG for a classified text.
+
+        Texts that the pre-filter rejects score 0 for every SDG, as they were
+        never sent to the model.
+
+        Args:
+            text: The classified text
+
+        Returns: A list of 17 scores between 0 and 1, one for each SDG"""
+        if self.get_candidates(text) == []:
+            return [0.0] * 17
+
+        return self.score(text)
+
+    @staticmethod
+    def get_scores_from_logprobs(response: "ChatCompletion") -> list[float]:
+        """Derive the confidence score of each SDG from the logprobs of a
+        response that lists SDGs by number, such as {"sdgs": [1, 5]}.
+
+        Wherever the model wrote a number, the alternatives that it considered
+        show how likely every other number was at that point. The score of an
+        SDG is its highest probability at any such point: SDGs in the answer
+        score the probability with which they were chosen, SDGs that the model
+        almost added score the probability of the alternative.
+
+        Args:
+            response: ChatCompletion response, requested with logprobs=True and
+                      top_logprobs
+
+        Returns: A list of 17 scores between 0 and 1, one for each SDG"""
+        choice = response.choices[0]
+        if choice.logprobs is None or choice.logprobs.content is None:
+            raise Exception("Response has no logprobs")
+
+        scores = [0.0] * 17
+        length, offset = len(choice.message.content or ""), 0
+        for token in choice.logprobs.content:
+            # Streamed responses may have logprobs beyond the end of the answer
+            if offset >= length:
+                break
+            offset += len(token.token)
+
+            alternatives = [(token.token, token.logprob)] + [
+                (top.token, top.logprob) for top in token.top_logprobs
+            ]
+            for alternative, logprob in alternatives:
+                match = re.fullmatch(r"\W*(\d+)\W*", alternative)
+                if match and 1 <= int(match[1]) <= 17:
+                    sdg = int(match[1])
+                    scores[sdg - 1] = max(scores[sdg - 1], math.exp(logprob))
+
+        return scores
+
+    def get_candidates(self, text: str) -> list[int] | None:
+        """Get the candidate SDGs of the given text from the pre-filter.
+
+        Args:
+            text: The text to filter
+
+        Returns: Candidate SDGs (empty if the text is not relevant to any SDG)
+                 or None (if the pre-filter is disabled)"""
+        if self.prefilter is None:
+            return None
+
+        return self.prefilter.get_candidates([text])[0]
+
+    def classify_candidates(self, text: str, sdgs: list[int]) -> list[int]:
+        """Classify the given text, knowing its candidate SDGs.
+
+        Used instead of `classify` when the pre-filter is enabled (see the
+        optional `prefilter` parameter), for every text that is not classified
+        as part of a pack. Classifiers can override this method to narrow the
+        prompt down to the candidates. By default, the text is passed to
+        `classify`.
+
+        Args:
+            text: The text to classify
+            sdgs: Candidate SDGs found by the pre-filter
+
+        Returns: A list of SDGs in numeric form, eg: 1, 5, 9"""
+        return self.classify(text)
+
+    async def aclassify_candidates(self, text: str, sdgs: list[int]) -> list[int]:
+        """Asynchronously classify the given text, knowing its candidate SDGs.
+
+        By default, the text is passed to `aclassify`.
+
+        Args:
+            text: The text to classify
+            sdgs: Candidate SDGs found by the pre-filter
+
+        Returns: A list of SDGs in numeric form, eg: 1, 5, 9"""
+        return await self.aclassify(text)
+
+    def classify_pack(self, texts: list[str]) -> list[list[int]]:
+        """Classify several texts with a single request.
+
+        Classifiers can override this method to put several texts into one
+        prompt (see the optional `pack_size` parameter). If the response cannot
+        be parsed, raise a PackError. The texts are then classified one by one.
+
+        By default, each text is passed to `classify`.
+
+        Args:
+            texts: The texts to classify
+
+        Returns: A list of SDG lists, in the same order as the given texts"""
+        return [self.classify(text) for text in texts]
+
+    async def aclassify_pack(self, texts: list[str]) -> list[list[int]]:
+        """Asynchronously classify several texts with a single request.
+
+        By default, this runs `classify_pack` in a separate thread.
+
+        Args:
+            texts: The texts to classify
+
+        Returns: A list of SDG lists, in the same order as the given texts"""
+        return await asyncio.to_thread(self.classify_pack, texts)
+
+    def classify_many(self, texts: Iterable[str]) -> list[list[int]]:
+        """Classify the given texts concurrently and return relevant SDGs.
+
+        Texts are grouped into packs of `pack_size` texts. Each pack is passed
+        to `classify_pack` on a pool of up to `concurrency` threads, so
+        classifiers get concurrency without any changes.
+
+        Args:
+            texts: The texts to classify
+
+        Returns: A list of SDG lists, in the same order as the given texts"""
+        packs = self.get_packs(texts)
+
+        if self.concurrency <= 1 or len(packs) <= 1:
+            return [sdgs for pack in packs for sdgs in self._classify_pack(pack)]
+
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(packs)))
+        try:
+            results = executor.map(Usage.propagate(self._classify_pack), packs)
+            return [sdgs for pack_sdgs in results for sdgs in pack_sdgs]
+        finally:
+            # Do not wait for queued texts if a classification failed
+            executor.shutdown(cancel_futures=True)
+
+    def classify_as_completed(
+        self, texts: Iterable[str]
+    ) -> Iterator[tuple[str, list[int]]]:
+        """Classify the given texts concurrently and yield them as they complete.
+
+        Works like `classify_many`, but yields each text and its SDGs as soon
+        as the text (or its pack) has been classified, in order of completion.
+
+        Args:
+            texts: The texts to classify
+
+        Returns: Iterator of (text, SDGs) tuples"""
+        for text, sdgs, _ in self.classify_with_usage(texts):
+            yield text, sdgs
+
+    def classify_with_usage(
+        self, texts: Iterable[str]
+    ) -> Iterator[tuple[str, list[int], Usage]]:
+        """Classify the given texts concurrently and yield them with their usage.
+
+        Works like `classify_as_completed`, but also yields the token usage,
+        cost and latency of the requests made for each text (see `Usage`). The
+        usage of a pack is split evenly across its texts.
+
+        Args:
+            texts: The texts to classify
+
+        Returns: Iterator of (text, SDGs, usage) tuples"""
+        packs = self.get_packs(texts)
+
+        if self.concurrency <= 1 or len(packs) <= 1:
+            for pack in packs:
+                yield from self._zip_usage(pack, *self._track_pack(pack))
+            return
+
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(packs)))
+        try:
+            track_pack = Usage.propagate(self._track_pack)
+            futures = {executor.submit(track_pack, p): p for p in packs}
+            for future in as_completed(futures):
+                yield from self._zip_usage(futures[future], *future.result())
+        finally:
+            # Do not wait for queued texts if a classification failed or the
+            # iteration was stopped
+            executor.shutdown(cancel_futures=True)
+
+    def _track_pack(self, texts: list[str]) -> tuple[list[list[int]], Usage]:
+        """Classify a pack of texts and track the usage of its requests."""
+        with Usage.track() as usage:
+            return self._classify_pack(texts), usage
+
+    @staticmethod
+    def _zip_usage(
+        texts: list[str], sdgs: list[list[int]], usage: Usage
+    ) -> Iterator[tuple[str, list[int], Usage]]:
+        share = usage.split(len(texts))
+        return ((text, text_sdgs, share) for text, text_sdgs in zip(texts, sdgs))
+
+    async def aclassify(self, text: str) -> list[int]:
+        """Asynchronously classify the given text and return relevant SDGs.
+
+        By default, this runs `classify` in a separate thread. Classifiers
+        should override this method with a native async implementation, for
+        example by using `acreate_chat_completion`.
+
+        Args:
+            text: The text to classify
+
+        Returns: A list of SDGs in numeric form, eg: 1, 5, 9"""
+        return await asyncio.to_thread(self.classify, text)
+
+    async def aclassify_many(self, texts: Iterable[str]) -> list[list[int]]:
+        """Asynchronously classify the given texts and return relevant SDGs.
+
+        Texts are grouped into packs of `pack_size` texts. Up to `concurrency`
+        packs are classified at the same time.
+
+        Args:
+            texts: The texts to classify
+
+        Returns: A list of SDG lists, in the same order as the given texts"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def aclassify_pack(pack: list[str]) -> list[list[int]]:
+            async with semaphore:
+                return await self._aclassify_pack(pack)
+
+        results = await asyncio.gather(
+            *[aclassify_pack(pack) for pack in self.get_packs(texts)]
+        )
+        return [sdgs for pack_sdgs in results for sdgs in pack_sdgs]
+
+    def get_packs(self, texts: Iterable[str]) -> list[list[str]]:
+        """Group the given texts into packs of up to `pack_size` texts.
+
+        Args:
+            texts: The texts to group
+
+        Returns: List of packs"""
+        texts = list(texts)
+        return [
+            texts[i : i + self.pack_size] for i in range(0, len(texts), self.pack_size)
+        ]
+
+    def _classify_pack(self, texts: list[str]) -> list[list[int]]:
+        """Classify a pack of texts, falling back to one text at a time.
+
+        Texts that the pre-filter rejects are not classified (no SDGs)."""
+        if self.prefilter is not None:
+            candidates = self.prefilter.get_candidates(texts)
+            relevant = [(t, c) for t, c in zip(texts, candidates) if c]
+            results = iter(self._classify_pack_candidates(relevant))
+            return [next(results) if c else [] for c in candidates]
+
+        return self._classify_pack_texts(texts)
+
+    def _classify_pack_texts(self, texts: list[str]) -> list[list[int]]:
+        if len(texts) == 1:
+            return [self.classify(texts[0])]
+
+        try:
+            return self.classify_pack(texts)
+        except PackError:
+            return [self.classify(text) for text in texts]
+
+    def _classify_pack_candidates(
+        self, texts: list[tuple[str, list[int]]]
+    ) -> list[list[int]]:
+        """Classify a pack of (text, candidate SDGs) tuples. Texts that are
+        classified one at a time are narrowed down to their candidates."""
+        if not texts:
+            return []
+        if len(texts) == 1:
+            return [self.classify_candidates(*texts[0])]
+
+        try:
+            return self.classify_pack([text for text, _ in texts])
+        except PackError:
+            return [self.classify_candidates(*text) for text in texts]
+
+    async def _aclassify_pack(self, texts: list[str]) -> list[list[int]]:
+        """Asynchronously classify a pack of texts, falling back to one text at
+        a time.
+
+        Texts that the pre-filter rejects are not classified (no SDGs)."""
+        if self.prefilter is not None:
+            candidates = await asyncio.to_thread(self.prefilter.get_candidates, texts)
+            relevant = [(t, c) for t, c in zip(texts, candidates) if c]
+            results = iter(await self._aclassify_pack_candidates(relevant))
+            return [next(results) if c else [] for c in candidates]
+
+        return await self._aclassify_pack_texts(texts)
+
+    async def _aclassify_pack_texts(self, texts: list[str]) -> list[list[int]]:
+        if len(texts) == 1:
+            return [await self.aclassify(texts[0])]
+
+        try:
+            return await self.aclassify_pack(texts)
+        except PackError:
+            return [await self.aclassify(text) for text in texts]
+
+    async def _aclassify_pack_candidates(
+        self, texts: list[tuple[str, list[int]]]
+    ) -> list[list[int]]:
+        if not texts:
+            return []
+        if len(texts) == 1:
+            return [await self.aclassify_candidates(*texts[0])]
+
+        try:
+            return await self.aclassify_pack([text for text, _ in texts])
+        except PackError:
+            return [await self.aclassify_candidates(*text) for text in texts]
+
+    def create_chat_completion(
+        self, parser: Callable[[], StreamParser] | None = None, **kwargs
+    ) -> "ChatCompletion":
+        """Create a chat completion with the healthiest provider of the model.
+
+        Responses are cached as compact Completion records. Requests that are
+        not cached are sent within the model's rate limits (see `Scheduler`)
+        to the providers of the model (see `Router`), unless they are being
+        collected for a batch (see `BatchJob`).
+
+        If streaming is enabled and a parser is given, the response is streamed
+        and cancelled as soon as the parser has seen a complete answer. The
+        answer is cached under the same key as the full response would be.
+
+        Args:
+            parser: Creates a parser for the expected answer, such as
+                    `JsonObjectParser` (default = never stream)
+            All other keyword arguments are passed to `chat.completions.create`.
+
+        Returns: ChatCompletion response"""
+        started_at = time.perf_counter()
+        key = Completion.key(**kwargs)
+        completion = self.get_cached_completion(key, **kwargs)
+        cached = completion is not None
+
+        if completion is None:
+            self.raise_if_collecting(key, **kwargs)
+            completion = Scheduler.schedule(Router.get().create)(
+                parser=parser if self.stream else None, **kwargs
+            )
+            self.cache.set(key, completion.to_json(), retry=True)
+
+        self.record_usage(completion, cached, time.perf_counter() - started_at)
+        return completion.to_chat_completion()
+
+    async def acreate_chat_completion(
+        self, parser: Callable[[], StreamParser] | None = None, **kwargs
+    ) -> "ChatCompletion":
+        """Asynchronously create a chat completion with the healthiest provider
+        of the model.
+
+        Uses the same cache and streaming as `create_chat_completion`.
+
+        Args:
+            parser: Creates a parser for the expected answer, such as
+                    `JsonObjectParser` (default = never stream)
+            All other keyword arguments are passed to `chat.completions.create`.
+
+        Returns: ChatCompletion response"""
+        started_at = time.perf_counter()
+        key = Completion.key(**kwargs)
+        completion = self.get_cached_completion(key, **kwargs)
+        cached = completion is not None
+
+        if completion is None:
+            self.raise_if_collecting(key, **kwargs)
+            completion = await Scheduler.aschedule(Router.get().acreate)(
+                parser=parser if self.stream else None, **kwargs
+            )
+            self.cache.set(key, completion.to_json(), retry=True)
+
+        self.record_usage(completion, cached, time.perf_counter() - started_at)
+        return completion.to_chat_completion()
+
+    def get_cached_completion(self, key: str, **kwargs) -> Completion | None:
+        """Get the cached completion for a chat completion request.
+
+        Responses that were cached with `with_cache` (before completions were
+        cached as Completion records) are migrated to the new format.
+
+        Args:
+            key: Cache key of the request (see `Completion.key`)
+            All other keyword arguments are the chat completion arguments.
+
+        Returns: Completion or None (if not cached)"""
+        data = self.cache.get(key, retry=True)
+        if data is not None:
+            return Completion.from_json(data)
+
+        # Look for a response in the old format
+        legacy_key = args_to_key(
+            (LEGACY_CHAT_COMPLETIONS_CACHE_NAME,), (), kwargs, False, ()
+        )
+        try:
+            response = self.cache.get(legacy_key, retry=True)
+        except Exception:
+            # Response was pickled with an incompatible version of openai
+            return None
+
+        if response is None:
+            return None
+
+        completion = Completion.from_chat_completion(response)
+        self.cache.set(key, completion.to_json(), retry=True)
+        self.cache.delete(legacy_key, retry=True)
+        return completion
+
+    def record_usage(
+        self, completion: Completion, cached: bool, latency: float
+    ) -> None:
+        """Record the usage of a chat completion request (see `Usage`).
+
+        Args:
+            completion: The completion that was returned
+            cached: Whether the completion came from the cache
+            latency: Number of seconds that the request took"""
+        Usage.record_request(
+            completion.model,
+            cached=cached,
+            latency=latency,
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+        )
+
+    def raise_if_collecting(self, key: str, **kwargs) -> None:
+        """Collect the request instead of sending it, if requests are being
+        collected for a batch.
+
+        Args:
+            key: Cache key of the request (see `Completion.key`)
+            All other keyword arguments are the chat completion arguments.
+
+        Raises: PendingRequest if requests are being collected"""
+        if self.pending_requests is not None:
+            self.pending_requests[key] = kwargs
+            raise PendingRequest(key)
+
     def get_prompt(self, key: str, **kwargs) -> str:
         """Returns the prompt for the given key from prompt.yaml file.
 
+        The prompts file is loaded and compiled only once (see `Prompts`).
+
         Args:
             key: Name of the prompt
             All other keyword arguments will be passed to the template.
 
         Returns: Prompt"""
-        # Load all prompts
-        with open(self.directory.joinpath("prompts.yaml")) as f:
-            prompts = safe_load(f)
-
-        # Prepare prompt template
-        prompt_template = Template(prompts[key], undefined=StrictUndefined)
+        prompts = Prompts.load(self.directory.joinpath("prompts.yaml"))
+        return prompts.render(key, **kwargs)
 
-        return prompt_template.render(**kwargs)
-
-    def with_cache(self, method: C) -> C:
+    def with_cache(self, method: C, name: str | None = None) -> C:
         """Wraps the given method in a diskcache.
 
         When calling the method, diskcache checks if the method has been called
         with the exact arguments before. If so, the method does not get executed
-        and the cached response is simply returned."""
-        return self.cache.memoize()(method)
+        and the cached response is simply returned.
+
+        The usage of each call is recorded (see `Usage`). Tokens are only
+        known if the return value has a `usage` attribute, such as a
+        ChatCompletion.
+
+        Args:
+            method: The method to cache
+            name: Name to use in the cache key (defaults to the method's name)"""
+        memoized = self.cache.memoize(name=name)(method)
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            key = memoized.__cache_key__(*args, **kwargs)
+            result = self.cache.get(key, default=ENOVAL, retry=True)
+            cached = result is not ENOVAL
+
+            if not cached:
+                result = method(*args, **kwargs)
+                self.cache.set(key, result, retry=True)
+
+            self.record_call_usage(result, cached, time.perf_counter() - started_at)
+            return result
+
+        wrapper.__cache_key__ = memoized.__cache_key__  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    def with_async_cache(self, method: A, name: str | None = None) -> A:
+        """Wraps the given async method in a diskcache.
+
+        Works like `with_cache`, but for methods that return an awaitable. Calls
+        with the same name and arguments share cache entries with `with_cache`.
+
+        Args:
+            method: The async method to cache
+            name: Name to use in the cache key (defaults to the method's name)"""
+        memoized = self.cache.memoize(name=name)(method)
+
+        @wraps(method)
+        async def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            key = memoized.__cache_key__(*args, **kwargs)
+            result = self.cache.get(key, default=ENOVAL, retry=True)
+            cached = result is not ENOVAL
+
+            if not cached:
+                result = await method(*args, **kwargs)
+                self.cache.set(key, result, retry=True)
+
+            self.record_call_usage(result, cached, time.perf_counter() - started_at)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    def record_call_usage(self, result, cached: bool, latency: float) -> None:
+        """Record the usage of a call to a cached method (see `Usage`).
+
+        Args:
+            result: Return value of the method
+            cached: Whether the return value came from the cache
+            latency: Number of seconds that the call took"""
+        tokens = getattr(result, "usage", None)
+        Usage.record_request(
+            getattr(result, "model", None),
+            cached=cached,
+            latency=latency,
+            prompt_tokens=getattr(tokens, "prompt_tokens", None),
+            completion_tokens=getattr(tokens, "completion_tokens", None),
+        )
 
     @classproperty
     def name(cls) -> str:
@@ -107,14 +747,12 @@ class BaseClassifier:
             classifier: Name of classifier class to load
 
         Returns: Class of classifier"""
-
-        module_path = f"classifiers.{classifier}.{classifier}"
-        try:
-            module = importlib.import_module(module_path, __name__)
-            return getattr(module, "Classifier")
-        except ModuleNotFoundError as e:
-            file_path = module_path.replace(".", "/") + ".py"
+        info = Registry().get(classifier)
+        if info is None:
+            file_path = f"classifiers/{classifier}/{classifier}.py"
             print(
                 f"Tried to load classifier {classifier}. But file {file_path} does not exist."
             )
             exit(1)
+
+        return info.load()  # type: ignore[return-value]
@@ -0,0 +1,251 @@
+import io
+import json
+import time
+from pathlib import Path
+import httpx
+from .BaseClassifier import BaseClassifier
+from .Completion import Completion
+from .PendingRequest import PendingRequest
+from .clients import get_openai_client
+
+from typing import Any, ClassVar, Iterable
+from openai.types.chat.chat_completion import ChatCompletion
+
+
+class BatchJob:
+    """Classifies texts with the OpenAI Batch API.
+
+    The Batch API processes requests offline (within 24 hours) at half the
+    price and with a separate quota. Instead of sending requests one by one,
+    the job:
+
+    1. Runs the classifier on all texts and collects the chat completion
+       requests that are not cached yet (see `PendingRequest`)
+    2. Writes the requests into a JSONL file and submits it as a batch
+    3. Polls the batch until it has finished
+    4. Downloads the output and stores each response in the classifier's cache
+
+    Classifiers that make several requests per text (where later requests
+    depend on earlier responses) need several rounds. Once the job has
+    finished, classifying the texts as usual only hits the cache.
+
+    Submitted batches are recorded in a state file, so that an interrupted job
+    waits for them instead of submitting the requests again.
+
+    Typical usage example:
+
+    ```
+    BatchJob(classifier, state=Path("batches.json")).run(texts)
+    sdgs = classifier.classify_many(texts)
+    ```
+    """
+
+    ENDPOINT: ClassVar[str] = "/v1/chat/completions"
+
+    # Maximum number of requests per batch, as accepted by the Batch API
+    MAX_REQUESTS: ClassVar[int] = 50_000
+
+    # Statuses of batches that have finished processing
+    FINAL_STATUSES: ClassVar[set[str]] = {"completed", "failed", "expired", "cancelled"}
+
+    classifier: BaseClassifier
+    state: Path
+    poll_interval: float
+    max_rounds: int
+
+    def __init__(
+        self,
+        classifier: BaseClassifier,
+        state: Path,
+        poll_interval: float = 30,
+        max_rounds: int = 10,
+    ) -> None:
+        """Initialize the batch job.
+
+        Args:
+            classifier: The classifier to collect requests from
+            state: Path to the state file that records submitted batches
+            poll_interval: Number of seconds to wait between status checks
+            max_rounds: Maximum number of batches to submit one after another
+        """
+        self.classifier = classifier
+        self.state = state
+        self.poll_interval = poll_interval
+        self.max_rounds = max_rounds
+
+        # Status requests are cheap, so retry them on connection errors
+        self.client = get_openai_client().with_options(max_retries=5)
+
+    def run(self, texts: Iterable[str]) -> None:
+        """Classify the texts in batches until all requests are cached.
+
+        Args:
+            texts: The texts to classify"""
+        texts = list(texts)
+
+        # Wait for batches that were submitted by an interrupted job
+        for batch_id in self.get_submitted():
+            print(f"Waiting for previously submitted batch {batch_id}")
+            self.store_results(self.wait(batch_id))
+
+        for round in range(1, self.max_rounds + 1):
+            requests = self.collect_requests(texts)
+            if not requests:
+                return
+
+            print(f"Round {round}: submitting {len(requests)} requests")
+            stored = 0
+            for batch_id in self.submit(requests):
+                stored += self.store_results(self.wait(batch_id))
+
+            # Remaining requests are sent without batching
+            if stored == 0:
+                print("No requests were completed by the batch")
+                return
+
+    def collect_requests(self, texts: Iterable[str]) -> dict[str, dict]:
+        """Collect the chat completion requests that are not cached yet.
+
+        Each text (or pack of texts) is classified until its first request
+        that is not cached.
+
+        Args:
+            texts: The texts to classify
+
+        Returns: Chat completion arguments by cache key"""
+        requests: dict[str, dict] = {}
+        self.classifier.pending_requests = requests
+
+        try:
+            for pack in self.classifier.get_packs(texts):
+                try:
+                    self.classifier._classify_pack(pack)
+                except PendingRequest:
+                    pass
+        finally:
+            self.classifier.pending_requests = None
+
+        return requests
+
+    def submit(self, requests: dict[str, dict]) -> list[str]:
+        """Upload the requests and create batches for them.
+
+        Args:
+            requests: Chat completion arguments by cache key
+
+        Returns: IDs of the created batches"""
+        items = list(requests.items())
+        batch_ids = []
+
+        for i in range(0, len(items), self.MAX_REQUESTS):
+            lines = [
+                json.dumps(
+                    dict(custom_id=key, method="POST", url=self.ENDPOINT, body=body)
+                )
+                for key, body in items[i : i + self.MAX_REQUESTS]
+            ]
+            file = self.client.files.create(
+                file=("batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+                purpose="batch",  # type: ignore[arg-type]
+            )
+            batch = self.request(
+                "post",
+                "/batches",
+                body=dict(
+                    input_file_id=file.id,
+                    endpoint=self.ENDPOINT,
+                    completion_window="24h",
+                ),
+            )
+            batch_ids.append(batch["id"])
+            self.set_submitted(self.get_submitted() + [batch["id"]])
+
+        return batch_ids
+
+    def wait(self, batch_id: str) -> dict:
+        """Poll the batch until it has finished.
+
+        Args:
+            batch_id: ID of the batch
+
+        Returns: The batch object"""
+        while True:
+            batch = self.request("get", f"/batches/{batch_id}")
+            if batch["status"] in self.FINAL_STATUSES:
+                return batch
+
+            counts = batch.get("request_counts") or {}
+            print(
+                f"Batch {batch_id} is {batch['status']} "
+                f"({counts.get('completed', 0)}/{counts.get('total', 0)} requests)"
+            )
+            time.sleep(self.poll_interval)
+
+    def store_results(self, batch: dict) -> int:
+        """Store the responses of a finished batch in the classifier's cache.
+
+        Args:
+            batch: The batch object
+
+        Returns: Number of stored responses"""
+        stored, failed = 0, 0
+
+        if batch.get("output_file_id"):
+            output = self.client.files.content(batch["output_file_id"]).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    failed += 1
+                    continue
+
+                completion = Completion.from_chat_completion(
+                    ChatCompletion.model_validate(response["body"])
+                )
+                self.classifier.cache.set(
+                    result["custom_id"], completion.to_json(), retry=True
+                )
+                stored += 1
+
+        counts = batch.get("request_counts") or {}
+        failed = max(failed, counts.get("failed", 0))
+        print(
+            f"Batch {batch['id']} {batch['status']}: "
+            f"{stored} responses stored, {failed} failed"
+        )
+
+        self.set_submitted([id for id in self.get_submitted() if id != batch["id"]])
+        return stored
+
+    def request(self, method: str, path: str, body: Any = None) -> dict:
+        """Send a request to a Batch API endpoint.
+
+        Args:
+            method: HTTP method (get or post)
+            path: Path of the endpoint, relative to the API base URL
+            body: JSON body of the request
+
+        Returns: JSON body of the response"""
+        if method == "post":
+            response = self.client.post(path, body=body, cast_to=httpx.Response)
+        else:
+            response = self.client.get(path, cast_to=httpx.Response)
+        return response.json()
+
+    def get_submitted(self) -> list[str]:
+        """Get the IDs of batches that have been submitted, but not stored."""
+        if not self.state.exists():
+            return []
+        return json.loads(self.state.read_text())
+
+    def set_submitted(self, batch_ids: list[str]) -> None:
+        """Record the IDs of batches that have been submitted, but not stored."""
+        if not batch_ids:
+            self.state.unlink(missing_ok=True)
+            return
+
+        self.state.parent.mkdir(exist_ok=True, parents=True)
+        self.state.write_text(json.dumps(batch_ids))
@@ -0,0 +1,164 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import diskcache
+from dotenv import load_dotenv
+
+from typing import Any, Self
+
+
+class Cache(diskcache.Cache):
+    """Two-tier cache with a bounded in-memory LRU in front of diskcache.
+
+    Reads are served from memory when possible, so that cache hits do not need
+    to go to SQLite. Writes go to both memory and disk. The disk cache is
+    limited in size and evicts entries once the limit is reached.
+
+    Several processes (and nodes with a shared file system) can share one
+    cache by pointing it at the same directory.
+
+    Typical usage example:
+
+    ```
+    cache = Cache.from_env(default_directory=Path(".cache"))
+    ```
+    """
+
+    memory_size: int
+    _memory: OrderedDict
+    _memory_lock: threading.Lock
+
+    def __init__(self, directory: Path, memory_size: int = 4096, **settings) -> None:
+        """Initialize the cache.
+
+        Args:
+            directory: Directory of the disk cache
+            memory_size: Maximum number of entries to keep in memory
+                         (0 = disable memory tier)
+            All other keyword arguments are passed as settings to diskcache,
+            such as size_limit (in bytes) and eviction_policy."""
+        super().__init__(str(directory), **settings)
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_directory: Path) -> Self:
+        """Create a cache configured with environment variables.
+
+        - CLASSIFIERS_CACHE_DIRECTORY: Directory of the disk cache. Set this to
+          share one cache across classifiers and processes. (default =
+          default_directory)
+        - CLASSIFIERS_CACHE_MEMORY_SIZE: Maximum number of entries to keep in
+          memory (default = 4096)
+        - CLASSIFIERS_CACHE_SIZE_LIMIT: Maximum size of the disk cache in bytes
+          (default = 1 GB)
+        - CLASSIFIERS_CACHE_EVICTION_POLICY: How to evict entries from the disk
+          cache once the size limit is reached: least-recently-stored,
+          least-recently-used, least-frequently-used or none (default =
+          least-recently-stored)
+
+        Args:
+            default_directory: Directory of the disk cache, unless configured
+
+        Returns: Cache instance"""
+        load_dotenv()
+        env = os.environ
+        settings: dict[str, Any] = dict()
+
+        if "CLASSIFIERS_CACHE_SIZE_LIMIT" in env:
+            settings["size_limit"] = int(env["CLASSIFIERS_CACHE_SIZE_LIMIT"])
+
+        if "CLASSIFIERS_CACHE_EVICTION_POLICY" in env:
+            settings["eviction_policy"] = env["CLASSIFIERS_CACHE_EVICTION_POLICY"]
+
+        return cls(
+            Path(env.get("CLASSIFIERS_CACHE_DIRECTORY", default_directory)),
+            memory_size=int(env.get("CLASSIFIERS_CACHE_MEMORY_SIZE", 4096)),
+            **settings,
+        )
+
+    def get(self, key, default=None, read=False, expire_time=False, tag=False, retry=False):  # type: ignore[override]
+        """Retrieve value from memory or, if not in memory, from disk.
+
+        See diskcache.Cache.get for arguments."""
+        # Only plain lookups of hashable keys can be served from memory
+        if read or expire_time or tag or not is_hashable(key):
+            return super().get(key, default, read, expire_time, tag, retry)
+
+        with self._memory_lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        value = super().get(key, default=diskcache.core.ENOVAL, retry=retry)
+
+        if value is diskcache.core.ENOVAL:
+            return default
+
+        self._remember(key, value)
+        return value
+
+    def set(self, key, value, expire=None, read=False, tag=None, retry=False):  # type: ignore[override]
+        """Store value in memory and on disk.
+
+        See diskcache.Cache.set for arguments."""
+        result = super().set(key, value, expire, read, tag, retry)
+
+        # Values that expire or are read from files are only stored on disk
+        if expire is None and not read:
+            self._remember(key, value)
+        else:
+            self._forget(key)
+
+        return result
+
+    def delete(self, key, retry=False):  # type: ignore[override]
+        self._forget(key)
+        return super().delete(key, retry)
+
+    def __delitem__(self, key, retry=True):  # type: ignore[override]
+        self._forget(key)
+        return super().__delitem__(key, retry)
+
+    def pop(self, key, *args, **kwargs):  # type: ignore[override]
+        self._forget(key)
+        return super().pop(key, *args, **kwargs)
+
+    def clear(self, retry=False):  # type: ignore[override]
+        with self._memory_lock:
+            self._memory.clear()
+        return super().clear(retry)
+
+    def _remember(self, key: Any, value: Any) -> None:
+        """Store value in memory, evicting the least-recently-used entries."""
+        if self.memory_size <= 0 or not is_hashable(key):
+            return
+
+        with self._memory_lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _forget(self, key: Any) -> None:
+        """Remove value from memory."""
+        if not is_hashable(key):
+            return
+
+        with self._memory_lock:
+            self._memory.pop(key, None)
+
+
+def is_hashable(key: Any) -> bool:
+    """Check if the key can be stored in memory.
+
+    Keys generated by memoize may contain lists or dicts, which cannot be
+    hashed. diskcache supports them by pickling the key."""
+    try:
+        hash(key)
+        return True
+    except TypeError:
+        return False
@@ -0,0 +1,170 @@
+import json
+import hashlib
+from dataclasses import dataclass, asdict
+
+from typing import TYPE_CHECKING, Any, ClassVar, Iterable, Self
+
+if TYPE_CHECKING:
+    from openai.types.chat.chat_completion import ChatCompletion
+    from openai.types.chat import ChatCompletionTokenLogprob
+
+
+@dataclass(frozen=True, kw_only=True)
+class Completion:
+    """Compact record of a chat completion, as stored in the cache.
+
+    Only the parts of the response that classifiers use are kept. Records are
+    stored as JSON, so that cached completions do not depend on the class
+    layout of the openai library. Token logprobs (if requested) are kept as
+    [token, logprob, [[alternative, logprob], ...]] lists.
+
+    Typical usage example:
+
+    ```
+    key = Completion.key(model="gpt-4o", messages=[...])
+    completion = Completion.from_chat_completion(response)
+    cache.set(key, completion.to_json())
+    ```
+    """
+
+    # Version of the key and record format. Bump to invalidate all entries.
+    VERSION: ClassVar[int] = 1
+
+    model: str
+    content: str | None
+    finish_reason: str | None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    logprobs: list | None = None
+
+    @property
+    def total_tokens(self) -> int | None:
+        """Number of prompt and completion tokens (None = unknown)"""
+        if self.prompt_tokens is None or self.completion_tokens is None:
+            return None
+        return self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def key(cls, **kwargs) -> str:
+        """Compact cache key for a chat completion request.
+
+        The request is normalized into the model, a hash of each message and all
+        other parameters (sorted by name). The key is a digest of the result.
+
+        Args:
+            All chat completion keyword arguments
+
+        Returns: Cache key"""
+        messages = [
+            hashlib.sha256(
+                json.dumps(message, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+            for message in kwargs.get("messages", [])
+        ]
+        request = json.dumps(
+            {**kwargs, "messages": messages},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        digest = hashlib.sha256(request.encode("utf-8")).hexdigest()[:32]
+        return f"chat.completions:v{cls.VERSION}:{digest}"
+
+    @classmethod
+    def from_chat_completion(cls, response: "ChatCompletion") -> Self:
+        """Create the record from a chat completion response.
+
+        Args:
+            response: ChatCompletion response from the OpenAI API
+
+        Returns: Completion record"""
+        choice = response.choices[0]
+        usage = response.usage
+
+        logprobs = None
+        if choice.logprobs is not None and choice.logprobs.content is not None:
+            logprobs = cls.compact_logprobs(choice.logprobs.content)
+
+        return cls(
+            model=response.model,
+            content=choice.message.content,
+            finish_reason=choice.finish_reason,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+            logprobs=logprobs,
+        )
+
+    @staticmethod
+    def compact_logprobs(tokens: Iterable["ChatCompletionTokenLogprob"]) -> list:
+        """Convert token logprobs into the compact form of the record.
+
+        Args:
+            tokens: Logprobs of the tokens of a response (or of a chunk)
+
+        Returns: List of [token, logprob, [[alternative, logprob], ...]]"""
+        return [
+            [
+                token.token,
+                token.logprob,
+                [[top.token, top.logprob] for top in token.top_logprobs],
+            ]
+            for token in tokens
+        ]
+
+    def to_chat_completion(self) -> "ChatCompletion":
+        """Re-create the chat completion response from the record.
+
+        Returns: ChatCompletion response"""
+        from openai.types.chat.chat_completion import ChatCompletion
+
+        usage = None
+        if self.total_tokens is not None:
+            usage = dict(
+                prompt_tokens=self.prompt_tokens,
+                completion_tokens=self.completion_tokens,
+                total_tokens=self.total_tokens,
+            )
+
+        logprobs = None
+        if self.logprobs is not None:
+            logprobs = dict(
+                content=[
+                    dict(
+                        token=token,
+                        logprob=logprob,
+                        bytes=None,
+                        top_logprobs=[
+                            dict(token=top, logprob=top_logprob, bytes=None)
+                            for top, top_logprob in top_logprobs
+                        ],
+                    )
+                    for token, logprob, top_logprobs in self.logprobs
+                ]
+            )
+
+        return ChatCompletion.model_validate(
+            dict(
+                id="cached",
+                object="chat.completion",
+                created=0,
+                model=self.model,
+                choices=[
+                    dict(
+                        index=0,
+                        message=dict(role="assistant", content=self.content),
+                        finish_reason=self.finish_reason or "stop",
+                        logprobs=logprobs,
+                    )
+                ],
+                usage=usage,
+            )
+        )
+
+    def to_json(self) -> str:
+        """Serialize the record as JSON."""
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: str) -> Self:
+        """Deserialize the record from JSON."""
+        return cls(**json.loads(data))
@@ -1,8 +1,9 @@
 from collections import Counter
+from itertools import product
 from .Config import Config
 from .Parameters import Parameters
 
-from typing import Iterator
+from typing import Any, Iterable, Iterator, Self
 
 
 class ConfigSet:
@@ -26,6 +27,34 @@ class ConfigSet:
         self.parameters = parameters
         self.__configs = configs
 
+    @classmethod
+    def grid(cls, parameters: Parameters, **values: Iterable[Any]) -> Self:
+        """Create a ConfigSet with every combination of the given values.
+
+        Configs are ordered by the values of the first parameter, then by the
+        values of the second one, and so on.
+
+        Typical usage example:
+
+        ```
+        CONFIGURATIONS = ConfigSet.grid(
+            Parameters(model="ChatGPT model", temperature="Sampling temperature"),
+            model=["gpt-4o-mini", "gpt-4o"],
+            temperature=[0, 0.5, 1],
+        )
+        ```
+
+        Args:
+            parameters: The allowed parameters
+            All keyword arguments are lists of values of a parameter
+
+        Returns: ConfigSet with one config per combination"""
+        names = list(values)
+        configs = [
+            Config(zip(names, combination)) for combination in product(*values.values())
+        ]
+        return cls(parameters, *configs)
+
     def __len__(self) -> int:
         return len(self.__configs)
 
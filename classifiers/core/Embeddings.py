@@ -0,0 +1,190 @@
+import hashlib
+from pathlib import Path
+import numpy as np
+from .Cache import Cache
+from .clients import get_openai_client
+
+from typing import ClassVar, Iterable
+
+
+class Embeddings:
+    """Computes normalized text embeddings with an embedding model.
+
+    Embeddings are created from a spec of the form `<backend>:<model>`:
+
+    - `openai:text-embedding-3-small`: OpenAI embeddings API
+    - `local:sentence-transformers/all-MiniLM-L6-v2`: Local model on the CPU
+      (requires the optional sentence-transformers package)
+    - `file:embeddings.npz`: Embeddings file (see `save`), for working offline
+
+    Embeddings are stored in the cache (if given), so that each text is only
+    embedded once per model.
+
+    Typical usage example:
+
+    ```
+    embeddings = Embeddings.from_spec("openai:text-embedding-3-small", cache)
+    vectors = embeddings.embed(["text 1", "text 2"])
+    ```
+    """
+
+    # Version of the cache key format. Bump to invalidate all entries.
+    VERSION: ClassVar[int] = 1
+
+    # Number of texts to embed with a single request
+    BATCH_SIZE: ClassVar[int] = 256
+
+    model: str
+    cache: Cache | None
+
+    def __init__(self, model: str, cache: Cache | None = None) -> None:
+        """Initialize the embeddings.
+
+        Args:
+            model: Name of the embedding model
+            cache: Cache to store embeddings in (default = no cache)"""
+        self.model = model
+        self.cache = cache
+
+    @classmethod
+    def from_spec(cls, spec: str, cache: Cache | None = None) -> "Embeddings":
+        """Create the embeddings for the given spec.
+
+        Args:
+            spec: Backend and model, such as openai:text-embedding-3-small
+            cache: Cache to store embeddings in (default = no cache)
+
+        Returns: Embeddings instance"""
+        backend, _, model = spec.partition(":")
+
+        if backend == "openai":
+            return OpenAIEmbeddings(model, cache=cache)
+        if backend == "local":
+            return LocalEmbeddings(model, cache=cache)
+        if backend == "file":
+            return FileEmbeddings(Path(model))
+
+        raise Exception(f"Unknown embeddings backend: {spec}")
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """Embed the given texts.
+
+        Args:
+            texts: The texts to embed
+
+        Returns: Matrix with one normalized embedding (row) per text"""
+        texts = list(texts)
+        keys = [self.get_key(text) for text in texts]
+        vectors: dict[str, np.ndarray] = {}
+
+        # Look up cached embeddings
+        if self.cache is not None:
+            for key in set(keys):
+                data = self.cache.get(key, retry=True)
+                if data is not None:
+                    vectors[key] = np.frombuffer(data, dtype=np.float32)
+
+        # Embed the remaining texts in batches
+        missing = list({k: t for k, t in zip(keys, texts) if k not in vectors}.items())
+        for i in range(0, len(missing), self.BATCH_SIZE):
+            batch = missing[i : i + self.BATCH_SIZE]
+            computed = self.compute([text for _, text in batch])
+
+            for (key, _), vector in zip(batch, computed, strict=True):
+                vector = np.asarray(vector, dtype=np.float32)
+                vectors[key] = vector
+                if self.cache is not None:
+                    self.cache.set(key, vector.tobytes(), retry=True)
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        matrix = np.stack([vectors[key] for key in keys])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def compute(self, texts: list[str]) -> list:
+        """Compute the embeddings of the given texts with the model.
+
+        Must be implemented by each backend.
+
+        Args:
+            texts: The texts to embed
+
+        Returns: List of embeddings, in the same order as the texts"""
+        raise Exception("compute method must be implemented")
+
+    def get_key(self, text: str) -> str:
+        """Cache key of the embedding of the text."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        return f"embeddings:v{self.VERSION}:{self.model}:{digest}"
+
+    def save(self, path: Path, texts: Iterable[str]) -> None:
+        """Save the embeddings of the given texts to a file.
+
+        The file can be used with the `file:` backend to work offline.
+
+        Args:
+            path: Path of the embeddings file (.npz)
+            texts: The texts to embed"""
+        texts = list(dict.fromkeys(texts))
+        np.savez_compressed(
+            path,
+            model=np.array(self.model),
+            keys=np.array([self.get_key(text) for text in texts]),
+            vectors=self.embed(texts),
+        )
+
+
+class OpenAIEmbeddings(Embeddings):
+    """Embeddings from the OpenAI embeddings API."""
+
+    def compute(self, texts: list[str]) -> list:
+        client = get_openai_client().with_options(max_retries=5)
+        response = client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+class LocalEmbeddings(Embeddings):
+    """Embeddings from a local sentence-transformers model, run on the CPU."""
+
+    def __init__(self, model: str, cache: Cache | None = None) -> None:
+        super().__init__(model, cache=cache)
+
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "Local embeddings require sentence-transformers. "
+                "Install it with: pip install sentence-transformers"
+            )
+
+        self.encoder = SentenceTransformer(model, device="cpu")
+
+    def compute(self, texts: list[str]) -> list:
+        return list(self.encoder.encode(texts, batch_size=self.BATCH_SIZE))
+
+
+class FileEmbeddings(Embeddings):
+    """Embeddings from a file that was written with `Embeddings.save`."""
+
+    def __init__(self, path: Path) -> None:
+        with np.load(path) as data:
+            super().__init__(str(data["model"]))
+            self.vectors = dict(zip(data["keys"].tolist(), data["vectors"]))
+
+        # Embeddings are read from the file, so they are not cached again
+        self.cache = None
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        keys = [self.get_key(text) for text in texts]
+
+        missing = sum(key not in self.vectors for key in keys)
+        if missing:
+            raise KeyError(f"{missing} texts are not in the embeddings file")
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        return np.stack([self.vectors[key] for key in keys])
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+from weakref import WeakKeyDictionary
+from .Completion import Completion
+from .Provider import Provider
+from .StreamParser import StreamParser
+from .clients import (
+    create_openai_client,
+    create_async_openai_client,
+    get_openai_client,
+    get_async_openai_client,
+)
+
+from typing import TYPE_CHECKING, Any, Iterable
+
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
+    from openai.types.chat import ChatCompletionChunk
+
+
+class OpenAIProvider(Provider):
+    """The OpenAI API or any server with an OpenAI-compatible API, such as a
+    local vLLM, Ollama or llama.cpp server.
+
+    Without a base URL and API key, the provider uses the OpenAI client shared
+    by all classifiers (configured with OPENAI_API_KEY and OPENAI_BASE_URL).
+    Otherwise, it has clients (and connection pools) of its own.
+
+    With a parser, the response is streamed and the stream is closed as soon
+    as the answer is complete. The rest of the response is never generated (or
+    at least never sent), which saves time and completion tokens.
+    """
+
+    base_url: str | None
+    api_key: str | None
+
+    def __init__(
+        self,
+        name: str = "openai",
+        models: Iterable[str] | dict[str, str] | None = None,
+        base_url: str | None = None,
+        api_key: str | None = None,
+    ) -> None:
+        """Initialize the provider.
+
+        Args:
+            name: Name of the provider (default = openai)
+            models: Models that the provider serves (see `Provider`)
+            base_url: URL of the API (defaults to OPENAI_BASE_URL or the OpenAI
+                      API)
+            api_key: API key. Servers that do not check the key can be used
+                     without one. (defaults to OPENAI_API_KEY, unless the
+                     base URL is set)"""
+        super().__init__(name, models)
+        self.base_url = base_url
+        self.api_key = api_key
+        if base_url is not None and api_key is None:
+            # Never send the OpenAI API key to other servers
+            self.api_key = "none"
+
+        self._client: "OpenAI | None" = None
+        self._client_lock = threading.Lock()
+        self._async_clients: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, "AsyncOpenAI"
+        ] = WeakKeyDictionary()
+
+    @property
+    def is_shared(self) -> bool:
+        """Whether the provider uses the OpenAI client shared by all classifiers."""
+        return self.base_url is None and self.api_key is None
+
+    def get_client(self) -> "OpenAI":
+        """Get the client of the provider."""
+        if self.is_shared:
+            return get_openai_client()
+
+        with self._client_lock:
+            if self._client is None:
+                self._client = create_openai_client(self.base_url, self.api_key)
+            return self._client
+
+    def get_async_client(self) -> "AsyncOpenAI":
+        """Get the async client of the provider for the running event loop."""
+        if self.is_shared:
+            return get_async_openai_client()
+
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = create_async_openai_client(
+                self.base_url, self.api_key
+            )
+
+        return self._async_clients[loop]
+
+    def connect(self) -> None:
+        # The chat completions resource is imported on first access
+        self.get_client().chat.completions
+
+    def create(self, parser: StreamParser | None = None, **kwargs) -> Completion:
+        kwargs["model"] = self.get_model(kwargs["model"])
+        if parser is None:
+            response = self.get_client().chat.completions.create(**kwargs)
+            return Completion.from_chat_completion(response)
+
+        stream = self.get_client().chat.completions.create(
+            **self.get_stream_kwargs(kwargs)
+        )
+        reader = StreamReader(parser)
+        try:
+            for chunk in stream:
+                if reader.read(chunk):
+                    break
+        finally:
+            stream.response.close()
+
+        return reader.get_completion(kwargs)
+
+    async def acreate(self, parser: StreamParser | None = None, **kwargs) -> Completion:
+        kwargs["model"] = self.get_model(kwargs["model"])
+        if parser is None:
+            response = await self.get_async_client().chat.completions.create(**kwargs)
+            return Completion.from_chat_completion(response)
+
+        stream = await self.get_async_client().chat.completions.create(
+            **self.get_stream_kwargs(kwargs)
+        )
+        reader = StreamReader(parser)
+        try:
+            async for chunk in stream:
+                if reader.read(chunk):
+                    break
+        finally:
+            await stream.response.aclose()
+
+        return reader.get_completion(kwargs)
+
+    @staticmethod
+    def get_stream_kwargs(kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Get the keyword arguments of a streamed request.
+
+        Asks for the usage in the last chunk, which arrives if the answer is
+        only complete at the end of the response. Passed as extra body, since
+        older versions of the openai library do not know `stream_options`.
+
+        Args:
+            kwargs: Chat completion keyword arguments
+
+        Returns: Keyword arguments"""
+        extra_body = dict(kwargs.get("extra_body") or {})
+        extra_body.setdefault("stream_options", {"include_usage": True})
+        return {**kwargs, "stream": True, "extra_body": extra_body}
+
+    def is_retryable(self, error: Exception) -> bool:
+        from openai import APIError, BadRequestError, UnprocessableEntityError
+
+        # Invalid requests fail with every provider. All other errors (such as
+        # server errors, rate limits, timeouts or a missing model) may not.
+        if isinstance(error, (BadRequestError, UnprocessableEntityError)):
+            return False
+        return isinstance(error, APIError)
+
+
+class StreamReader:
+    """Reassembles a completion from the chunks of a streamed response."""
+
+    def __init__(self, parser: StreamParser) -> None:
+        self.parser = parser
+        self.model: str | None = None
+        self.finish_reason: str | None = None
+        self.prompt_tokens: int | None = None
+        self.completion_tokens: int | None = None
+        self.logprobs: list | None = None
+
+    def read(self, chunk: "ChatCompletionChunk") -> bool:
+        """Read the next chunk.
+
+        Args:
+            chunk: Chunk of the streamed response
+
+        Returns: Whether the answer is complete"""
+        self.model = chunk.model or self.model
+        if chunk.usage is not None:
+            self.prompt_tokens = chunk.usage.prompt_tokens
+            self.completion_tokens = chunk.usage.completion_tokens
+        if not chunk.choices:
+            return False
+
+        choice = chunk.choices[0]
+        self.finish_reason = choice.finish_reason or self.finish_reason
+        if choice.logprobs is not None and choice.logprobs.content is not None:
+            logprobs = Completion.compact_logprobs(choice.logprobs.content)
+            self.logprobs = (self.logprobs or []) + logprobs
+        if not choice.delta.content:
+            return False
+
+        if self.parser.feed(choice.delta.content):
+            self.finish_reason = "stop"
+            return True
+        return False
+
+    def get_completion(self, kwargs: dict[str, Any]) -> Completion:
+        """Get the completion of the response read so far.
+
+        The usage of a cancelled stream is never sent, so its tokens are unknown
+        (None) and not counted in the usage of a run (see `Usage.unmetered`).
+
+        Args:
+            kwargs: Chat completion keyword arguments of the request
+
+        Returns: Completion"""
+        return Completion(
+            model=self.model or kwargs["model"],
+            content=self.parser.content,
+            finish_reason=self.finish_reason,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            logprobs=self.logprobs,
+        )
@@ -0,0 +1,6 @@
+class PackError(Exception):
+    """Raised when the response for a pack of texts cannot be parsed.
+
+    The texts of the pack are then classified one by one."""
+
+    pass
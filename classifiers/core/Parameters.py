@@ -11,12 +11,26 @@ class Parameters(frozendict):
 
     __getattr__ = dict.get
 
+    # Parameters that are handled by BaseClassifier itself. Any config may
+    # optionally set them, without the classifier having to declare them.
+    OPTIONAL = frozendict(
+        concurrency="Maximum number of texts classified in parallel",
+        pack_size="Number of texts classified with a single request",
+        prefilter="Minimum similarity of the embedding pre-filter",
+        embeddings="Embedding model of the pre-filter",
+        stream="Whether to stream responses and stop them early",
+        scores="Whether to request logprobs for confidence scores",
+    )
+
     def validate(self, config: Config) -> None:
         """Validate that the given config defines all parameters.
 
+        Optional parameters (see `Parameters.OPTIONAL`) may be omitted.
+
         Raises: Exception if config has too few or too many keys"""
         expected_keys = set(self.keys())
-        actual_keys = set(config.keys())
+        optional_keys = set(self.OPTIONAL.keys()) - expected_keys
+        actual_keys = set(config.keys()) - optional_keys
 
         if expected_keys != actual_keys:
             raise Exception(
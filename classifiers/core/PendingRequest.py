@@ -0,0 +1,12 @@
+class PendingRequest(Exception):
+    """Raised when a chat completion is not cached while requests are being
+    collected for a batch (see `BatchJob`).
+
+    The classification of the text stops at the first request that is not
+    cached yet."""
+
+    key: str
+
+    def __init__(self, key: str) -> None:
+        super().__init__(f"Chat completion {key} is pending")
+        self.key = key
@@ -0,0 +1,142 @@
+import re
+from pathlib import Path
+import numpy as np
+from yaml import safe_load
+from .Embeddings import Embeddings
+
+from typing import ClassVar, Iterable
+
+
+class PreFilter:
+    """Embedding-based pre-filter that skips texts without relevant SDGs.
+
+    Each SDG has a centroid: the mean embedding of its description and of the
+    topics that belong to it. Subtopics in topics.yaml belong to the SDG of
+    their tree. All other topics belong to the SDG with the most similar
+    description.
+
+    A text is compared to every centroid (cosine similarity). SDGs with a
+    similarity of at least the threshold are the text's candidates. Texts
+    without any candidates are not sent to the LLM at all.
+
+    Typical usage example:
+
+    ```
+    prefilter = PreFilter(Embeddings.from_spec("openai:text-embedding-3-small"), 0.3)
+    candidates = prefilter.get_candidates(texts)
+    ```
+    """
+
+    # Embedding model to use, unless configured
+    DEFAULT_EMBEDDINGS: ClassVar[str] = "openai:text-embedding-3-small"
+
+    # Files to build the centroids from
+    DESCRIPTIONS_PATH: ClassVar[Path] = Path(__file__).parent.parent.joinpath(
+        "chatgpt_informed_prompt", "prompt.yaml"
+    )
+    TOPICS_PATH: ClassVar[Path] = Path(__file__).parent.parent.joinpath(
+        "chatgpt_topics_hmc", "topics.yaml"
+    )
+
+    embeddings: Embeddings
+    threshold: float
+    sdgs: list[int]
+    centroids: np.ndarray
+
+    def __init__(self, embeddings: Embeddings, threshold: float) -> None:
+        """Initialize the pre-filter and compute the centroids.
+
+        Args:
+            embeddings: Embeddings to compare texts with
+            threshold: Minimum similarity for an SDG to be a candidate"""
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.sdgs, self.centroids = self.get_centroids()
+
+    @classmethod
+    def load_descriptions(cls) -> dict[int, str]:
+        """Load the SDG descriptions from the informed prompt.
+
+        Returns: Description by SDG"""
+        with open(cls.DESCRIPTIONS_PATH) as f:
+            prompt = safe_load(f)["system"]
+
+        matches = re.findall(r"^\s*SDG (\d+): (.+)$", prompt, flags=re.MULTILINE)
+        return {int(sdg): description.strip() for sdg, description in matches}
+
+    @classmethod
+    def load_topics(cls) -> tuple[list[str], dict[int, list[str]]]:
+        """Load the topics and subtopics from topics.yaml.
+
+        Returns: Topics without an SDG and subtopics by SDG"""
+        with open(cls.TOPICS_PATH) as f:
+            data = safe_load(f)
+
+        subtopics: dict[int, list[str]] = {}
+        for tree in data.get("subtopics", {}).values():
+            subtopics.setdefault(tree["sdg"], []).extend(tree["topics"])
+
+        return data["topics"], subtopics
+
+    @classmethod
+    def get_sources(cls) -> list[str]:
+        """Get all texts that the centroids are built from."""
+        descriptions = cls.load_descriptions()
+        topics, subtopics = cls.load_topics()
+        return [
+            *descriptions.values(),
+            *topics,
+            *[subtopic for texts in subtopics.values() for subtopic in texts],
+        ]
+
+    def get_centroids(self) -> tuple[list[int], np.ndarray]:
+        """Compute the centroid of each SDG.
+
+        Returns: List of SDGs and matrix with one centroid (row) per SDG"""
+        descriptions = self.load_descriptions()
+        topics, subtopics = self.load_topics()
+        sdgs = sorted(descriptions)
+
+        description_vectors = self.embeddings.embed([descriptions[s] for s in sdgs])
+        members = {sdg: [vector] for sdg, vector in zip(sdgs, description_vectors)}
+
+        # Subtopics belong to the SDG of their tree
+        for sdg, texts in subtopics.items():
+            if sdg in members:
+                members[sdg].extend(self.embeddings.embed(texts))
+
+        # Other topics belong to the SDG with the most similar description
+        if topics:
+            topic_vectors = self.embeddings.embed(topics)
+            nearest = (topic_vectors @ description_vectors.T).argmax(axis=1)
+            for vector, index in zip(topic_vectors, nearest):
+                members[sdgs[index]].append(vector)
+
+        centroids = np.stack([np.mean(members[sdg], axis=0) for sdg in sdgs])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+        return sdgs, centroids
+
+    def score(self, texts: Iterable[str]) -> np.ndarray:
+        """Compute the similarity of each text to each SDG centroid.
+
+        Args:
+            texts: The texts to score
+
+        Returns: Matrix with one row per text and one column per SDG (in the
+                 order of `sdgs`)"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, len(self.sdgs)))
+
+        return self.embeddings.embed(texts) @ self.centroids.T
+
+    def get_candidates(self, texts: Iterable[str]) -> list[list[int]]:
+        """Get the candidate SDGs of each text.
+
+        Args:
+            texts: The texts to filter
+
+        Returns: List of candidate SDGs for each text (empty if the text is
+                 not relevant to any SDG)"""
+        sdgs = np.array(self.sdgs)
+        return [sdgs[row >= self.threshold].tolist() for row in self.score(texts)]
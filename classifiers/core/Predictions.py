@@ -0,0 +1,188 @@
+import json
+import hashlib
+from pathlib import Path
+from .Usage import Usage
+
+from typing import TYPE_CHECKING, IO, Iterable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class Predictions:
+    """Predicted SDGs by text.
+
+    Texts are identified by a hash of their content. This makes it possible to
+    classify each unique text only once, no matter how many times it appears
+    in the benchmark.
+
+    Typical usage example:
+
+    ```
+    predictions = Predictions()
+    benchmark = Benchmark(predict_sdgs=predictions.get)
+
+    texts = predictions.missing(benchmark.df["text"])
+    predictions.update(texts, classifier.classify_many(texts))
+
+    benchmark.run()
+    ```
+
+    Predictions can be streamed to an append-only checkpoint file (JSON lines),
+    so that an interrupted evaluation can be resumed without classifying the
+    same texts again.
+
+    The usage of the requests made for each text (tokens, cost and latency)
+    can be stored along with its prediction (see `Usage`).
+    """
+
+    _sdgs: dict[str, list[int]]
+    _usage: dict[str, Usage]
+    _checkpoint: IO[str] | None = None
+
+    def __init__(self, checkpoint: Path | None = None) -> None:
+        """Initializes the set of predictions.
+
+        Args:
+            checkpoint: Path to the checkpoint file. Predictions already stored
+                        in the file are loaded and new predictions are appended
+                        to the file. (default = no checkpoint)"""
+        self._sdgs = {}
+        self._usage = {}
+
+        if checkpoint is None:
+            return
+
+        # Load predictions from checkpoint
+        is_complete = True
+        if checkpoint.exists():
+            with open(checkpoint, "r") as f:
+                for line in f:
+                    is_complete = line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line may be incomplete if the process was killed
+                        continue
+                    self._sdgs[record["hash"]] = record["sdgs"]
+                    if record.get("usage") is not None:
+                        self._usage[record["hash"]] = Usage.from_dict(record["usage"])
+
+        # Append new predictions to checkpoint
+        checkpoint.parent.mkdir(exist_ok=True, parents=True)
+        self._checkpoint = open(checkpoint, "a")
+
+        # Make sure that we do not append to an incomplete line
+        if not is_complete:
+            self._checkpoint.write("\n")
+
+    def close(self) -> None:
+        """Closes the checkpoint file, if any"""
+        if self._checkpoint:
+            self._checkpoint.close()
+            self._checkpoint = None
+
+    def __len__(self) -> int:
+        return len(self._sdgs)
+
+    def __contains__(self, text: str) -> bool:
+        return self.hash(text) in self._sdgs
+
+    @staticmethod
+    def hash(text: str) -> str:
+        """Hash of the text content, used to identify the text.
+
+        Args:
+            text: The text to hash
+
+        Returns: SHA-256 hash (hex digest)"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> list[int]:
+        """Get the predicted SDGs for the text.
+
+        Args:
+            text: The classified text
+
+        Returns: A list of SDGs in numeric form
+
+        Raises: KeyError if the text has not been classified"""
+        return self._sdgs[self.hash(text)]
+
+    def get_usage(self, text: str) -> Usage | None:
+        """Get the usage of the requests made to classify the text.
+
+        Args:
+            text: The classified text
+
+        Returns: Usage or None (if no usage was recorded for the text)"""
+        return self._usage.get(self.hash(text))
+
+    def get_usage_table(self, texts: Iterable[str]) -> "pd.DataFrame":
+        """Get the usage of the given texts as a table.
+
+        Args:
+            texts: The classified texts (may contain duplicates)
+
+        Returns: Dataframe with one row per unique text (as index) and one
+                 column per usage field (empty if no usage was recorded)"""
+        import pandas as pd
+
+        texts = list(dict.fromkeys(texts))
+        records = []
+        for text in texts:
+            usage = self.get_usage(text)
+            records.append(usage.to_dict() if usage else {})
+
+        columns = list(Usage().to_dict())
+        return pd.DataFrame.from_records(
+            records, index=pd.Index(texts, name="text"), columns=columns
+        )
+
+    def add(self, text: str, sdgs: list[int], usage: Usage | None = None) -> None:
+        """Add the predicted SDGs for the text.
+
+        Args:
+            text: The classified text
+            sdgs: The predicted SDGs in numeric form
+            usage: Usage of the requests made to classify the text (optional)"""
+        hash = self.hash(text)
+        self._sdgs[hash] = sdgs
+        record: dict = dict(hash=hash, sdgs=sdgs)
+
+        if usage is not None:
+            self._usage[hash] = usage
+            record["usage"] = usage.to_dict()
+
+        # Stream prediction to checkpoint
+        if self._checkpoint:
+            self._checkpoint.write(json.dumps(record) + "\n")
+            self._checkpoint.flush()
+
+    def update(self, texts: Iterable[str], sdgs: Iterable[list[int]]) -> None:
+        """Add the predicted SDGs for several texts.
+
+        Args:
+            texts: The classified texts
+            sdgs: The predicted SDGs for each text, in the same order"""
+        for text, text_sdgs in zip(texts, sdgs, strict=True):
+            self.add(text, text_sdgs)
+
+    def missing(self, texts: Iterable[str]) -> list[str]:
+        """Get the unique texts that have not been classified yet.
+
+        Args:
+            texts: The texts to check (may contain duplicates)
+
+        Returns: List of unique texts without predictions, in order of first
+                 appearance"""
+        hashes = set(self._sdgs)
+        missing = []
+
+        for text in texts:
+            hash = self.hash(text)
+            if hash not in hashes:
+                hashes.add(hash)
+                missing.append(text)
+
+        return missing
@@ -0,0 +1,128 @@
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from yaml import safe_load
+from jinja2 import Template, StrictUndefined
+from frozendict import frozendict
+
+from typing import Any, ClassVar, Hashable, Self
+
+
+class Prompts:
+    """Compiled prompt templates from a prompts.yaml file.
+
+    Each file is parsed and compiled only once per process. Use `Prompts.load`
+    to get the prompts for a file. It re-loads the file when it has been
+    modified since it was last loaded.
+
+    Rendered prompts are cached as well, so that static prompts (such as system
+    prompts) are rendered only once.
+    """
+
+    # Number of rendered prompts to keep per file
+    RENDER_CACHE_SIZE: ClassVar[int] = 256
+
+    # Loaded prompts by file path
+    _registry: ClassVar[dict[Path, "Prompts"]] = {}
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    path: Path
+    mtime: int
+    templates: dict[str, Template]
+
+    def __init__(self, path: Path, mtime: int) -> None:
+        """Load and compile the prompts from the given file.
+
+        Args:
+            path: Path to the prompts.yaml file
+            mtime: Modification time of the file (in ns)"""
+        self.path = path
+        self.mtime = mtime
+
+        with open(path) as f:
+            prompts = safe_load(f)
+
+        self.templates = {
+            key: Template(prompt, undefined=StrictUndefined)
+            for key, prompt in prompts.items()
+        }
+        self._render_cached = lru_cache(maxsize=self.RENDER_CACHE_SIZE)(self._render)
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """Get the prompts for the given file.
+
+        Args:
+            path: Path to the prompts.yaml file
+
+        Returns: Prompts instance"""
+        mtime = os.stat(path).st_mtime_ns
+
+        with cls._lock:
+            prompts = cls._registry.get(path)
+
+            if prompts is None or prompts.mtime != mtime:
+                prompts = cls._registry[path] = cls(path, mtime)
+
+            return prompts  # type: ignore[return-value]
+
+    def render(self, key: str, **kwargs) -> str:
+        """Render the prompt with the given key.
+
+        Args:
+            key: Name of the prompt
+            All other keyword arguments will be passed to the template.
+
+        Returns: Prompt"""
+        try:
+            arguments = Arguments(kwargs)
+        except TypeError:
+            # Arguments cannot be hashed, so we cannot cache the prompt
+            return self._render(key, kwargs)
+
+        return self._render_cached(key, arguments)
+
+    def _render(self, key: str, kwargs: "Arguments | dict") -> str:
+        if isinstance(kwargs, Arguments):
+            kwargs = kwargs.kwargs
+        return self.templates[key].render(**kwargs)
+
+
+class Arguments:
+    """Template arguments that can be used as a cache key.
+
+    Arguments are compared and hashed by their frozen equivalent (see `freeze`),
+    but templates are rendered with the original values, so that a list is
+    still rendered as a list."""
+
+    __slots__ = ("kwargs", "frozen")
+
+    def __init__(self, kwargs: dict[str, Any]) -> None:
+        """Raises: TypeError if the arguments cannot be hashed"""
+        self.kwargs = kwargs
+        self.frozen = freeze(kwargs)
+
+    def __hash__(self) -> int:
+        return hash(self.frozen)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Arguments) and self.frozen == other.frozen
+
+
+def freeze(value: Any) -> Hashable:
+    """Convert value into a hashable equivalent.
+
+    Lists and tuples become tuples and dicts become frozendicts, each tagged
+    with the original type, so that values that render differently (such as a
+    list and a tuple) are not equal.
+
+    Raises: TypeError if the value cannot be hashed"""
+    if isinstance(value, (dict, frozendict)):
+        return type(value), frozendict({k: freeze(v) for k, v in value.items()})
+
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(freeze(v) for v in value)
+
+    hash(value)
+    return value
@@ -0,0 +1,197 @@
+import time
+import random
+import asyncio
+import threading
+from .Completion import Completion
+from .StreamParser import StreamParser
+
+from typing import ClassVar, Iterable
+
+
+class Provider:
+    """Endpoint that serves chat completions for some models.
+
+    Subclasses implement `create` for a specific API (see `OpenAIProvider` and
+    `ReplicateProvider`). Each provider keeps its own connection pool and
+    tracks its health: the latency of its responses and its error rate, both
+    as exponentially weighted moving averages. After several errors in a row,
+    the provider cools down and no requests are routed to it until the
+    cooldown is over (see `Router`).
+
+    Models can be mapped to the names that the provider uses for them, so that
+    classifiers can request a model by one name from every provider:
+
+    ```
+    provider = OpenAIProvider(
+        "local", base_url="http://localhost:8000/v1", models={"llama-3-8b": "llama3"}
+    )
+    ```
+    """
+
+    # Weight of the latest response in the moving averages
+    SMOOTHING: ClassVar[float] = 0.2
+
+    # Number of errors in a row after which the provider cools down
+    MAX_FAILURES: ClassVar[int] = 3
+
+    # Number of seconds to cool down for (doubles with every further error, up
+    # to the maximum)
+    COOLDOWN: ClassVar[float] = 5
+    MAX_COOLDOWN: ClassVar[float] = 120
+
+    name: str
+
+    # Names of the models at the provider, by requested model (None = serves
+    # all models under the requested name)
+    models: dict[str, str] | None
+
+    # Health statistics
+    latency: float | None
+    error_rate: float
+    failures: int
+    available_at: float
+    request_count: int
+    error_count: int
+
+    def __init__(
+        self, name: str, models: Iterable[str] | dict[str, str] | None = None
+    ) -> None:
+        """Initialize the provider.
+
+        Args:
+            name: Name of the provider, such as openai
+            models: Models that the provider serves, either as a list of names
+                    or as a dict of the provider's names by requested name
+                    (default = all models)"""
+        self.name = name
+        if models is None or isinstance(models, dict):
+            self.models = models
+        else:
+            self.models = {model: model for model in models}
+
+        self._lock = threading.Lock()
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.available_at = 0.0
+        self.request_count = 0
+        self.error_count = 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+    def serves(self, model: str) -> bool:
+        """Whether the provider serves the model."""
+        return self.models is None or model in self.models
+
+    def get_model(self, model: str) -> str:
+        """Get the name of the model at the provider."""
+        return model if self.models is None else self.models[model]
+
+    def connect(self) -> None:
+        """Create the connection pool up front, so that the first request does
+        not have to wait for it. Optional."""
+        pass
+
+    def create(self, parser: StreamParser | None = None, **kwargs) -> Completion:
+        """Create a chat completion.
+
+        Providers that can stream responses feed the content to the parser and
+        cancel the stream once the answer is complete. Others may ignore it.
+
+        Args:
+            parser: Parser of the streamed answer (default = no streaming)
+            All other chat completion keyword arguments, with the requested
+            model
+
+        Returns: Completion"""
+        raise NotImplementedError
+
+    async def acreate(self, parser: StreamParser | None = None, **kwargs) -> Completion:
+        """Asynchronously create a chat completion.
+
+        By default, this runs `create` in a separate thread.
+
+        Args:
+            parser: Parser of the streamed answer (default = no streaming)
+            All other chat completion keyword arguments, with the requested
+            model
+
+        Returns: Completion"""
+        return await asyncio.to_thread(self.create, parser=parser, **kwargs)
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Whether another provider may succeed where this one failed.
+
+        Errors that are caused by the request itself (such as an invalid
+        parameter) would fail with any provider and do not count against the
+        provider's health.
+
+        Args:
+            error: The error raised by `create`
+
+        Returns: Whether to fail over to another provider"""
+        return True
+
+    @property
+    def is_available(self) -> bool:
+        """Whether the provider is not cooling down."""
+        return time.monotonic() >= self.available_at
+
+    def get_score(self) -> float:
+        """Expected number of seconds until a successful response. Providers
+        with lower scores are preferred.
+
+        Returns: Score (0 if the provider has not been tried yet, so that each
+                 provider is tried at least once)"""
+        with self._lock:
+            if self.latency is None:
+                return float("inf") if self.error_count else 0.0
+            return self.latency / max(1 - self.error_rate, 0.05)
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful response.
+
+        Args:
+            latency: Number of seconds that the request took"""
+        with self._lock:
+            self.request_count += 1
+            self.failures = 0
+            self.error_rate *= 1 - self.SMOOTHING
+
+            # Average the first responses evenly, so that a slow first response
+            # (such as one that opened the connection) is soon outweighed
+            successes = self.request_count - self.error_count
+            weight = max(1 / successes, self.SMOOTHING)
+            self.latency = latency + (1 - weight) * ((self.latency or 0) - latency)
+
+    def record_failure(self) -> None:
+        """Record a failed request, cooling the provider down after several
+        errors in a row."""
+        with self._lock:
+            self.request_count += 1
+            self.error_count += 1
+            self.failures += 1
+            self.error_rate += self.SMOOTHING * (1 - self.error_rate)
+
+            if self.failures >= self.MAX_FAILURES:
+                exponent = self.failures - self.MAX_FAILURES
+                cooldown = min(self.COOLDOWN * 2**exponent, self.MAX_COOLDOWN)
+                # Jitter, so that processes do not all come back at once
+                cooldown *= random.uniform(1, 1.2)
+                self.available_at = time.monotonic() + cooldown
+
+    def summary(self) -> str:
+        """Summarize the health of the provider."""
+        with self._lock:
+            latency = f"{self.latency * 1000:.0f} ms" if self.latency else "-"
+            status = "available" if self.is_available else "cooling down"
+            return ", ".join(
+                [
+                    f"{self.name}: {self.request_count} requests",
+                    f"{self.error_count} errors",
+                    f"{self.error_rate:.0%} error rate",
+                    f"{latency} latency",
+                    status,
+                ]
+            )
@@ -0,0 +1,188 @@
+import ast
+import importlib
+import inspect
+from pathlib import Path
+from dataclasses import dataclass
+from .Config import Config
+from .ConfigSet import ConfigSet
+from .Parameters import Parameters
+
+from typing import TYPE_CHECKING, ClassVar, Self, Type
+
+if TYPE_CHECKING:
+    from .BaseClassifier import BaseClassifier
+
+
+@dataclass(frozen=True)
+class ClassifierInfo:
+    """Metadata of a classifier, available without importing it."""
+
+    name: str
+
+    # Module that defines the classifier, such as classifiers.<name>.<name>
+    module: str
+
+    docstring: str | None
+    configurations: ConfigSet
+
+    @property
+    def directory(self) -> Path:
+        """The path to the directory where the classifier is defined"""
+        return Path(self.module.replace(".", "/")).parent
+
+    @property
+    def runs_directory(self) -> Path:
+        """The path to the directory where runs of the classifier are stored"""
+        return self.directory.joinpath("runs")
+
+    def load(self) -> Type["BaseClassifier"]:
+        """Import the classifier.
+
+        Returns: Class of classifier"""
+        return getattr(importlib.import_module(self.module), "Classifier")
+
+    @classmethod
+    def from_class(cls, classifier: "BaseClassifier | Type[BaseClassifier]") -> Self:
+        """Get the metadata of a classifier that has already been imported.
+
+        Args:
+            classifier: Instance or class of classifier
+
+        Returns: Metadata of the classifier"""
+        if not inspect.isclass(classifier):
+            classifier = type(classifier)
+
+        return cls(
+            name=classifier.name,
+            module=classifier.__module__,
+            docstring=classifier.__doc__,
+            configurations=classifier.CONFIGURATIONS,
+        )
+
+
+class Registry:
+    """Lists the classifiers and their configurations.
+
+    A classifier is defined by a Classifier class in classifiers/<name>/<name>.py.
+    Importing a classifier is slow, as it imports the OpenAI client and other
+    heavy dependencies. The registry instead reads the docstring and the
+    CONFIGURATIONS of each classifier from its source code, so that scripts can
+    list classifiers and configurations (or update their files) without
+    importing them. Classifiers whose CONFIGURATIONS cannot be read from the
+    source (for example, because they are computed) are imported instead.
+
+    Typical usage example:
+
+    ```
+    info = Registry().get("chatgpt_sdgs")
+    print(info.configurations)
+    Classifier = info.load()
+    ```
+    """
+
+    # Directory with the classifiers
+    ROOT: ClassVar[Path] = Path(__file__).parent.parent
+
+    # Names that CONFIGURATIONS may use when read from the source code
+    NAMESPACE: ClassVar[dict] = dict(
+        ConfigSet=ConfigSet, Config=Config, Parameters=Parameters
+    )
+
+    root: Path
+
+    def __init__(self, root: Path | None = None) -> None:
+        """Initialize the registry.
+
+        Args:
+            root: Directory with the classifiers (default = ROOT)"""
+        self.root = Path(root or self.ROOT)
+
+    def names(self) -> list[str]:
+        """Get the names of all classifiers, in alphabetical order."""
+        return sorted(
+            dir.name
+            for dir in self.root.iterdir()
+            if dir.joinpath(dir.name + ".py").is_file()
+        )
+
+    def all(self) -> list[ClassifierInfo]:
+        """Get the metadata of all classifiers, in alphabetical order."""
+        classifiers = [self.get(name) for name in self.names()]
+        return [info for info in classifiers if info is not None]
+
+    def get(self, name: str) -> ClassifierInfo | None:
+        """Get the metadata of a classifier.
+
+        Args:
+            name: Name of the classifier
+
+        Returns: Metadata or None (if the classifier does not exist)"""
+        path = self.root.joinpath(name, name + ".py")
+        if not path.is_file():
+            return None
+
+        tree = ast.parse(path.read_text(), filename=str(path))
+        node = next(
+            (
+                node
+                for node in tree.body
+                if isinstance(node, ast.ClassDef) and node.name == "Classifier"
+            ),
+            None,
+        )
+        if node is None:
+            return None
+
+        module = f"{self.root.name}.{name}.{name}"
+        configurations = self.read_configurations(node, path)
+        if configurations is None:
+            return ClassifierInfo.from_class(
+                getattr(importlib.import_module(module), "Classifier")
+            )
+
+        return ClassifierInfo(
+            name=name,
+            module=module,
+            docstring=ast.get_docstring(node, clean=False),
+            configurations=configurations,
+        )
+
+    def read_configurations(self, node: ast.ClassDef, path: Path) -> ConfigSet | None:
+        """Read the CONFIGURATIONS of the classifier from its source code.
+
+        Only expressions made of ConfigSet, Parameters, Config and literals can
+        be read.
+
+        Args:
+            node: Syntax tree of the Classifier class
+            path: Path of the source file
+
+        Returns: ConfigSet or None (if it cannot be read)"""
+        value = None
+        for statement in node.body:
+            if isinstance(statement, ast.Assign):
+                targets = statement.targets
+            elif isinstance(statement, ast.AnnAssign):
+                targets = [statement.target]
+            else:
+                continue
+
+            if any(
+                isinstance(t, ast.Name) and t.id == "CONFIGURATIONS" for t in targets
+            ):
+                value = statement.value
+
+        if value is None:
+            return None
+
+        # The source is the classifier's own code, which would be run on import
+        # anyway. Without builtins, any other names fail to resolve.
+        try:
+            configurations = eval(
+                compile(ast.Expression(value), path, "eval"),
+                {"__builtins__": {}, **self.NAMESPACE},
+            )
+        except NameError:
+            return None
+
+        return configurations if isinstance(configurations, ConfigSet) else None
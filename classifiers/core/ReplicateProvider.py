@@ -0,0 +1,99 @@
+import os
+import threading
+from dotenv import load_dotenv
+from .Completion import Completion
+from .Provider import Provider
+from .StreamParser import StreamParser
+
+from typing import TYPE_CHECKING, Any, Iterable
+
+if TYPE_CHECKING:
+    import replicate
+
+
+class ReplicateProvider(Provider):
+    """Language models hosted on Replicate, such as Llama 3.
+
+    Requires the replicate package. The chat messages are rendered into a
+    single prompt with the Llama 3 chat template. Override `get_prompt` for
+    models with a different template.
+
+    ```
+    ReplicateProvider(models={"llama-3-70b": "meta/meta-llama-3-70b-instruct"})
+    ```
+    """
+
+    api_token: str | None
+
+    def __init__(
+        self,
+        name: str = "replicate",
+        models: Iterable[str] | dict[str, str] | None = None,
+        api_token: str | None = None,
+    ) -> None:
+        """Initialize the provider.
+
+        Args:
+            name: Name of the provider (default = replicate)
+            models: Models that the provider serves (see `Provider`)
+            api_token: API token (defaults to REPLICATE_API_TOKEN)"""
+        super().__init__(name, models)
+        self.api_token = api_token
+        self._client: "replicate.Client | None" = None
+        self._client_lock = threading.Lock()
+
+    def get_client(self) -> "replicate.Client":
+        """Get the client (and connection pool) of the provider."""
+        with self._client_lock:
+            if self._client is None:
+                import replicate
+
+                load_dotenv()
+                self._client = replicate.Client(
+                    api_token=self.api_token or os.environ["REPLICATE_API_TOKEN"]
+                )
+            return self._client
+
+    def connect(self) -> None:
+        self.get_client()
+
+    def get_prompt(self, messages: list[dict[str, Any]]) -> str:
+        """Render the chat messages into a prompt (Llama 3 chat template).
+
+        Args:
+            messages: Chat messages with role and content
+
+        Returns: Prompt"""
+        parts = ["<|begin_of_text|>"]
+        for message in messages:
+            parts.append(f"<|start_header_id|>{message['role']}<|end_header_id|>")
+            parts.append(f"\n\n{message.get('content') or ''}<|eot_id|>")
+
+        parts.append("<|start_header_id|>assistant<|end_header_id|>\n\n")
+        return "".join(parts)
+
+    def create(self, parser: StreamParser | None = None, **kwargs) -> Completion:
+        model = self.get_model(kwargs["model"])
+        input: dict[str, Any] = dict(
+            prompt=self.get_prompt(kwargs["messages"]),
+            # The prompt is already rendered with the chat template
+            prompt_template="{prompt}",
+        )
+        for key in ["max_tokens", "temperature", "top_p"]:
+            if kwargs.get(key) is not None:
+                input[key] = kwargs[key]
+
+        output = self.get_client().run(model, input=input)
+        if isinstance(output, str):
+            content = output
+        elif parser is None:
+            content = "".join(output)
+        else:
+            # Language models yield their output as it is generated, so stop
+            # reading once the answer is complete
+            for part in output:
+                if parser.feed(part):
+                    break
+            content = parser.content
+
+        return Completion(model=model, content=content, finish_reason="stop")
@@ -0,0 +1,261 @@
+import os
+import time
+import random
+import threading
+from pathlib import Path
+import yaml
+from dotenv import load_dotenv
+from .Completion import Completion
+from .Provider import Provider
+from .StreamParser import StreamParser
+from .Usage import Usage
+
+from typing import Any, Callable, ClassVar, Self
+
+
+class Router:
+    """Routes chat completion requests to the healthiest provider of the model.
+
+    Each request goes to the provider with the lowest expected latency (see
+    `Provider.get_score`) among the providers that serve the requested model
+    and are not cooling down. A small share of requests goes to a random
+    provider instead, so that the router notices when a slower provider gets
+    faster. If a provider fails, the request fails over to the next provider.
+    Failovers are recorded as retries (see `Usage`). Only once all providers
+    have failed is the error raised, which the `Scheduler` may then retry.
+
+    By default, all requests go to OpenAI. Set CLASSIFIERS_PROVIDERS to the
+    path of a YAML file to configure the providers:
+
+    ```yaml
+    - name: openai
+      type: openai
+      models: [gpt-4o-mini, gpt-4o]
+    - name: local
+      type: openai
+      base_url: http://localhost:8000/v1
+      models:
+        llama-3-8b: llama3
+    - name: replicate
+      type: replicate
+      models:
+        llama-3-70b: meta/meta-llama-3-70b-instruct
+    ```
+
+    Keys are passed to the provider, except for `type` and `api_key_env`,
+    which names the environment variable to read the API key from.
+
+    Responses are cached and rate limited under the requested model. Providers
+    that serve the same model must therefore serve it under the same name, so
+    that a failover never returns the answer of a different model.
+
+    Typical usage example:
+
+    ```
+    Router.configure([OpenAIProvider(), OpenAIProvider("local", base_url=...)])
+    completion = Router.get().create(model="gpt-4o-mini", messages=[...])
+    ```
+    """
+
+    # Provider classes by type in the providers file
+    TYPES: ClassVar[dict[str, tuple[str, str]]] = dict(
+        openai=("OpenAIProvider", "api_key"),
+        replicate=("ReplicateProvider", "api_token"),
+    )
+
+    # Share of requests that go to a random provider
+    EXPLORATION: ClassVar[float] = 0.05
+
+    _default: ClassVar["Router | None"] = None
+    _default_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    providers: list[Provider]
+
+    def __init__(self, providers: list[Provider]) -> None:
+        """Initialize the router.
+
+        Args:
+            providers: Providers to route requests to
+
+        Raises:
+            ValueError: When two providers serve a model under different names
+        """
+        for provider in providers:
+            for model, name in (provider.models or {}).items():
+                for other in providers:
+                    if other.serves(model) and other.get_model(model) != name:
+                        raise ValueError(
+                            f"Providers {provider.name} and {other.name} serve "
+                            f"{model} as different models ({name} and "
+                            f"{other.get_model(model)})"
+                        )
+
+        self.providers = providers
+
+    @classmethod
+    def get(cls) -> "Router":
+        """Get the router shared by all classifiers in this process.
+
+        Returns: The configured router, the router of the providers file in
+                 CLASSIFIERS_PROVIDERS or a router to OpenAI"""
+        with cls._default_lock:
+            if cls._default is None:
+                load_dotenv()
+                path = os.environ.get("CLASSIFIERS_PROVIDERS")
+                if path:
+                    cls._default = cls.from_file(Path(path))
+                else:
+                    from .OpenAIProvider import OpenAIProvider
+
+                    cls._default = cls([OpenAIProvider()])
+
+            return cls._default
+
+    @classmethod
+    def configure(cls, providers: list[Provider] | None) -> None:
+        """Set the providers of the router shared by all classifiers.
+
+        Args:
+            providers: Providers to route requests to (None = default)"""
+        with cls._default_lock:
+            cls._default = None if providers is None else cls(providers)
+
+    @classmethod
+    def from_file(cls, path: Path) -> Self:
+        """Create a router with the providers in a YAML file.
+
+        Args:
+            path: Path of the providers file
+
+        Returns: Router"""
+        from importlib import import_module
+
+        with open(path, "r") as f:
+            specs: list[dict[str, Any]] = yaml.safe_load(f)
+
+        providers = []
+        for spec in specs:
+            spec = dict(spec)
+            provider_type = spec.pop("type", "openai")
+            if provider_type not in cls.TYPES:
+                raise ValueError(f"Unknown provider type {provider_type} in {path}")
+
+            class_name, key_argument = cls.TYPES[provider_type]
+            if "api_key_env" in spec:
+                spec[key_argument] = os.environ[spec.pop("api_key_env")]
+
+            module = import_module(f"{__package__}.{class_name}")
+            providers.append(getattr(module, class_name)(**spec))
+
+        return cls(providers)
+
+    def get_providers(self, model: str) -> list[Provider]:
+        """Get the providers of the model, in the order to try them.
+
+        Providers that are cooling down come last, so that requests are still
+        sent when all providers are cooling down.
+
+        Args:
+            model: The requested model
+
+        Returns: Providers
+
+        Raises:
+            LookupError: When no provider serves the model"""
+        providers = [p for p in self.providers if p.serves(model)]
+        if not providers:
+            raise LookupError(f"No provider serves the model {model}")
+
+        available = sorted(
+            (p for p in providers if p.is_available), key=lambda p: p.get_score()
+        )
+        if len(available) > 1 and random.random() < self.EXPLORATION:
+            available.insert(0, available.pop(random.randrange(1, len(available))))
+
+        cooling = sorted(
+            (p for p in providers if not p.is_available),
+            key=lambda p: p.available_at,
+        )
+        return available + cooling
+
+    def create(
+        self, parser: Callable[[], StreamParser] | None = None, **kwargs
+    ) -> Completion:
+        """Create a chat completion with the healthiest provider of the model,
+        failing over to the other providers on errors.
+
+        Args:
+            parser: Creates a parser to stream the response with (see
+                    `Provider.create`; default = no streaming)
+            All other chat completion keyword arguments
+
+        Returns: Completion"""
+        providers = self.get_providers(kwargs["model"])
+
+        for i, provider in enumerate(providers):
+            # Connecting for the first time (and importing the client) should
+            # not count against the latency of the provider
+            provider.connect()
+            started_at = time.perf_counter()
+            try:
+                # Each attempt needs a parser of its own
+                completion = provider.create(
+                    parser=parser() if parser else None, **kwargs
+                )
+            except Exception as error:
+                if not provider.is_retryable(error):
+                    raise
+                provider.record_failure()
+                if i == len(providers) - 1:
+                    raise
+                Usage.record(retries=1)
+            else:
+                provider.record_success(time.perf_counter() - started_at)
+                return completion
+
+        raise AssertionError("unreachable")
+
+    async def acreate(
+        self, parser: Callable[[], StreamParser] | None = None, **kwargs
+    ) -> Completion:
+        """Asynchronously create a chat completion with the healthiest provider
+        of the model, failing over to the other providers on errors.
+
+        Args:
+            parser: Creates a parser to stream the response with (see
+                    `Provider.create`; default = no streaming)
+            All other chat completion keyword arguments
+
+        Returns: Completion"""
+        providers = self.get_providers(kwargs["model"])
+
+        for i, provider in enumerate(providers):
+            # Connecting for the first time (and importing the client) should
+            # not count against the latency of the provider
+            provider.connect()
+            started_at = time.perf_counter()
+            try:
+                completion = await provider.acreate(
+                    parser=parser() if parser else None, **kwargs
+                )
+            except Exception as error:
+                if not provider.is_retryable(error):
+                    raise
+                provider.record_failure()
+                if i == len(providers) - 1:
+                    raise
+                Usage.record(retries=1)
+            else:
+                provider.record_success(time.perf_counter() - started_at)
+                return completion
+
+        raise AssertionError("unreachable")
+
+    def connect(self) -> None:
+        """Create the connection pools of all providers up front."""
+        for provider in self.providers:
+            provider.connect()
+
+    def summary(self) -> str:
+        """Summarize the health of all providers."""
+        return "\n".join(provider.summary() for provider in self.providers)
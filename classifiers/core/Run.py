@@ -1,12 +1,40 @@
 import json
+import hashlib
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import numpy as np
 import pandas as pd
 from tabulate import tabulate
 from sdgclassification.benchmark import Stats
 from .Config import Config
+from .RunIndex import RunIndex
+from .Usage import Usage
 
-from typing import Self
+from typing import Any, Self
+
+# Columns of the results that hold a list per row: the predicted SDGs and the
+# confidence score of each SDG (only for runs evaluated with scores)
+LIST_COLUMNS = ["predictions", "scores"]
+
+
+class LazyResults:
+    """Descriptor that loads the results of a run when they are first accessed.
+
+    Runs that are loaded from disk only read their stats. The results are read
+    from the run directory once they are needed."""
+
+    def __get__(self, run: "Run | None", owner: Any = None) -> Any:
+        # Accessed on the class: no results by default
+        if run is None:
+            return None
+
+        if run._results is None and run.directory is not None:
+            run._results = read_results(run.directory)
+
+        return run._results
+
+    def __set__(self, run: "Run", results: pd.DataFrame | None) -> None:
+        run._results = results
 
 
 @dataclass(kw_only=True)
@@ -14,7 +42,20 @@ class Run:
     config: Config
     date: str
     stats: pd.DataFrame
-    results: pd.DataFrame
+
+    # Storage of `results`. Declared first, so that it is initialized before.
+    _results: pd.DataFrame | None = field(default=None, init=False, repr=False)
+
+    # Results by benchmark text. Runs loaded with `Run.load` read them from the
+    # run directory when they are first accessed.
+    results: pd.DataFrame = LazyResults()  # type: ignore[assignment]
+
+    # Directory that the run was loaded from, if any
+    directory: Path | None = field(default=None, repr=False)
+
+    # Total usage of the requests made for the benchmark texts (see `Usage`),
+    # with the number of texts that it was recorded for
+    usage: dict | None = None
 
     def write_files(self, runs_directory: Path) -> None:
         """Write run files to disk.
@@ -25,15 +66,37 @@ class Run:
         dir_path.mkdir(exist_ok=True, parents=True)
 
         # Write meta
+        meta = dict(config=self.config, date=self.date)
+        if self.usage is not None:
+            meta["usage"] = self.usage
         with open(dir_path.joinpath("meta.json"), "w") as f:
-            json.dump(dict(config=self.config, date=self.date), f, indent=4)
-
-        # Write stats
-        self.results.to_csv(dir_path.joinpath("results.csv"), index=False)
+            json.dump(meta, f, indent=4)
 
         # Write results
+        write_results(dir_path, self.results)
+
+        # Write stats
         self.stats.to_csv(dir_path.joinpath("stats.csv"), index=False)
 
+        # Add to the index of all runs
+        RunIndex().add(dir_path, meta, self.stats)
+
+    @classmethod
+    def checkpoint_path(cls, config: Config, runs_directory: Path) -> Path:
+        """Path to the file that predictions are streamed to during evaluation.
+
+        Checkpoints are kept outside of the run directories, which only exist
+        once an evaluation has completed.
+
+        Args:
+            config: Instance of the config
+            runs_directory: Directory where runs are stored.
+
+        Returns: Path to the checkpoint file"""
+        return runs_directory.joinpath(
+            ".checkpoints", f"{config.get_identifier()}.jsonl"
+        )
+
     def stats_table(self, tablefmt: str, score_precision=1, f1_precision=2) -> str:
         """Formats the stats as a table.
 
@@ -49,36 +112,75 @@ class Run:
         df = self.stats
 
         # Only keep metrics with at least one text
-        df = df[df.n > 0].copy()
+        df = df[df.n > 0]
 
-        # Round ints to 1 decimal
-        for col in ["n", "tp", "fp", "tn", "fn"]:
-            df[col] = df[col].apply(lambda x: f"{x:.1f}".rstrip("0").rstrip("."))
+        # Usage is summarized separately (see `usage_summary`)
+        df = df.drop(columns=list(Usage().to_dict()), errors="ignore")
 
-        # Adjust precision level
-        for col in ["accuracy", "precision", "recall"]:
-            df[col] = df[col].apply(lambda x: f"{x:.{score_precision}f}")
+        # Format each group of columns at once
+        formatted: dict[str, np.ndarray] = {
+            str(column): df[column].astype(str).to_numpy() for column in df
+        }
 
-        df.f1 = df.f1.apply(lambda x: f"{x:.{f1_precision}f}")
+        # Round counts to 1 decimal, dropping trailing zeros
+        counts = ["n", "tp", "fp", "tn", "fn"]
+        values = np.char.rstrip(np.char.rstrip(format_numbers(df[counts], 1), "0"), ".")
+        formatted.update(zip(counts, values.T))
+
+        # Adjust precision level
+        scores = ["accuracy", "precision", "recall"]
+        values = format_numbers(df[scores], score_precision)
+        formatted.update(zip(scores, values.T))
+        formatted["f1"] = format_numbers(df[["f1"]], f1_precision)[:, 0]
 
         # Rename columns
-        df = df.rename(columns=Stats.HUMAN_LABELS)
+        headers = [Stats.HUMAN_LABELS.get(column, column) for column in formatted]
 
-        # Convert to dictionary
-        data = df.to_dict("records")
+        # Convert to rows
+        data = np.column_stack(list(formatted.values())).tolist()
 
         # Set column alignment
-        column_alignment = ["right" for _ in df.columns]
+        column_alignment = ["right" for _ in headers]
         column_alignment[0] = "left"
 
         return tabulate(
             data,
-            headers="keys",
+            headers=headers,
             tablefmt=tablefmt,
             disable_numparse=True,
             colalign=column_alignment,
         )
 
+    def usage_summary(self) -> str | None:
+        """Summarizes the requests, tokens, cost and latency of the run.
+
+        Returns: Summary or None (if no usage was recorded)"""
+        if not self.usage or not self.usage.get("texts"):
+            return None
+
+        usage = self.usage
+        texts = usage["texts"]
+        requests = usage["requests"]
+        cost = usage["cost"]
+
+        parts = [
+            f"{requests:,.0f} requests for {texts:,} texts "
+            f"({usage['cache_hits'] / max(requests, 1):.0%} from cache, "
+            f"{usage['retries']:,.0f} retries)",
+            f"{usage['prompt_tokens']:,.0f} prompt tokens and "
+            f"{usage['completion_tokens']:,.0f} completion tokens",
+            f"${cost:,.2f} in total (${cost / texts * 1000:,.2f} per 1,000 texts)",
+            f"{usage['latency'] / texts:,.2f}s per text",
+        ]
+
+        # Tokens and cost only include requests with known token counts
+        if usage.get("unmetered"):
+            parts.append(
+                f"{usage['unmetered']:,.0f} requests without token counts "
+                "(not included in tokens and cost)"
+            )
+        return ", ".join(parts)
+
     @classmethod
     def load(cls, config: Config, runs_directory: Path) -> Self | None:
         """Load run data for the config.
@@ -87,24 +189,114 @@ class Run:
             config: Instance of the config
             runs_directory: Directory where runs are stored.
 
-        Returns: Instance of run or None (if no run exists)
-
-        Raises: FileNotFoundError if no run for the given config exists
+        Returns: Instance of run or None (if no completed run exists)
         """
         dir_path = runs_directory.joinpath(config.get_identifier())
 
-        if not dir_path.exists():
+        # Meta and stats are written when the evaluation has completed
+        meta_path = dir_path.joinpath("meta.json")
+        stats_path = dir_path.joinpath("stats.csv")
+        if not meta_path.exists() or not stats_path.exists():
             return None
 
-        # Load all data
-        with open(dir_path.joinpath("meta.json")) as f:
+        # Load meta and stats. Results are loaded once they are accessed.
+        with open(meta_path) as f:
             meta = json.load(f)
-        stats = pd.read_csv(dir_path.joinpath("stats.csv"))
-        results = pd.read_csv(dir_path.joinpath("results.csv"))
+        stats = pd.read_csv(stats_path)
 
         return cls(
             config=config,
             date=meta["date"],
             stats=stats,
-            results=results,
+            directory=dir_path,
+            usage=meta.get("usage"),
         )
+
+
+def get_text_id(text: str) -> str:
+    """ID of the text in the texts table of a run (hash of the content)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def write_results(dir_path: Path, results: pd.DataFrame) -> None:
+    """Write the results of a run.
+
+    Texts are stored once in a separate table (texts.parquet) and referenced
+    by ID from the results (results.parquet). Predictions and scores are
+    stored as list columns.
+
+    Args:
+        dir_path: Directory of the run
+        results: Results with one row per benchmark text and SDG"""
+    text_ids = results["text"].map(get_text_id)
+    texts = pd.DataFrame(dict(text_id=text_ids, text=results["text"]))
+    texts = texts.drop_duplicates("text_id")
+
+    results = results.drop(columns=["text"])
+    results.insert(1, "text_id", text_ids)
+    for column in LIST_COLUMNS:
+        if column in results:
+            results[column] = results[column].map(to_list)
+
+    # Remove results in the CSV format of earlier versions, if any
+    for name in ["results", "texts"]:
+        dir_path.joinpath(name + ".csv").unlink(missing_ok=True)
+
+    texts.to_parquet(dir_path.joinpath("texts.parquet"), index=False)
+    results.to_parquet(dir_path.joinpath("results.parquet"), index=False)
+
+
+def read_results(dir_path: Path) -> pd.DataFrame:
+    """Read the results of a run, joined with their texts.
+
+    Also reads results that earlier versions stored as CSV: either a single
+    file with the texts in every row, or separate results and texts files with
+    lists encoded as JSON.
+
+    Args:
+        dir_path: Directory of the run
+
+    Returns: Results with one row per benchmark text and SDG"""
+    if dir_path.joinpath("results.parquet").exists():
+        results = pd.read_parquet(dir_path.joinpath("results.parquet"))
+        texts = pd.read_parquet(dir_path.joinpath("texts.parquet"))
+        for column in LIST_COLUMNS:
+            if column in results:
+                results[column] = results[column].map(to_list)
+    else:
+        results = pd.read_csv(dir_path.joinpath("results.csv"))
+        for column in LIST_COLUMNS:
+            if column in results:
+                results[column] = results[column].map(from_json)
+
+        # Results in the old format include the texts
+        if "text" in results.columns:
+            return results
+
+        texts = pd.read_csv(dir_path.joinpath("texts.csv"))
+
+    # Replace text IDs with texts
+    text_by_id = texts.set_index("text_id")["text"]
+    results.insert(1, "text", results.pop("text_id").map(text_by_id))
+    return results
+
+
+def to_list(values: Any) -> list | None:
+    """Convert the values of a list column (such as an array) to a list."""
+    return None if values is None else list(values)
+
+
+def from_json(value: Any) -> list | None:
+    """Decode a list column of CSV results (pandas reads null as NaN)."""
+    return json.loads(value) if isinstance(value, str) else None
+
+
+def format_numbers(values: pd.DataFrame, precision: int) -> np.ndarray:
+    """Format all numbers with the given number of decimals.
+
+    Args:
+        values: Data frame of numbers
+        precision: Number of decimal digits
+
+    Returns: Array of strings"""
+    return np.char.mod(f"%.{precision}f", values.to_numpy(dtype=float))
@@ -0,0 +1,337 @@
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+
+from typing import Any, ClassVar, Iterator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    directory TEXT PRIMARY KEY,
+    classifier TEXT NOT NULL,
+    archived INTEGER NOT NULL,
+    config_id TEXT NOT NULL,
+    config TEXT NOT NULL,
+    date TEXT,
+    day TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cost REAL,
+    latency REAL,
+    texts INTEGER,
+    mtime INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    directory TEXT NOT NULL REFERENCES runs (directory) ON DELETE CASCADE,
+    sdg TEXT NOT NULL,
+    n REAL,
+    accuracy REAL,
+    precision REAL,
+    recall REAL,
+    f1 REAL,
+    tp REAL,
+    fp REAL,
+    tn REAL,
+    fn REAL,
+    PRIMARY KEY (directory, sdg)
+);
+CREATE INDEX IF NOT EXISTS runs_classifier ON runs (classifier, archived);
+"""
+
+
+class RunIndex:
+    """Catalog of the runs of all classifiers (including archived ones).
+
+    The index is a SQLite database next to the classifiers. For each run, it
+    records the classifier, the config, the date, token usage, cost and latency
+    (if recorded in meta.json, see `Usage`), and the stats of each SDG. Leaderboards and
+    comparisons across classifiers are then queries, rather than reading the
+    files of every run.
+
+    Runs are added when they are written (see `Run.write_files`). The index is
+    not committed: `sync` adds runs that are missing or have changed on disk
+    (such as runs from other branches) and removes runs that no longer exist.
+    Only the modification times of the stats files are checked for this.
+
+    Typical usage example:
+
+    ```
+    index = RunIndex()
+    index.sync()
+    leaderboard = index.leaderboard()
+    ```
+    """
+
+    # Directory with the classifiers (and the archive)
+    ROOT: ClassVar[Path] = Path(__file__).parent.parent
+
+    # Version of the schema. Bump when changing it to rebuild existing indexes.
+    VERSION: ClassVar[int] = 2
+
+    root: Path
+    path: Path
+
+    def __init__(self, root: Path | None = None) -> None:
+        """Initialize the index.
+
+        Args:
+            root: Directory with the classifiers (default = ROOT). The index is
+                  stored in runs.sqlite inside of it."""
+        self.root = Path(root or self.ROOT).absolute()
+        self.path = self.root.joinpath("runs.sqlite")
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the index, creating its tables if needed."""
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.execute("PRAGMA foreign_keys = ON")
+
+        # The index can always be rebuilt from the runs, so drop outdated tables
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        if version != self.VERSION:
+            connection.executescript(f"""
+                DROP TABLE IF EXISTS metrics;
+                DROP TABLE IF EXISTS runs;
+                PRAGMA user_version = {self.VERSION};
+                """)
+
+        connection.executescript(SCHEMA)
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and commit its changes at once (or none on error)."""
+        connection = self.connect()
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_key(self, directory: Path) -> str | None:
+        """Key of the run directory in the index: its path relative to the root.
+
+        Returns: Key or None (if the directory is not inside the root)"""
+        path = Path(directory).absolute()
+        if not path.is_relative_to(self.root):
+            return None
+        return path.relative_to(self.root).as_posix()
+
+    def add(self, directory: Path, meta: dict, stats: pd.DataFrame) -> bool:
+        """Add (or replace) a run in the index.
+
+        Args:
+            directory: Directory of the run (<classifier>/runs/<config_id>)
+            meta: Contents of the run's meta.json
+            stats: Stats of the run, one row per SDG
+
+        Returns: Whether the run was added (runs outside the root are not)"""
+        key = self.get_key(directory)
+        if key is None:
+            return False
+
+        with self.transaction() as connection:
+            self.insert(connection, key, meta, stats)
+        return True
+
+    def insert(
+        self, connection: sqlite3.Connection, key: str, meta: dict, stats: pd.DataFrame
+    ) -> None:
+        """Insert a run into the index within the current transaction."""
+        parts = key.split("/")
+        usage = meta.get("usage") or {}
+        stats_path = self.root.joinpath(key, "stats.csv")
+
+        connection.execute("DELETE FROM runs WHERE directory = ?", (key,))
+        connection.execute(
+            "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                parts[-3],
+                int(parts[0] == "archive"),
+                parts[-1],
+                json.dumps(meta.get("config", {})),
+                meta.get("date"),
+                parse_date(meta.get("date")),
+                usage.get("prompt_tokens"),
+                usage.get("completion_tokens"),
+                usage.get("cost"),
+                usage.get("latency"),
+                usage.get("texts"),
+                stats_path.stat().st_mtime_ns if stats_path.exists() else 0,
+            ),
+        )
+
+        columns = ["sdg", "n", "accuracy", "precision", "recall", "f1"]
+        columns += ["tp", "fp", "tn", "fn"]
+        rows = stats.reindex(columns=columns).astype(object)
+        rows["sdg"] = rows["sdg"].astype(str)
+        rows = rows.where(rows.notna(), None)
+        connection.executemany(
+            "INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(key, *row) for row in rows.itertuples(index=False)],
+        )
+
+    def remove(self, directory: Path) -> None:
+        """Remove a run from the index.
+
+        Args:
+            directory: Directory of the run"""
+        key = self.get_key(directory)
+        if key is None:
+            return
+
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM runs WHERE directory = ?", (key,))
+
+    def scan(self) -> dict[str, int]:
+        """Find the runs on disk.
+
+        Returns: Modification time of the stats file by key of each run"""
+        found = {}
+        bases = [self.root, self.root.joinpath("archive")]
+
+        for base in bases:
+            if not base.is_dir():
+                continue
+
+            for classifier in os.scandir(base):
+                runs_directory = Path(classifier.path, "runs")
+                if not classifier.is_dir() or not runs_directory.is_dir():
+                    continue
+
+                for run in os.scandir(runs_directory):
+                    try:
+                        mtime = os.stat(Path(run.path, "stats.csv")).st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+                    found[Path(run.path).relative_to(self.root).as_posix()] = mtime
+
+        return found
+
+    def sync(self) -> int:
+        """Bring the index up to date with the runs on disk.
+
+        Runs whose stats have not changed since they were indexed are not read
+        again.
+
+        Returns: Number of runs that were (re-)indexed"""
+        found = self.scan()
+
+        with self.transaction() as connection:
+            indexed = dict(connection.execute("SELECT directory, mtime FROM runs"))
+
+            # Remove runs that no longer exist
+            connection.executemany(
+                "DELETE FROM runs WHERE directory = ?",
+                [(key,) for key in indexed if key not in found],
+            )
+
+            changed = [key for key, mtime in found.items() if indexed.get(key) != mtime]
+            for key in changed:
+                directory = self.root.joinpath(key)
+                with open(directory.joinpath("meta.json")) as f:
+                    meta = json.load(f)
+                stats = pd.read_csv(directory.joinpath("stats.csv"))
+                self.insert(connection, key, meta, stats)
+
+        return len(changed)
+
+    def query(self, sql: str, params: Any = ()) -> pd.DataFrame:
+        """Run a query against the index.
+
+        Args:
+            sql: The SQL query
+            params: Parameters of the query
+
+        Returns: Dataframe with the rows of the result"""
+        connection = self.connect()
+        try:
+            return pd.read_sql_query(sql, connection, params=params)
+        finally:
+            connection.close()
+
+    def best_runs(self, archived: bool = False) -> pd.DataFrame:
+        """Find the run with the highest average accuracy of each classifier.
+
+        Args:
+            archived: Whether to consider archived classifiers as well
+
+        Returns: Dataframe with one row (run) per classifier, by name"""
+        return self.query(
+            """
+            SELECT classifier, archived, config_id, config, date, accuracy, directory
+            FROM (
+                SELECT runs.*, metrics.accuracy, ROW_NUMBER() OVER (
+                    PARTITION BY classifier, archived
+                    ORDER BY accuracy DESC, day DESC, config_id
+                ) AS rank
+                FROM runs JOIN metrics USING (directory)
+                WHERE metrics.sdg = 'Average' AND archived <= ?
+            )
+            WHERE rank = 1
+            ORDER BY archived, classifier
+            """,
+            (int(archived),),
+        )
+
+    def leaderboard(self, archived: bool = False) -> pd.DataFrame:
+        """Accuracy of the best run of each classifier.
+
+        Args:
+            archived: Whether to include archived classifiers
+
+        Returns: Dataframe with one row per classifier and the columns
+                 Classifier, Average and SDG 1 to SDG 17"""
+        best = self.best_runs(archived=archived)
+        columns = ["Average", *[f"SDG {x}" for x in range(1, 18)]]
+
+        metrics = self.query(
+            f"""
+            SELECT directory, sdg, accuracy FROM metrics
+            WHERE n > 0 AND directory IN ({", ".join("?" * len(best))})
+            """,
+            best["directory"].tolist(),
+        )
+        label = metrics["sdg"].where(
+            metrics["sdg"] == "Average", "SDG " + metrics["sdg"]
+        )
+        table = (
+            metrics.assign(label=label)
+            .pivot(index="directory", columns="label", values="accuracy")
+            .reindex(index=best["directory"], columns=columns)
+            .astype(float)
+            .rename_axis(columns=None)
+        )
+
+        table.insert(0, "Classifier", best["classifier"].to_numpy())
+        return table.reset_index(drop=True)
+
+    def history(self, classifier: str) -> pd.DataFrame:
+        """All runs of a classifier, with their average stats, by date.
+
+        Args:
+            classifier: Name of the classifier
+
+        Returns: Dataframe with one row per run"""
+        return self.query(
+            """
+            SELECT config_id, config, date, archived, n, accuracy, precision,
+                   recall, f1, texts, prompt_tokens, completion_tokens, cost,
+                   latency
+            FROM runs JOIN metrics USING (directory)
+            WHERE classifier = ? AND metrics.sdg = 'Average'
+            ORDER BY day, config_id
+            """,
+            (classifier,),
+        )
+
+
+def parse_date(date: str | None) -> str | None:
+    """Convert the date of a run (such as May 10, 2024) to ISO format."""
+    try:
+        return datetime.strptime(date or "", "%B %d, %Y").date().isoformat()
+    except ValueError:
+        return None
@@ -0,0 +1,386 @@
+import time
+import random
+import itertools
+import asyncio
+import threading
+from functools import wraps
+from .Completion import Completion
+from .Usage import Usage
+
+from typing import TYPE_CHECKING, Any, Callable, Awaitable, ClassVar, Self, TypeVar
+
+if TYPE_CHECKING:
+    from openai import APIStatusError
+
+C = TypeVar("C", bound=Callable)
+A = TypeVar("A", bound=Callable[..., Awaitable])
+
+
+class Scheduler:
+    """Schedules chat completion requests within rate limits.
+
+    Each model has its own scheduler with a budget of requests per minute
+    (RPM) and tokens per minute (TPM). Both budgets are token buckets that
+    refill continuously. Before a request is sent, the scheduler waits until
+    both buckets can cover the request.
+
+    When the server responds with a rate limit error (429), the request is
+    retried with exponential backoff and jitter, honoring the Retry-After
+    header. The backoff pauses all requests for the model, not just the one
+    that failed.
+
+    Typical usage example:
+
+    ```
+    Scheduler.configure("gpt-4o-mini", rpm=5000, tpm=2_000_000)
+    create = Scheduler.schedule(client.chat.completions.create)
+    create(model="gpt-4o-mini", messages=[...])
+    ```
+    """
+
+    # Registry of rate limits and schedulers by model (None = default limits)
+    LIMITS: ClassVar[dict[str | None, tuple[float | None, float | None]]] = {}
+    _schedulers: ClassVar[dict[str, "Scheduler"]] = {}
+    _registry_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    # Number of tokens to assume for the completion if max_tokens is not set
+    DEFAULT_COMPLETION_TOKENS: ClassVar[int] = 100
+
+    model: str
+    rpm: float | None
+    tpm: float | None
+    max_retries: int
+    max_backoff: float
+
+    def __init__(
+        self,
+        model: str,
+        rpm: float | None = None,
+        tpm: float | None = None,
+        max_retries: int = 8,
+        max_backoff: float = 60,
+    ) -> None:
+        """Initialize a scheduler.
+
+        Args:
+            model: Name of the model
+            rpm: Requests per minute (None = unlimited)
+            tpm: Tokens per minute (None = unlimited)
+            max_retries: Number of times to retry a failed request
+            max_backoff: Maximum number of seconds to wait between retries
+        """
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._requests = rpm or 0
+        self._tokens = tpm or 0
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+        # Statistics (wait time is summed up across all waiting requests)
+        self.started_at = time.monotonic()
+        self.request_count = 0
+        self.token_count = 0
+        self.retry_count = 0
+        self.wait_time = 0.0
+        self.peak_saturation = 0.0
+
+    @classmethod
+    def configure(
+        cls,
+        model: str | None = None,
+        rpm: float | None = None,
+        tpm: float | None = None,
+    ) -> None:
+        """Set the rate limits for a model.
+
+        Args:
+            model: Name of the model (None = default for all models)
+            rpm: Requests per minute (None = unlimited)
+            tpm: Tokens per minute (None = unlimited)
+        """
+        with cls._registry_lock:
+            cls.LIMITS[model] = (rpm, tpm)
+
+            # Drop affected schedulers, so they are re-created with new limits
+            for name in list(cls._schedulers):
+                if model is None or name == model:
+                    del cls._schedulers[name]
+
+    @classmethod
+    def for_model(cls, model: str) -> Self:
+        """Get the scheduler for the given model.
+
+        Returns: The scheduler shared by all requests for this model"""
+        with cls._registry_lock:
+            if model not in cls._schedulers:
+                rpm, tpm = cls.LIMITS.get(model, cls.LIMITS.get(None, (None, None)))
+                cls._schedulers[model] = cls(model, rpm=rpm, tpm=tpm)
+
+            return cls._schedulers[model]  # type: ignore[return-value]
+
+    @classmethod
+    def all(cls) -> list["Scheduler"]:
+        """Get all schedulers that have been used in this process."""
+        with cls._registry_lock:
+            return list(cls._schedulers.values())
+
+    @classmethod
+    def schedule(cls, method: C) -> C:
+        """Wraps the given chat completion method in the model's scheduler.
+
+        Args:
+            method: Method that takes the chat completion keyword arguments"""
+
+        @wraps(method)
+        def wrapper(**kwargs):
+            return cls.for_model(kwargs["model"]).call(method, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    @classmethod
+    def aschedule(cls, method: A) -> A:
+        """Wraps the given async chat completion method in the model's scheduler.
+
+        Args:
+            method: Async method that takes the chat completion keyword arguments
+        """
+
+        @wraps(method)
+        async def wrapper(**kwargs):
+            return await cls.for_model(kwargs["model"]).acall(method, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    @classmethod
+    def estimate_tokens(cls, **kwargs) -> int:
+        """Estimate the number of tokens that a request counts against the TPM.
+
+        Uses the rule of thumb of four characters per token for the prompt and
+        adds the maximum number of completion tokens.
+
+        Args:
+            All chat completion keyword arguments
+
+        Returns: Estimated number of tokens"""
+        characters = sum(len(m.get("content") or "") for m in kwargs["messages"])
+        completion_tokens = kwargs.get("max_tokens") or cls.DEFAULT_COMPLETION_TOKENS
+        return characters // 4 + completion_tokens
+
+    def call(self, method: Callable, **kwargs) -> Any:
+        """Call the method within the rate limits, retrying when rate limited.
+
+        Args:
+            method: Chat completion method
+            All other keyword arguments are passed to the method
+
+        Returns: Return value of the method"""
+        tokens = self.estimate_tokens(**kwargs)
+
+        for attempt in itertools.count():
+            while (delay := self._reserve(tokens)) > 0:
+                time.sleep(delay)
+
+            try:
+                response = method(**kwargs)
+            except Exception as error:
+                backoff = self._get_backoff(error, attempt)
+                if backoff is None:
+                    raise
+                Usage.record(retries=1)
+                time.sleep(backoff)
+            else:
+                self._settle(tokens, response)
+                return response
+
+        raise AssertionError("unreachable")
+
+    async def acall(self, method: Callable[..., Awaitable], **kwargs) -> Any:
+        """Asynchronously call the method within the rate limits.
+
+        Works like `call`, but awaits the method and does not block the event
+        loop while waiting.
+
+        Args:
+            method: Async chat completion method
+            All other keyword arguments are passed to the method
+
+        Returns: Return value of the method"""
+        tokens = self.estimate_tokens(**kwargs)
+
+        for attempt in itertools.count():
+            while (delay := self._reserve(tokens)) > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                response = await method(**kwargs)
+            except Exception as error:
+                backoff = self._get_backoff(error, attempt)
+                if backoff is None:
+                    raise
+                Usage.record(retries=1)
+                await asyncio.sleep(backoff)
+            else:
+                self._settle(tokens, response)
+                return response
+
+        raise AssertionError("unreachable")
+
+    @property
+    def saturation(self) -> float:
+        """How much of the budget is currently in use (0 = idle, 1 = exhausted)"""
+        with self._lock:
+            self._refill()
+            return self._get_saturation()
+
+    def summary(self) -> str:
+        """Summarize the requests that this scheduler has handled."""
+        minutes = max(time.monotonic() - self.started_at, 1) / 60
+        rpm = self.request_count / minutes
+        tpm = self.token_count / minutes
+
+        parts = [
+            f"{self.model}: {self.request_count} requests",
+            f"{rpm:.0f} RPM" + (f" of {self.rpm:.0f}" if self.rpm else ""),
+            f"{tpm:.0f} TPM" + (f" of {self.tpm:.0f}" if self.tpm else ""),
+            f"{self.retry_count} retries",
+            f"{self.wait_time:.1f}s waited in total",
+        ]
+
+        # Saturation is only meaningful with a budget
+        if self.rpm or self.tpm:
+            parts.append(f"{self.peak_saturation:.0%} peak saturation")
+
+        return ", ".join(parts)
+
+    def _get_saturation(self) -> float:
+        """Saturation of the buckets as they are (call with the lock held)."""
+        levels = []
+        if self.rpm:
+            levels.append(1 - max(self._requests, 0) / self.rpm)
+        if self.tpm:
+            levels.append(1 - max(self._tokens, 0) / self.tpm)
+        return max(levels, default=0.0)
+
+    def _refill(self) -> None:
+        """Refill the buckets for the time passed since the last refill."""
+        now = time.monotonic()
+        minutes = (now - self._updated_at) / 60
+        self._updated_at = now
+
+        if self.rpm:
+            self._requests = min(self._requests + minutes * self.rpm, self.rpm)
+        if self.tpm:
+            self._tokens = min(self._tokens + minutes * self.tpm, self.tpm)
+
+    def _reserve(self, tokens: int) -> float:
+        """Try to reserve budget for a request.
+
+        Args:
+            tokens: Estimated number of tokens for the request
+
+        Returns: 0 if the budget was reserved. Otherwise, the number of seconds
+                 to wait before trying again."""
+        with self._lock:
+            self._refill()
+            now = time.monotonic()
+
+            # Wait until the server is ready to accept requests again
+            delay = self._paused_until - now
+
+            # A single request can never use more than the full budget
+            if self.tpm:
+                tokens = min(tokens, int(self.tpm))
+
+            if self.rpm and self._requests < 1:
+                delay = max(delay, (1 - self._requests) / self.rpm * 60)
+            if self.tpm and self._tokens < tokens:
+                delay = max(delay, (tokens - self._tokens) / self.tpm * 60)
+
+            if delay > 0:
+                self.wait_time += delay
+                return delay
+
+            self._requests -= 1
+            self._tokens -= tokens
+            self.request_count += 1
+            self.peak_saturation = max(self.peak_saturation, self._get_saturation())
+            return 0
+
+    def _settle(self, tokens: int, response: Any) -> None:
+        """Correct the token budget with the actual usage of the response.
+
+        Args:
+            tokens: Estimated number of tokens that were reserved
+            response: The chat completion response (or Completion record)"""
+        if isinstance(response, Completion):
+            actual = response.total_tokens or tokens
+        else:
+            usage = getattr(response, "usage", None)
+            actual = usage.total_tokens if usage else tokens
+
+        with self._lock:
+            self.token_count += actual
+            if self.tpm:
+                self._tokens -= actual - tokens
+                self.peak_saturation = max(self.peak_saturation, self._get_saturation())
+
+    def _get_backoff(self, error: Exception, attempt: int) -> float | None:
+        """Get the number of seconds to wait before retrying a failed request.
+
+        Args:
+            error: The error raised by the request
+            attempt: Number of attempts so far (starting at 0)
+
+        Returns: Number of seconds or None, if the request should not be
+                 retried"""
+        if attempt >= self.max_retries:
+            return None
+
+        from openai import RateLimitError, APIStatusError, APIConnectionError
+
+        # Only retry rate limits, server errors and connection errors
+        if isinstance(error, APIStatusError):
+            if not (isinstance(error, RateLimitError) or error.status_code >= 500):
+                return None
+        elif not isinstance(error, APIConnectionError):
+            return None
+
+        # Exponential backoff with full jitter
+        delay = random.uniform(0, min(self.max_backoff, 2**attempt))
+
+        # Honor Retry-After header
+        if isinstance(error, APIStatusError):
+            retry_after = self._get_retry_after(error)
+            if retry_after is not None:
+                delay = retry_after + random.uniform(0, 1)
+
+        with self._lock:
+            self.retry_count += 1
+            self.wait_time += delay
+
+            # Pause all requests for this model while rate limited
+            if isinstance(error, RateLimitError):
+                now = time.monotonic()
+                self._paused_until = max(self._paused_until, now + delay)
+
+        return delay
+
+    def _get_retry_after(self, error: "APIStatusError") -> float | None:
+        """Get the number of seconds from the Retry-After header, if any."""
+        headers = error.response.headers
+
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            # Retry-After may also be an HTTP date, which we ignore
+            pass
+
+        return None
@@ -0,0 +1,119 @@
+import json
+
+
+class StreamParser:
+    """Reads a streamed answer and detects when it is complete.
+
+    Chatty models often keep writing after the answer, for example to explain
+    it. When a classifier passes a parser to `create_chat_completion` and
+    streaming is enabled, the response is streamed and the stream is cancelled
+    as soon as the parser has seen a complete answer. The content up to the
+    end of the answer becomes the message of the completion.
+
+    Parsers are created for each request. Subclasses implement `feed`, which
+    only needs to look at the new content.
+
+    Typical usage example:
+
+    ```
+    parser = JsonObjectParser()
+    for delta in deltas:
+        if parser.feed(delta):
+            break  # parser.content holds the complete answer
+    ```
+    """
+
+    # Content streamed so far
+    content: str
+
+    def __init__(self) -> None:
+        self.content = ""
+
+    def feed(self, delta: str) -> bool:
+        """Add the next part of the streamed content.
+
+        Args:
+            delta: Content that arrived since the last call
+
+        Returns: Whether the answer is complete (and `content` ends with it)"""
+        raise NotImplementedError
+
+
+class JsonObjectParser(StreamParser):
+    """Detects the end of the first valid JSON object, such as {"sdgs": [1, 5]}.
+
+    Any text before the object (such as a Markdown code fence) is skipped.
+    Braces are counted outside of strings, so the object only needs to be
+    decoded once its braces are balanced.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._start: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, delta: str) -> bool:
+        offset = len(self.content)
+        self.content += delta
+
+        for index, char in enumerate(delta, start=offset):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._start is not None:
+                self._in_string = True
+            elif char == "{":
+                if self._start is None:
+                    self._start = index
+                self._depth += 1
+            elif char == "}" and self._start is not None:
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._is_valid(self.content[self._start : index + 1]):
+                        self.content = self.content[: index + 1]
+                        return True
+                    # Not an object after all, so look for the next one
+                    self._start = None
+
+        return False
+
+    @staticmethod
+    def _is_valid(text: str) -> bool:
+        try:
+            return isinstance(json.loads(text), dict)
+        except json.JSONDecodeError:
+            return False
+
+
+class IdListParser(StreamParser):
+    """Detects the end of a comma-separated list of IDs, such as "1, 5, 7".
+
+    The list is complete as soon as any other character follows it, such as
+    the start of an explanation. Text before the first ID is skipped.
+    """
+
+    # Characters that may continue the list
+    LIST_CHARACTERS = frozenset("0123456789, \t\r\n")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._started = False
+
+    def feed(self, delta: str) -> bool:
+        offset = len(self.content)
+        self.content += delta
+
+        for index, char in enumerate(delta, start=offset):
+            if not self._started:
+                self._started = char.isdigit()
+            elif char not in self.LIST_CHARACTERS:
+                self.content = self.content[:index].rstrip(", \t\r\n")
+                return True
+
+        return False
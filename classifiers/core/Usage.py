@@ -0,0 +1,194 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, fields, replace
+from functools import wraps
+
+from typing import Any, Callable, ClassVar, Iterator, Self, TypeVar
+
+C = TypeVar("C", bound=Callable)
+
+# Guards updates of usage records that are shared across threads
+_lock = threading.Lock()
+
+# Usage records that requests are currently counted towards
+_tracked: ContextVar[tuple["Usage", ...]] = ContextVar("tracked", default=())
+
+
+@dataclass(kw_only=True)
+class Usage:
+    """Token usage, cost and latency of chat completion requests.
+
+    Every request that goes through `BaseClassifier.create_chat_completion`
+    (or a method wrapped with `with_cache`) is recorded in all usage records
+    that are being tracked in the current context. This makes it possible to
+    attribute usage to a single text (or pack of texts), as well as to a run.
+
+    Cost and tokens are nominal: cached responses count with the tokens of the
+    original response, so that runs can be compared no matter what was cached.
+    Responses without token counts (such as cancelled streams) are counted as
+    unmetered requests instead of with estimated tokens.
+    Latency is the wall time actually spent waiting for responses (including
+    cache lookups, rate limiting and retries).
+
+    Typical usage example:
+
+    ```
+    with Usage.track() as usage:
+        classifier.classify(text)
+    print(usage.cost, usage.latency)
+    ```
+    """
+
+    # Price in USD per million prompt and completion tokens, by model. Models
+    # are matched by prefix (longest first). Models without a price cost 0.
+    PRICES: ClassVar[dict[str, tuple[float, float]]] = {
+        "gpt-4o-mini": (0.15, 0.60),
+        "gpt-4o": (2.50, 10.00),
+        "gpt-4-turbo": (10.00, 30.00),
+        "gpt-4-0125-preview": (10.00, 30.00),
+        "gpt-4-1106-preview": (10.00, 30.00),
+        "gpt-4": (30.00, 60.00),
+        "gpt-3.5-turbo": (0.50, 1.50),
+    }
+
+    requests: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    retries: int = 0
+    unmetered: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+
+    @classmethod
+    @contextmanager
+    def track(cls) -> Iterator[Self]:
+        """Track the usage of all requests made within the context.
+
+        Tracking can be nested: requests count towards all enclosing records.
+
+        Returns: The usage record, updated as requests are made"""
+        usage = cls()
+        token = _tracked.set((*_tracked.get(), usage))
+        try:
+            yield usage
+        finally:
+            _tracked.reset(token)
+
+    @classmethod
+    def record(cls, **values: float) -> None:
+        """Add the given values to all usage records that are being tracked.
+
+        Args:
+            All keyword arguments are fields of the usage record"""
+        tracked = _tracked.get()
+        if not tracked:
+            return
+
+        with _lock:
+            for usage in tracked:
+                for name, value in values.items():
+                    setattr(usage, name, getattr(usage, name) + value)
+
+    @classmethod
+    def record_request(
+        cls,
+        model: str | None,
+        cached: bool,
+        latency: float,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+    ) -> None:
+        """Record a single request.
+
+        Args:
+            model: Name of the model (used to look up the price)
+            cached: Whether the response came from the cache
+            latency: Number of seconds that the request took
+            prompt_tokens: Number of prompt tokens (if known)
+            completion_tokens: Number of completion tokens (if known)"""
+        unmetered = prompt_tokens is None or completion_tokens is None
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+
+        cls.record(
+            requests=1,
+            cache_hits=int(cached),
+            cache_misses=int(not cached),
+            unmetered=int(unmetered),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost=cls.get_cost(model, prompt_tokens, completion_tokens),
+            latency=latency,
+        )
+
+    @classmethod
+    def get_cost(
+        cls, model: str | None, prompt_tokens: int, completion_tokens: int
+    ) -> float:
+        """Get the price of the given tokens in USD.
+
+        Returns: Cost (0 if the model has no price)"""
+        if model is None:
+            return 0.0
+
+        for prefix in sorted(cls.PRICES, key=len, reverse=True):
+            if model.startswith(prefix):
+                prompt_price, completion_price = cls.PRICES[prefix]
+                return (
+                    prompt_tokens * prompt_price + completion_tokens * completion_price
+                ) / 1_000_000
+
+        return 0.0
+
+    @staticmethod
+    def propagate(method: C) -> C:
+        """Wraps the method to run in the current context, even in other threads.
+
+        Threads do not inherit the context of the thread that starts them, so
+        methods that are run on a thread pool need to be wrapped for their
+        requests to be tracked.
+
+        Args:
+            method: The method to wrap"""
+        context = copy_context()
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            # Each call needs its own copy, as a context can only be entered once
+            return context.copy().run(method, *args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    def split(self, n: int) -> Self:
+        """Split the usage evenly, for example across the texts of a pack.
+
+        Args:
+            n: Number of parts
+
+        Returns: Usage of each part"""
+        return replace(
+            self,
+            **{field.name: getattr(self, field.name) / n for field in fields(self)},
+        )
+
+    def __add__(self, other: Self) -> Self:
+        return replace(
+            self,
+            **{
+                field.name: getattr(self, field.name) + getattr(other, field.name)
+                for field in fields(self)
+            },
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the usage record to a dict."""
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Self:
+        """Create the usage record from a dict (unknown keys are ignored)."""
+        names = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
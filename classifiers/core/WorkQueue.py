@@ -0,0 +1,384 @@
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from .Usage import Usage
+
+from typing import ClassVar, Iterable, Iterator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS texts (
+    hash TEXT PRIMARY KEY,
+    shard INTEGER NOT NULL REFERENCES shards (id),
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    hash TEXT PRIMARY KEY REFERENCES texts (hash),
+    sdgs TEXT NOT NULL,
+    usage TEXT
+);
+CREATE INDEX IF NOT EXISTS texts_shard ON texts (shard);
+"""
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard of texts that a worker has claimed."""
+
+    id: int
+    worker: str
+
+
+class WorkQueue:
+    """Durable queue of texts to classify, shared by several worker processes.
+
+    The texts are split into shards by a stable hash of their content. Workers
+    claim a shard with a lease, classify its texts and then complete the shard.
+    Every prediction is stored as soon as it is made and extends the lease. If
+    a worker fails or stalls, its lease expires and another worker claims the
+    shard, classifying only the texts that are still missing. Shards that fail
+    `max_attempts` times are marked as failed.
+
+    The queue is a SQLite database, so that no service is needed. Workers on
+    other machines can share it on a network file system (if it supports
+    SQLite's file locking).
+
+    Typical usage example:
+
+    ```
+    queue = WorkQueue(path)
+    queue.create(texts, shards=16)
+
+    # In each worker
+    while (shard := queue.claim(worker)) is not None:
+        for text, sdgs in classify(queue.get_missing_texts(shard)):
+            queue.add(shard, text, sdgs)
+        queue.complete(shard)
+    ```
+    """
+
+    # Number of seconds after which shards of unresponsive workers are freed
+    LEASE: ClassVar[float] = 300
+
+    # Number of claims after which a shard is given up on
+    MAX_ATTEMPTS: ClassVar[int] = 5
+
+    path: Path
+    lease: float
+    max_attempts: int
+
+    def __init__(
+        self, path: Path, lease: float | None = None, max_attempts: int | None = None
+    ) -> None:
+        """Initialize the queue.
+
+        Args:
+            path: Path of the database
+            lease: Number of seconds that a shard stays claimed without progress
+                   (default = LEASE)
+            max_attempts: Number of claims after which a shard fails
+                          (default = MAX_ATTEMPTS)"""
+        self.path = Path(path)
+        self.lease = lease or self.LEASE
+        self.max_attempts = max_attempts or self.MAX_ATTEMPTS
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection to the queue, creating its tables if needed."""
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.executescript(SCHEMA)
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and run a transaction that holds the write lock
+        from the start, so that two workers cannot claim the same shard."""
+        connection = self.connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    @staticmethod
+    def hash(text: str) -> str:
+        """Hash of the text content (the same as `Predictions.hash`)."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get_shard(cls, text: str, shards: int) -> int:
+        """Get the shard of the text, which is stable across processes.
+
+        Args:
+            text: The text
+            shards: Number of shards
+
+        Returns: Shard ID (0 to shards - 1)"""
+        return int(cls.hash(text)[:15], 16) % shards
+
+    def create(self, texts: Iterable[str], shards: int, **meta) -> None:
+        """Fill the queue with the texts, replacing anything it contained.
+
+        Args:
+            texts: The texts to classify (duplicates are only added once)
+            shards: Number of shards to split the texts into
+            All other keyword arguments are stored as metadata (as JSON)"""
+        with self.transaction() as connection:
+            for table in ["predictions", "texts", "shards", "meta"]:
+                connection.execute(f"DELETE FROM {table}")
+
+            connection.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in meta.items()],
+            )
+            connection.executemany(
+                "INSERT INTO shards (id) VALUES (?)", [(i,) for i in range(shards)]
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO texts VALUES (?, ?, ?)",
+                [
+                    (self.hash(text), self.get_shard(text, shards), text)
+                    for text in texts
+                ],
+            )
+
+            # Shards without texts are complete from the start
+            connection.execute("""
+                UPDATE shards SET status = 'done'
+                WHERE id NOT IN (SELECT DISTINCT shard FROM texts)
+                """)
+
+    def get_meta(self) -> dict:
+        """Get the metadata that the queue was created with."""
+        connection = self.connect()
+        try:
+            rows = connection.execute("SELECT key, value FROM meta")
+            return {key: json.loads(value) for key, value in rows}
+        finally:
+            connection.close()
+
+    def claim(self, worker: str) -> Shard | None:
+        """Claim the next shard that is pending or whose lease has expired.
+
+        Args:
+            worker: Unique name of the worker, such as <host>:<pid>
+
+        Returns: Shard or None (if no shard can be claimed right now)"""
+        now = time.time()
+
+        with self.transaction() as connection:
+            # Give up on shards that expired too many times
+            connection.execute(
+                """
+                UPDATE shards SET status = 'failed',
+                    error = coalesce(error, 'Lease expired too many times')
+                WHERE status = 'leased' AND lease_until < ? AND attempts >= ?
+                """,
+                (now, self.max_attempts),
+            )
+
+            row = connection.execute(
+                """
+                SELECT id FROM shards
+                WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                ORDER BY attempts, id
+                LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            connection.execute(
+                """
+                UPDATE shards
+                SET status = 'leased', worker = ?, lease_until = ?,
+                    attempts = attempts + 1
+                WHERE id = ?
+                """,
+                (worker, now + self.lease, row[0]),
+            )
+
+        return Shard(id=row[0], worker=worker)
+
+    def get_missing_texts(self, shard: Shard) -> list[str]:
+        """Get the texts of the shard that have not been classified yet."""
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                """
+                SELECT text FROM texts LEFT JOIN predictions USING (hash)
+                WHERE shard = ? AND predictions.hash IS NULL
+                ORDER BY texts.rowid
+                """,
+                (shard.id,),
+            )
+            return [text for (text,) in rows]
+        finally:
+            connection.close()
+
+    def add(
+        self, shard: Shard, text: str, sdgs: list[int], usage: Usage | None = None
+    ) -> bool:
+        """Store the prediction of a text and extend the lease of the shard.
+
+        Args:
+            shard: The claimed shard that the text belongs to
+            text: The classified text
+            sdgs: The predicted SDGs
+            usage: Usage of the requests made to classify the text (optional)
+
+        Returns: Whether the worker still holds the shard (if not, another
+                 worker has claimed it and this worker should stop)"""
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)",
+                (
+                    self.hash(text),
+                    json.dumps(sdgs),
+                    json.dumps(usage.to_dict()) if usage else None,
+                ),
+            )
+            return self._renew(connection, shard)
+
+    def renew(self, shard: Shard) -> bool:
+        """Extend the lease of the shard.
+
+        Returns: Whether the worker still holds the shard"""
+        with self.transaction() as connection:
+            return self._renew(connection, shard)
+
+    def _renew(self, connection: sqlite3.Connection, shard: Shard) -> bool:
+        cursor = connection.execute(
+            """
+            UPDATE shards SET lease_until = ?
+            WHERE id = ? AND worker = ? AND status = 'leased'
+            """,
+            (time.time() + self.lease, shard.id, shard.worker),
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, shard: Shard) -> None:
+        """Mark the shard as done, if all of its texts have been classified."""
+        with self.transaction() as connection:
+            connection.execute(
+                """
+                UPDATE shards SET status = 'done', lease_until = NULL, error = NULL
+                WHERE id = ? AND NOT EXISTS (
+                    SELECT 1 FROM texts LEFT JOIN predictions USING (hash)
+                    WHERE shard = ? AND predictions.hash IS NULL
+                )
+                """,
+                (shard.id, shard.id),
+            )
+
+    def release(self, shard: Shard, error: str) -> None:
+        """Give the shard back after an error, so that it can be claimed again.
+
+        Args:
+            shard: The claimed shard
+            error: Description of the error"""
+        with self.transaction() as connection:
+            connection.execute(
+                """
+                UPDATE shards
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    worker = NULL, lease_until = NULL, error = ?
+                WHERE id = ? AND worker = ? AND status = 'leased'
+                """,
+                (self.max_attempts, error, shard.id, shard.worker),
+            )
+
+    def retry_failed(self) -> int:
+        """Make failed shards pending again.
+
+        Returns: Number of shards"""
+        with self.transaction() as connection:
+            cursor = connection.execute("""
+                UPDATE shards SET status = 'pending', attempts = 0, worker = NULL,
+                    lease_until = NULL
+                WHERE status = 'failed'
+                """)
+            return cursor.rowcount
+
+    def status(self) -> dict[str, int]:
+        """Count the shards by status (pending, leased, done and failed)."""
+        connection = self.connect()
+        try:
+            counts = dict.fromkeys(["pending", "leased", "done", "failed"], 0)
+            rows = connection.execute(
+                "SELECT status, count(*) FROM shards GROUP BY status"
+            )
+            counts.update(dict(rows))
+            return counts
+        finally:
+            connection.close()
+
+    def count_texts(self) -> tuple[int, int]:
+        """Count the texts that have been classified and all texts.
+
+        Returns: Tuple of (classified texts, texts)"""
+        connection = self.connect()
+        try:
+            return connection.execute("""
+                SELECT count(predictions.hash), count(*)
+                FROM texts LEFT JOIN predictions USING (hash)
+                """).fetchone()
+        finally:
+            connection.close()
+
+    def errors(self) -> dict[int, str]:
+        """Get the last error of each shard that had one, by shard ID."""
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                "SELECT id, error FROM shards WHERE error IS NOT NULL ORDER BY id"
+            )
+            return dict(rows.fetchall())
+        finally:
+            connection.close()
+
+    def is_done(self) -> bool:
+        """Whether all shards are done."""
+        status = self.status()
+        return sum(status.values()) == status["done"]
+
+    def get_predictions(self) -> Iterator[tuple[str, list[int], Usage | None]]:
+        """Get all predictions made so far.
+
+        Returns: Iterator of (text, SDGs, usage) tuples"""
+        connection = self.connect()
+        try:
+            rows = connection.execute("""
+                SELECT text, sdgs, usage FROM texts JOIN predictions USING (hash)
+                ORDER BY texts.rowid
+                """)
+            for text, sdgs, usage in rows:
+                yield (
+                    text,
+                    json.loads(sdgs),
+                    Usage.from_dict(json.loads(usage)) if usage else None,
+                )
+        finally:
+            connection.close()
@@ -1,5 +1,92 @@
-from .BaseClassifier import BaseClassifier
-from .Config import Config
-from .ConfigSet import ConfigSet
-from .Parameters import Parameters
-from .Run import Run
+import sys
+from importlib import import_module
+from types import ModuleType
+
+from typing import TYPE_CHECKING, Any
+
+# Each class is defined in the module of the same name. Classes are imported
+# when they are first accessed, as some of them depend on heavy packages (such
+# as openai and pandas) that many scripts do not need.
+__all__ = [
+    "BaseClassifier",
+    "Config",
+    "ConfigSet",
+    "Parameters",
+    "Registry",
+    "ClassifierInfo",
+    "Run",
+    "RunIndex",
+    "Scheduler",
+    "Router",
+    "Provider",
+    "OpenAIProvider",
+    "ReplicateProvider",
+    "StreamParser",
+    "JsonObjectParser",
+    "IdListParser",
+    "Usage",
+    "Prompts",
+    "Predictions",
+    "Cache",
+    "Completion",
+    "PackError",
+    "PendingRequest",
+    "BatchJob",
+    "WorkQueue",
+    "Embeddings",
+    "PreFilter",
+]
+
+# Modules that define more than one exported class
+_MODULES = dict(
+    ClassifierInfo="Registry",
+    JsonObjectParser="StreamParser",
+    IdListParser="StreamParser",
+)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = import_module(f"{__name__}.{_MODULES.get(name, name)}")
+    value = globals()[name] = getattr(module, name)
+    return value
+
+
+class _Package(ModuleType):
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Importing a submodule binds it to the package, which would hide the
+        # class of the same name
+        if name in __all__ and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+if TYPE_CHECKING:
+    from .BaseClassifier import BaseClassifier
+    from .Config import Config
+    from .ConfigSet import ConfigSet
+    from .Parameters import Parameters
+    from .Registry import Registry, ClassifierInfo
+    from .Run import Run
+    from .RunIndex import RunIndex
+    from .Scheduler import Scheduler
+    from .Router import Router
+    from .Provider import Provider
+    from .OpenAIProvider import OpenAIProvider
+    from .ReplicateProvider import ReplicateProvider
+    from .StreamParser import StreamParser, JsonObjectParser, IdListParser
+    from .Usage import Usage
+    from .Prompts import Prompts
+    from .Predictions import Predictions
+    from .Cache import Cache
+    from .Completion import Completion
+    from .PackError import PackError
+    from .PendingRequest import PendingRequest
+    from .BatchJob import BatchJob
+    from .WorkQueue import WorkQueue
+    from .Embeddings import Embeddings
+    from .PreFilter import PreFilter
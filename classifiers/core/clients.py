@@ -0,0 +1,108 @@
+import os
+import asyncio
+import importlib.util
+from functools import cache
+from weakref import WeakKeyDictionary
+from dotenv import load_dotenv
+
+from typing import TYPE_CHECKING, Any
+
+# The OpenAI client takes a second to import, so it is only imported once the
+# first client is created
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
+
+# Async clients, one per event loop (httpx connections cannot be shared across
+# event loops)
+_async_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, "AsyncOpenAI"] = (
+    WeakKeyDictionary()
+)
+
+
+def get_http_client_options() -> dict[str, Any]:
+    """Options for the HTTP clients that hold the shared connection pools.
+
+    HTTP/2 is used if the optional h2 package is installed."""
+    import httpx
+    from openai import DEFAULT_TIMEOUT
+
+    return dict(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=DEFAULT_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+def create_openai_client(
+    base_url: str | None = None, api_key: str | None = None
+) -> "OpenAI":
+    """Create an OpenAI client with its own connection pool.
+
+    Args:
+        base_url: URL of the API, such as an OpenAI-compatible server (defaults
+                  to OPENAI_BASE_URL or the OpenAI API)
+        api_key: API key (defaults to OPENAI_API_KEY)
+
+    Returns: OpenAI client"""
+    import httpx
+    from openai import OpenAI
+
+    load_dotenv()
+    return OpenAI(
+        api_key=api_key or os.environ["OPENAI_API_KEY"],
+        base_url=base_url,
+        http_client=httpx.Client(**get_http_client_options()),
+        # Retries are handled by the Scheduler
+        max_retries=0,
+    )
+
+
+def create_async_openai_client(
+    base_url: str | None = None, api_key: str | None = None
+) -> "AsyncOpenAI":
+    """Create an AsyncOpenAI client with its own connection pool.
+
+    Args:
+        base_url: URL of the API (defaults to OPENAI_BASE_URL or the OpenAI API)
+        api_key: API key (defaults to OPENAI_API_KEY)
+
+    Returns: AsyncOpenAI client"""
+    import httpx
+    from openai import AsyncOpenAI
+
+    load_dotenv()
+    return AsyncOpenAI(
+        api_key=api_key or os.environ["OPENAI_API_KEY"],
+        base_url=base_url,
+        http_client=httpx.AsyncClient(**get_http_client_options()),
+        # Retries are handled by the Scheduler
+        max_retries=0,
+    )
+
+
+@cache
+def get_openai_client() -> "OpenAI":
+    """Returns the OpenAI client shared by all classifiers in this process.
+
+    The API key is read from the OPENAI_API_KEY environment variable (or .env
+    file). Set OPENAI_BASE_URL to send requests to a different server, such as
+    a local stub server.
+
+    Returns: OpenAI client"""
+    return create_openai_client()
+
+
+def get_async_openai_client() -> "AsyncOpenAI":
+    """Returns the AsyncOpenAI client shared by all classifiers.
+
+    One client (and thus one connection pool) is created for each event loop.
+    Must be called from within a running event loop.
+
+    Returns: AsyncOpenAI client"""
+    loop = asyncio.get_running_loop()
+
+    if loop not in _async_clients:
+        _async_clients[loop] = create_async_openai_client()
+
+    return _async_clients[loop]
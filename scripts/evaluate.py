@@ -6,11 +6,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).absolute().parent.parent))
 
 import argparse
-from datetime import datetime
-from babel.dates import format_date
-from classifiers import BaseClassifier, Run
-from sdgclassification.benchmark import Benchmark
-from scripts.update_files import update_files
+from classifiers import Registry
 
 
 # Parse command-line arguments
@@ -18,30 +14,262 @@ parser = argparse.ArgumentParser(
     description="Evaluate LLM classifier against benchmark"
 )
 parser.add_argument("classifier", type=str)
-parser.add_argument("--config", type=int)
+parser.add_argument(
+    "--config",
+    type=int,
+    nargs="+",
+    help="configurations to evaluate (several are evaluated concurrently)",
+)
+parser.add_argument(
+    "--all-configs",
+    action="store_true",
+    help="evaluate all configurations of the classifier concurrently",
+)
 parser.add_argument(
     "--sdg",
     type=int,
     nargs="*",
     help="select the SDGs to benchmark against (defaults to all)",
 )
+parser.add_argument(
+    "--concurrency",
+    type=int,
+    help="maximum number of texts to classify in parallel (across all configurations)",
+)
+parser.add_argument(
+    "--rpm",
+    type=float,
+    help="maximum number of requests per minute to send to the model",
+)
+parser.add_argument(
+    "--tpm",
+    type=float,
+    help="maximum number of tokens per minute to send to the model",
+)
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="stream responses and stop them as soon as the answer is complete",
+)
+parser.add_argument(
+    "--scores",
+    action="store_true",
+    help="store a confidence score for each SDG, derived from token logprobs (see scripts/tune_thresholds.py)",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="resume an interrupted evaluation, skipping texts that have already been classified",
+)
+parser.add_argument(
+    "--batch",
+    action="store_true",
+    help="send the requests through the OpenAI Batch API (at half the cost, but may take up to 24 hours)",
+)
+parser.add_argument(
+    "--list-configs",
+    action="store_true",
+    help="list the configurations of the classifier and exit",
+)
 args = parser.parse_args()
 
-Classifier = BaseClassifier.load(args.classifier)
-configurations = Classifier.CONFIGURATIONS
+# Read the configurations without importing the classifier, which is slow
+info = Registry().get(args.classifier)
+if info is None:
+    print(f"Classifier {args.classifier} does not exist.")
+    exit(1)
+
+configurations = info.configurations
+
+if args.list_configs:
+    [print(f"{i+1}) {c}") for i, c in enumerate(configurations)]
+    exit(0)
+
+if args.all_configs:
+    args.config = list(range(1, len(configurations) + 1))
 
 # If only a single config exists, always use it
-if len(configurations) == 1:
-    args.config = 1
+elif len(configurations) == 1:
+    args.config = [1]
 
 # If config was not provided, prompt user for it
 if args.config is None:
     print(f"{args.classifier} has several configurations available.")
     [print(f"{i+1}) {c}") for i, c in enumerate(configurations)]
-    args.config = int(input("Enter configuration number: "))
+    args.config = [int(input("Enter configuration number: "))]
+
+# Import the classifier and the dependencies of the evaluation
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from progress.bar import Bar
+from babel.dates import format_date
+from classifiers import BaseClassifier, Predictions, Run, Router, Scheduler
+from sdgclassification.benchmark import Benchmark
+from scripts.update_files import update_files
+
+from typing import Callable
+
+
+class Evaluation:
+    """Evaluation of one configuration of the classifier."""
 
-# Instantiate classifier
-classifier = Classifier(args.config)
+    classifier: BaseClassifier
+    checkpoint: Path
+    predictions: Predictions
+    benchmark: Benchmark
+
+    # Texts that still need to be classified
+    texts: list[str]
+
+    # SDGs and labels of the benchmark rows of each text that is not classified
+    expected: dict[str, list[tuple[int, bool]]]
+
+    # Number of correct and all predictions of the benchmark rows so far
+    correct: int
+    total: int
+
+    def __init__(self, classifier: BaseClassifier, resume: bool, **kwargs) -> None:
+        """Prepare the evaluation.
+
+        Args:
+            classifier: Instance of the classifier, with the config to evaluate
+            resume: Whether to keep the texts classified by an earlier attempt
+            All other keyword arguments are passed to the benchmark."""
+        self.classifier = classifier
+
+        # Predictions are streamed to a checkpoint file, so that an interrupted
+        # evaluation can be resumed
+        self.checkpoint = Run.checkpoint_path(
+            classifier.configuration, classifier.runs_directory
+        )
+        if not resume:
+            self.checkpoint.unlink(missing_ok=True)
+
+        # Classify each unique benchmark text once, concurrently. The benchmark
+        # then simply looks up the prediction for each text.
+        self.predictions = Predictions(checkpoint=self.checkpoint)
+        self.benchmark = Benchmark(predict_sdgs=self.predictions.get, **kwargs)
+        self.texts = self.predictions.missing(self.benchmark.df["text"])
+
+        # Keep track of the accuracy while classifying, starting with the texts
+        # that were already classified
+        rows = self.benchmark.df[["text", "sdg", "label"]].itertuples(index=False)
+        self.expected = {}
+        self.correct, self.total = 0, 0
+        for text, sdg, label in rows:
+            if text in self.predictions:
+                self.correct += (sdg in self.predictions.get(text)) == label
+                self.total += 1
+            else:
+                self.expected.setdefault(text, []).append((sdg, label))
+
+    @property
+    def accuracy(self) -> str:
+        """Accuracy of the predictions so far, for the progress bar."""
+        return f"{self.correct / self.total * 100:.1f}%" if self.total else "-"
+
+    def classify(self, progress: Callable[[], None], stop: threading.Event) -> None:
+        """Classify the remaining texts, adding them to the checkpoint.
+
+        Args:
+            progress: Function to call after each text
+            stop: Event to stop classifying (such as on Ctrl-C)"""
+        try:
+            for text, sdgs, usage in self.classifier.classify_with_usage(self.texts):
+                self.predictions.add(text, sdgs, usage)
+
+                for sdg, label in self.expected[text]:
+                    self.correct += (sdg in sdgs) == label
+                    self.total += 1
+
+                progress()
+                if stop.is_set():
+                    break
+        finally:
+            self.predictions.close()
+
+    def create_run(self) -> Run:
+        """Run the benchmark on the predictions and store the run.
+
+        Returns: The run"""
+        self.benchmark.run()
+
+        # Usage of the requests made for each unique text (tokens, cost, latency)
+        usage_df = self.predictions.get_usage_table(self.benchmark.df["text"])
+        usage_columns = list(usage_df.columns)
+
+        # Sum up the usage of the texts of each SDG. Like the other stats, the
+        # Average row is the mean across SDGs.
+        sdg_usage = (
+            self.benchmark.df[["text", "sdg"]]
+            .drop_duplicates()
+            .join(usage_df, on="text")
+            .groupby("sdg")[usage_columns]
+            .sum(min_count=1)
+        )
+        sdg_usage.loc["Average"] = sdg_usage.mean()
+
+        stats = self.benchmark.stats.to_dataframe()
+        stats = stats.join(sdg_usage, on="sdg")
+        results = self.benchmark.results.to_dataframe().join(usage_df, on="text")
+
+        # Confidence score of each SDG for each text, next to the predictions.
+        # The responses were requested with logprobs, so they come from the
+        # cache.
+        if self.classifier.scores:
+            texts = results["text"].unique()
+            scores = {text: self.classifier.get_scores(text) for text in texts}
+            position = list(results.columns).index("predictions") + 1
+            results.insert(position, "scores", results["text"].map(scores))
+
+        # Total usage of the run, for the texts whose usage was recorded
+        recorded = usage_df.dropna()
+        run_usage = (
+            dict(recorded.sum().round(6), texts=len(recorded))
+            if len(recorded)
+            else None
+        )
+
+        # Store params, results and stats
+        run = Run(
+            config=self.classifier.configuration,
+            date=format_date(datetime.today(), format="long", locale="en"),
+            stats=stats,
+            results=results,
+            usage=run_usage,
+        )
+        run.write_files(self.classifier.runs_directory)
+
+        # Evaluation is complete, so the checkpoint is no longer needed
+        self.checkpoint.unlink()
+        return run
+
+
+Classifier = info.load()
+
+# Set rate limits
+Scheduler.configure(rpm=args.rpm, tpm=args.tpm)
+
+# Instantiate a classifier for each config. When evaluating several configs,
+# the concurrency is split between them, so that it is capped in total. Without
+# --concurrency, the cap is the highest concurrency of the configs.
+config_ids = list(dict.fromkeys(args.config))
+total_concurrency = args.concurrency or max(
+    configurations.get_config(c).get("concurrency", Classifier.concurrency)
+    for c in config_ids
+)
+concurrency = max(total_concurrency // len(config_ids), 1)
+if args.scores and not Classifier.supports_scores:
+    print(f"Classifier {args.classifier} does not support scores.")
+    exit(1)
+
+stream = args.stream or None
+scores = args.scores or None
+classifiers = [
+    Classifier(c, concurrency=concurrency, stream=stream, scores=scores)
+    for c in config_ids
+]
 
 # Determine kwargs
 kwargs = dict()
@@ -49,18 +277,74 @@ kwargs = dict()
 if args.sdg is not None:
     kwargs["sdgs"] = args.sdg
 
-# Run benchmark
-benchmark = Benchmark(predict_sdgs=classifier.classify, **kwargs)
-benchmark.run()
+# All configs are evaluated on the same benchmark texts
+evaluations = [Evaluation(c, resume=args.resume, **kwargs) for c in classifiers]
+for config_id, evaluation in zip(config_ids, evaluations):
+    print(
+        f"Config {config_id}: classifying {len(evaluation.texts)} unique texts "
+        f"({len(evaluation.benchmark.df)} benchmark rows, "
+        f"{len(evaluation.predictions)} texts in checkpoint)"
+    )
 
-# Store params, results and stats
-run = Run(
-    config=classifier.configuration,
-    date=format_date(datetime.today(), format="long", locale="en"),
-    stats=benchmark.stats.to_dataframe(),
-    results=benchmark.results.to_dataframe(),
+# Send the requests through the Batch API first, so that classifying the texts
+# below only hits the cache
+if args.batch:
+    from classifiers import BatchJob
+
+    for evaluation in evaluations:
+        # Submitted batches are recorded next to the checkpoint of the config
+        state = evaluation.checkpoint.with_suffix(".batches.json")
+        BatchJob(evaluation.classifier, state=state).run(evaluation.texts)
+
+bar = Bar(
+    "Classifying",
+    max=sum(len(e.texts) for e in evaluations),
+    suffix="%(index)d/%(max)d - %(accuracy)s",
 )
-run.write_files(classifier.runs_directory)
+bar.accuracy = "accuracy: " + " | ".join(e.accuracy for e in evaluations)
+lock, stop = threading.Lock(), threading.Event()
+
+
+def progress() -> None:
+    """Advance the progress bar, showing the accuracy of each config."""
+    with lock:
+        bar.accuracy = "accuracy: " + " | ".join(e.accuracy for e in evaluations)
+        bar.next()
+
+
+try:
+    if len(evaluations) == 1:
+        evaluations[0].classify(progress, stop)
+    else:
+        # Classify the texts of all configs concurrently
+        with ThreadPoolExecutor(max_workers=len(evaluations)) as executor:
+            futures = [executor.submit(e.classify, progress, stop) for e in evaluations]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                stop.set()
+                raise
+except KeyboardInterrupt:
+    print("\nInterrupted. Run again with --resume to continue.")
+    exit(1)
+finally:
+    bar.finish()
+
+# Run the benchmark of each config and store its run
+for config_id, evaluation in zip(config_ids, evaluations):
+    if len(evaluations) > 1:
+        print(f"Config {config_id}: {evaluation.classifier.configuration}")
+    evaluation.create_run()
+
+# Report how close the requests came to the rate limits
+for scheduler in Scheduler.all():
+    print(scheduler.summary())
+
+# Report the health of the providers, if requests were routed to several
+router = Router.get()
+if len(router.providers) > 1:
+    print(router.summary())
 
 # Update files
-update_files(classifier)
+update_files(Classifier)
@@ -0,0 +1,582 @@
+"""Local stub server that imitates the OpenAI chat completions endpoint.
+
+It also imitates the embeddings endpoint and the files and batches endpoints
+of the Batch API. Batches are
+processed as soon as they are created.
+
+Chat completion and embeddings requests can be slowed down (--latency,
+--jitter), fail at random with a server error (--error-rate) and be rate
+limited (--rpm), to test how classifiers perform under realistic conditions.
+Chat completions can also be generated token by token (--token-latency) and
+followed by an explanation (--explanation), like the responses of chatty
+models. Streamed requests receive the tokens as server-sent events. Requests
+with logprobs receive made-up (but repeatable) logprobs, with other SDGs as
+alternatives to each number.
+
+Useful for testing classifiers without making (paid) requests to OpenAI:
+
+```
+python scripts/mock_server.py --port 8000
+OPENAI_BASE_URL=http://localhost:8000/v1 python scripts/evaluate.py myclassifier
+```
+"""
+
+import re
+import math
+import json
+import time
+import random
+import hashlib
+import uuid
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from typing import Any, Iterator
+
+
+class MockServer(ThreadingHTTPServer):
+    """HTTP server that answers chat completion requests with a fixed message."""
+
+    daemon_threads = True
+
+    # Message content to respond with (None = respond with SDG 7) and text to
+    # append to it
+    content: str | None
+    explanation: str
+
+    # Uploaded files and created batches by ID
+    files: dict[str, bytes]
+    batches: dict[str, dict]
+
+    # Simulated conditions of chat completion and embeddings requests
+    latency: float
+    jitter: float
+    error_rate: float
+    rpm: float | None
+    token_latency: float
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 0,
+        content=None,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        rpm: float | None = None,
+        explanation: str = "",
+        token_latency: float = 0,
+    ):
+        """Initialize the server.
+
+        Args:
+            host: Host to bind to
+            port: Port to bind to (0 = pick a free port)
+            content: Message content to respond with. By default, responds
+                     with SDG 7 for every text (see get_default_content).
+            latency: Number of seconds to wait before responding
+            jitter: Maximum number of seconds to add to or subtract from the
+                    latency (uniformly distributed)
+            error_rate: Share of requests to fail with a server error (500)
+            rpm: Requests per minute to accept before responding with rate
+                 limit errors (429). The budget refills continuously and
+                 allows bursts of one second's worth of requests.
+                 (None = unlimited)
+            explanation: Text to append to every message, like a model that
+                         explains its answer
+            token_latency: Number of seconds to generate each completion token
+        """
+        super().__init__((host, port), MockRequestHandler)
+        self.content = content
+        self.explanation = explanation
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rpm = rpm
+        self.token_latency = token_latency
+        self._requests = rpm / 60 if rpm else 0
+        self._updated_at = time.monotonic()
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to use as OPENAI_BASE_URL"""
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode("utf-8")
+        return f"http://{host}:{port}/v1"
+
+    def simulate(self) -> tuple[int, dict] | None:
+        """Simulate the latency, errors and rate limits of the API.
+
+        Returns: Status code and headers of an error to respond with, if any"""
+        if self.rpm:
+            with self.lock:
+                now = time.monotonic()
+                capacity = self.rpm / 60
+                self._requests = min(
+                    self._requests + (now - self._updated_at) * capacity, capacity
+                )
+                self._updated_at = now
+
+                if self._requests < 1:
+                    wait = (1 - self._requests) / capacity
+                    return 429, {"retry-after-ms": str(int(wait * 1000) + 1)}
+                self._requests -= 1
+
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < self.error_rate:
+            return 500, {}
+
+        return None
+
+    def get_default_content(self, request: dict) -> str:
+        """Get the message content to respond with, if none was configured.
+
+        Responds with SDG 7 for every text in the request.
+
+        Args:
+            request: The JSON body of the request
+
+        Returns: Message content"""
+        if request.get("response_format", {}).get("type") != "json_object":
+            return "7"
+
+        # Packed requests contain several texts, labeled with their IDs
+        prompt = request["messages"][-1]["content"]
+        ids = re.findall(r'^Text (\d+): """', prompt, flags=re.MULTILINE)
+        if ids:
+            return json.dumps({id: [7] for id in ids})
+
+        return '{"sdgs": [7]}'
+
+    def get_content(self, request: dict) -> str:
+        """Get the message content to respond with.
+
+        Args:
+            request: The JSON body of the request
+
+        Returns: Message content"""
+        content = self.content
+        if content is None:
+            content = self.get_default_content(request)
+        return content + self.explanation
+
+    def get_usage(self, request: dict, content: str) -> dict:
+        """Roughly estimate the token usage (four characters per token).
+
+        Args:
+            request: The JSON body of the request
+            content: Message content of the response
+
+        Returns: Usage object"""
+        prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = max(len(content) // 4, 1)
+
+        return dict(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+    def get_tokens(self, content: str) -> list[str]:
+        """Split the message content into tokens: numbers and up to four other
+        characters."""
+        return re.findall(r"\d+|\D{1,4}", content)
+
+    def get_logprobs(self, request: dict, tokens: list[str]) -> list[dict] | None:
+        """Make up the logprobs of the tokens, if the request asks for them.
+
+        Numbers (and closing brackets) are chosen with a probability of 50% to
+        100%, with a few SDGs as alternatives. Other tokens are certain. The
+        probabilities depend only on the messages, so they are repeatable.
+
+        Args:
+            request: The JSON body of the request
+            tokens: Tokens of the message content
+
+        Returns: Logprobs of each token (None = not requested)"""
+        if not request.get("logprobs"):
+            return None
+
+        messages = json.dumps(request.get("messages"), sort_keys=True)
+        rng = random.Random(hashlib.sha256(messages.encode("utf-8")).digest())
+        top_logprobs = request.get("top_logprobs") or 0
+
+        logprobs = []
+        for token in tokens:
+            alternatives = [(token, 1.0)]
+            if token.isdigit() or token.startswith("]"):
+                probability = rng.uniform(0.5, 1.0)
+                alternatives = [(token, probability)]
+                for sdg in rng.sample(range(1, 18), 5):
+                    if str(sdg) != token:
+                        share = (1 - probability) * rng.uniform(0.3, 0.7)
+                        alternatives.append((str(sdg), share))
+                        probability += share
+
+            entries = [
+                dict(token=t, logprob=math.log(p), bytes=list(t.encode("utf-8")))
+                for t, p in sorted(alternatives, key=lambda a: a[1], reverse=True)
+            ]
+            logprobs.append(
+                dict(
+                    token=token,
+                    logprob=math.log(alternatives[0][1]),
+                    bytes=list(token.encode("utf-8")),
+                    top_logprobs=entries[:top_logprobs],
+                )
+            )
+
+        return logprobs
+
+    def create_chat_completion(self, request: dict) -> dict:
+        """Create the response body for a chat completion request.
+
+        Args:
+            request: The JSON body of the request
+
+        Returns: The JSON body of the response"""
+        content = self.get_content(request)
+        logprobs = self.get_logprobs(request, self.get_tokens(content))
+
+        return dict(
+            id=f"chatcmpl-{uuid.uuid4().hex}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=request.get("model", "mock"),
+            choices=[
+                dict(
+                    index=0,
+                    message=dict(role="assistant", content=content),
+                    finish_reason="stop",
+                    logprobs=None if logprobs is None else dict(content=logprobs),
+                )
+            ],
+            usage=self.get_usage(request, content),
+        )
+
+    def stream_chat_completion(self, request: dict) -> Iterator[dict]:
+        """Generate the chunks of a streamed chat completion.
+
+        Each chunk holds one token (see `get_tokens`) and takes the token
+        latency to generate.
+
+        Args:
+            request: The JSON body of the request
+
+        Returns: Iterator of the JSON bodies of the chunks"""
+        content = self.get_content(request)
+        tokens = self.get_tokens(content)
+        logprobs = self.get_logprobs(request, tokens)
+        id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = request.get("model", "mock")
+
+        def chunk(
+            delta: dict,
+            finish_reason: str | None = None,
+            logprobs: dict | None = None,
+            **kwargs,
+        ) -> dict:
+            choice = dict(
+                index=0, delta=delta, finish_reason=finish_reason, logprobs=logprobs
+            )
+            return dict(
+                id=id,
+                object="chat.completion.chunk",
+                created=created,
+                model=model,
+                choices=[choice],
+                **kwargs,
+            )
+
+        yield chunk(dict(role="assistant", content=""))
+        for index, token in enumerate(tokens):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield chunk(
+                dict(content=token),
+                logprobs=None if logprobs is None else dict(content=[logprobs[index]]),
+            )
+        yield chunk({}, finish_reason="stop")
+
+        if (request.get("stream_options") or {}).get("include_usage"):
+            usage = self.get_usage(request, content)
+            yield dict(chunk({}), choices=[], usage=usage)
+
+    def create_embeddings(self, request: dict) -> dict:
+        """Create the response body for an embeddings request.
+
+        Embeddings are hashed bags of words, so that texts that share words
+        are similar.
+
+        Args:
+            request: The JSON body of the request
+
+        Returns: The JSON body of the response"""
+        inputs = request["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        data = []
+        for index, text in enumerate(inputs):
+            vector = [0.0] * 64
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.md5(word.encode("utf-8")).digest()
+                vector[digest[0] % 64] += 1.0
+            data.append(dict(object="embedding", index=index, embedding=vector))
+
+        tokens = sum(len(text) // 4 for text in inputs)
+        return dict(
+            object="list",
+            data=data,
+            model=request.get("model", "mock"),
+            usage=dict(prompt_tokens=tokens, total_tokens=tokens),
+        )
+
+    def create_file(self, data: bytes, filename: str, purpose: str) -> dict:
+        """Store an uploaded file.
+
+        Args:
+            data: Content of the file
+            filename: Name of the file
+            purpose: Purpose of the file, such as batch
+
+        Returns: The file object"""
+        id = f"file-{uuid.uuid4().hex}"
+        with self.lock:
+            self.files[id] = data
+
+        return dict(
+            id=id,
+            object="file",
+            bytes=len(data),
+            created_at=int(time.time()),
+            filename=filename,
+            purpose=purpose,
+            status="processed",
+        )
+
+    def create_batch(self, request: dict) -> dict:
+        """Create a batch and process all of its requests right away.
+
+        Args:
+            request: The JSON body of the request
+
+        Returns: The batch object"""
+        with self.lock:
+            input = self.files[request["input_file_id"]].decode("utf-8")
+
+        results = []
+        for line in input.splitlines():
+            item = json.loads(line)
+            results.append(
+                dict(
+                    id=f"batch_req_{uuid.uuid4().hex}",
+                    custom_id=item["custom_id"],
+                    response=dict(
+                        status_code=200,
+                        request_id=uuid.uuid4().hex,
+                        body=self.create_chat_completion(item["body"]),
+                    ),
+                    error=None,
+                )
+            )
+
+        output = "".join(json.dumps(result) + "\n" for result in results)
+        output_file = self.create_file(
+            output.encode("utf-8"), "output.jsonl", "batch_output"
+        )
+
+        now = int(time.time())
+        batch = dict(
+            id=f"batch_{uuid.uuid4().hex}",
+            object="batch",
+            endpoint=request["endpoint"],
+            input_file_id=request["input_file_id"],
+            completion_window=request["completion_window"],
+            status="completed",
+            output_file_id=output_file["id"],
+            error_file_id=None,
+            created_at=now,
+            completed_at=now,
+            request_counts=dict(total=len(results), completed=len(results), failed=0),
+        )
+        with self.lock:
+            self.batches[batch["id"]] = batch
+        return batch
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    server: MockServer
+
+    # Keep connections alive, like the OpenAI API does
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        path = self.path.rstrip("/")
+
+        if path.endswith("/chat/completions") or path.endswith("/embeddings"):
+            error = self.server.simulate()
+            if error is not None:
+                return self.send_error_status(*error)
+
+        if path.endswith("/chat/completions"):
+            request = json.loads(data or b"{}")
+            if request.get("stream"):
+                return self.send_events(self.server.stream_chat_completion(request))
+
+            response = self.server.create_chat_completion(request)
+            completion_tokens = response["usage"]["completion_tokens"]
+            time.sleep(completion_tokens * self.server.token_latency)
+            self.send_json(200, response)
+        elif path.endswith("/embeddings"):
+            request = json.loads(data or b"{}")
+            self.send_json(200, self.server.create_embeddings(request))
+        elif path.endswith("/files"):
+            self.send_json(200, self.server.create_file(**self.parse_form(data)))
+        elif path.endswith("/batches"):
+            request = json.loads(data or b"{}")
+            self.send_json(200, self.server.create_batch(request))
+        else:
+            self.send_not_found()
+
+    def do_GET(self) -> None:
+        parts = self.path.rstrip("/").split("/")
+
+        # /v1/files/{id}/content
+        if parts[-3:-2] == ["files"] and parts[-1] == "content":
+            data = self.server.files.get(parts[-2])
+            if data is not None:
+                return self.send_data(200, data, "application/octet-stream")
+
+        # /v1/batches/{id}
+        if parts[-2:-1] == ["batches"] and parts[-1] in self.server.batches:
+            return self.send_json(200, self.server.batches[parts[-1]])
+
+        self.send_not_found()
+
+    def parse_form(self, data: bytes) -> dict:
+        """Parse the multipart form of a file upload."""
+        content_type = self.headers.get("Content-Type", "")
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + data
+        )
+
+        form: dict[str, Any] = dict(filename="upload")
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                form["data"] = part.get_payload(decode=True)
+                form["filename"] = part.get_filename() or form["filename"]
+            elif name == "purpose":
+                form["purpose"] = part.get_content().strip()
+        return form
+
+    def send_not_found(self) -> None:
+        self.send_json(404, dict(error=dict(message=f"{self.path} not found")))
+
+    def send_error_status(self, status: int, headers: dict) -> None:
+        messages = {429: "Rate limit reached", 500: "The server had an error"}
+        error = dict(message=messages.get(status, "Error"), type="server_error")
+        self.send_json(status, dict(error=error), headers)
+
+    def send_json(self, status: int, body: Any, headers: dict = {}) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_data(status, data, "application/json", headers)
+
+    def send_data(
+        self, status: int, data: bytes, content_type: str, headers: dict = {}
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_events(self, events: Iterator[dict]) -> None:
+        """Send server-sent events with chunked transfer encoding, until the
+        client closes the connection."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_chunk(data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            for event in events:
+                send_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            send_chunk(b"data: [DONE]\n\n")
+            send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream
+            self.close_connection = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Do not log every request
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(
+        description="Run a local stub of the OpenAI chat completions and batch endpoints"
+    )
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--content", type=str, help="message content to respond with")
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds to wait before responding"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0, help="maximum deviation from the latency"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0, help="share of requests to fail (500)"
+    )
+    parser.add_argument(
+        "--rpm", type=float, help="requests per minute before rate limiting (429)"
+    )
+    parser.add_argument(
+        "--explanation", type=str, default="", help="text to append to every message"
+    )
+    parser.add_argument(
+        "--token-latency",
+        type=float,
+        default=0,
+        help="seconds to generate each completion token",
+    )
+    args = parser.parse_args()
+
+    server = MockServer(
+        args.host,
+        args.port,
+        content=args.content,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rpm=args.rpm,
+        explanation=args.explanation,
+        token_latency=args.token_latency,
+    )
+    print(f"Mock server running. Use OPENAI_BASE_URL={server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,381 @@
+"""Benchmark the throughput and latency of the classifiers against a mock server.
+
+Starts the mock server (see mock_server.py) with the given latency, jitter,
+error rate and rate limit, and classifies benchmark texts with each classifier
+at each concurrency level, through the classifier's real code path. Every run
+starts with an empty cache (cold) and then classifies the same texts again
+(warm), which only measures the overhead of the classifier itself: prompts,
+caching and parsing.
+
+```
+python scripts/perfbench.py --concurrency 1 8 32 --latency 0.2 --jitter 0.1
+```
+
+Reports the throughput, the latency per text (p50, p95, p99), the cache hit
+rate, the CPU time per text and the peak memory of each run. The report is
+saved as JSON (perfbench.json by default), so that runs can be compared.
+
+Each run happens in a separate process, so that CPU time and memory are not
+affected by the mock server or by other runs.
+
+Pass --baseline with an earlier report to compare against it. The script exits
+with an error if the CPU time per text or the warm throughput got worse by more
+than the tolerance (20% by default):
+
+```
+python scripts/perfbench.py --baseline perfbench.json --output new.json
+```
+"""
+
+import sys
+from pathlib import Path
+
+# Make the modules of the parent folder accessible to the scripts
+# See: https://stackoverflow.com/a/27876800/6451879
+sys.path.append(str(Path(__file__).absolute().parent.parent))
+
+import os
+import json
+import time
+import socket
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+import numpy as np
+from tabulate import tabulate
+from classifiers import Registry
+
+ROOT = Path(__file__).absolute().parent.parent
+
+
+def get_free_port() -> int:
+    """Get a free port to run the mock server on."""
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    """Start the mock server in a separate process.
+
+    Returns: The server process and its base URL"""
+    port = get_free_port()
+    command = [sys.executable, str(ROOT.joinpath("scripts", "mock_server.py"))]
+    command += ["--port", str(port), "--latency", str(args.latency)]
+    command += ["--jitter", str(args.jitter), "--error-rate", str(args.error_rate)]
+    if args.rpm:
+        command += ["--rpm", str(args.rpm)]
+
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+    # Wait until the server accepts connections
+    for _ in range(100):
+        try:
+            socket.create_connection(("localhost", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        server.kill()
+        raise Exception("Mock server did not start")
+
+    return server, f"http://localhost:{port}/v1"
+
+
+def run_worker(
+    args: argparse.Namespace, classifier: str, concurrency: int, base_url: str
+) -> dict:
+    """Benchmark the classifier in a separate process with an empty cache.
+
+    Returns: Results of the run"""
+    with tempfile.TemporaryDirectory() as cache_directory:
+        env = dict(
+            os.environ,
+            OPENAI_API_KEY="mock",
+            OPENAI_BASE_URL=base_url,
+            CLASSIFIERS_CACHE_DIRECTORY=cache_directory,
+        )
+        command = [sys.executable, __file__, "--worker", classifier]
+        command += ["--config", str(args.config), "--texts", str(args.texts)]
+        command += ["--concurrency", str(concurrency)]
+
+        process = subprocess.run(
+            command, cwd=ROOT, env=env, capture_output=True, text=True
+        )
+
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines() or ["unknown error"]
+        return dict(error=error[-1])
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def measure(classifier, texts: list[str]) -> dict:
+    """Classify the texts and measure the performance.
+
+    Returns: Measurements of the pass"""
+    from classifiers import Usage
+
+    latencies = []
+
+    started_at = time.perf_counter()
+    cpu_started_at = time.process_time()
+    with Usage.track() as total:
+        for _, _, usage in classifier.classify_with_usage(texts):
+            latencies.append(usage.latency)
+    cpu_time = time.process_time() - cpu_started_at
+    duration = time.perf_counter() - started_at
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return dict(
+        texts=len(texts),
+        seconds=duration,
+        texts_per_second=len(texts) / duration,
+        latency_p50_ms=p50,
+        latency_p95_ms=p95,
+        latency_p99_ms=p99,
+        requests=total.requests,
+        cache_hit_rate=total.cache_hits / max(total.requests, 1),
+        retries=total.retries,
+        cpu_ms_per_text=cpu_time / len(texts) * 1000,
+    )
+
+
+def worker(args: argparse.Namespace) -> None:
+    """Benchmark a single classifier and concurrency, printing the results as
+    JSON."""
+    from classifiers import BaseClassifier
+    from sdgclassification.benchmark import Benchmark
+
+    # Use the unique benchmark texts, in order
+    df = Benchmark(predict_sdgs=lambda text: []).df
+    texts = list(dict.fromkeys(df["text"]))[: args.texts]
+
+    Classifier = BaseClassifier.load(args.worker)
+    classifier = Classifier(args.config, concurrency=args.concurrency[0])
+
+    cold = measure(classifier, texts)
+    warm = measure(classifier, texts)
+
+    # Peak resident memory of this process (in KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+    print(json.dumps(dict(cold=cold, warm=warm, peak_memory_mb=peak_mb)))
+
+
+def get_git_commit() -> str | None:
+    """Get the commit that the benchmark was run on, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+    """Compare the report with a baseline report and print the changes.
+
+    Returns: Whether any run got worse by more than the tolerance"""
+    # Metrics to compare and whether higher values are better
+    metrics = [
+        ("cold", "cpu_ms_per_text", False),
+        ("warm", "cpu_ms_per_text", False),
+        ("warm", "texts_per_second", True),
+    ]
+    before = {(r["classifier"], r["concurrency"]): r for r in baseline["runs"]}
+
+    rows, regressed = [], False
+    for run in report["runs"]:
+        previous = before.get((run["classifier"], run["concurrency"]))
+        if previous is None or "error" in run or "error" in previous:
+            continue
+
+        for name, metric, higher_is_better in metrics:
+            old, new = previous[name][metric], run[name][metric]
+            change = (new - old) / old if old else 0.0
+            worse = -change if higher_is_better else change
+            regressed |= worse > tolerance
+            rows.append(
+                [
+                    run["classifier"],
+                    run["concurrency"],
+                    f"{name} {metric}",
+                    old,
+                    new,
+                    f"{change:+.1%}" + (" REGRESSION" if worse > tolerance else ""),
+                ]
+            )
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "Classifier",
+                "Concurrency",
+                "Metric",
+                "Baseline",
+                "New",
+                "Change",
+            ],
+            tablefmt="psql",
+            floatfmt=".2f",
+        )
+    )
+    return regressed
+
+
+def main(args: argparse.Namespace) -> None:
+    classifiers = args.classifier or Registry().names()
+    server, base_url = start_server(args)
+
+    runs = []
+    try:
+        for classifier in classifiers:
+            for concurrency in args.concurrency:
+                print(f"Benchmarking {classifier} (concurrency {concurrency})")
+                result = run_worker(args, classifier, concurrency, base_url)
+                runs.append(
+                    dict(classifier=classifier, concurrency=concurrency, **result)
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+    # Save machine-readable report
+    report = dict(
+        date=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        commit=get_git_commit(),
+        python=platform.python_version(),
+        server=dict(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rpm=args.rpm,
+        ),
+        config=args.config,
+        runs=runs,
+    )
+    args.output.write_text(json.dumps(report, indent=4) + "\n")
+
+    # Print summary
+    rows = []
+    for run in runs:
+        if "error" in run:
+            rows.append(
+                [run["classifier"], run["concurrency"], f"error: {run['error']}"]
+            )
+            continue
+
+        for name in ["cold", "warm"]:
+            data = run[name]
+            rows.append(
+                [
+                    run["classifier"],
+                    run["concurrency"],
+                    name,
+                    data["texts_per_second"],
+                    data["latency_p50_ms"],
+                    data["latency_p95_ms"],
+                    data["latency_p99_ms"],
+                    data["cache_hit_rate"] * 100,
+                    data["retries"],
+                    data["cpu_ms_per_text"],
+                    run["peak_memory_mb"],
+                ]
+            )
+
+    print(
+        tabulate(
+            rows,
+            headers=[
+                "Classifier",
+                "Concurrency",
+                "Cache",
+                "Texts/s",
+                "p50 (ms)",
+                "p95 (ms)",
+                "p99 (ms)",
+                "Cache hits (%)",
+                "Retries",
+                "CPU/text (ms)",
+                "Peak memory (MB)",
+            ],
+            tablefmt="psql",
+            floatfmt=".1f",
+        )
+    )
+    print(f"Saved report to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if compare(report, baseline, args.tolerance):
+            exit(1)
+
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(
+    description="Benchmark classifier throughput and latency against a mock server"
+)
+parser.add_argument(
+    "classifier",
+    type=str,
+    nargs="*",
+    help="classifiers to benchmark (defaults to all)",
+)
+parser.add_argument("--config", type=int, default=1, help="configuration to use")
+parser.add_argument(
+    "--concurrency",
+    type=int,
+    nargs="+",
+    default=[1, 8, 32],
+    help="concurrency levels to benchmark",
+)
+parser.add_argument(
+    "--texts", type=int, default=200, help="number of benchmark texts to classify"
+)
+parser.add_argument(
+    "--latency", type=float, default=0.1, help="seconds for the server to respond"
+)
+parser.add_argument(
+    "--jitter", type=float, default=0.05, help="maximum deviation from the latency"
+)
+parser.add_argument(
+    "--error-rate",
+    type=float,
+    default=0,
+    help="share of requests that fail with a server error",
+)
+parser.add_argument(
+    "--rpm", type=float, help="requests per minute before the server rate limits"
+)
+parser.add_argument(
+    "--output",
+    type=Path,
+    default=Path("perfbench.json"),
+    help="path of the JSON report (default = perfbench.json)",
+)
+parser.add_argument(
+    "--baseline", type=Path, help="earlier report to compare the results with"
+)
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=0.2,
+    help="relative change that counts as a regression (default = 0.2)",
+)
+parser.add_argument("--worker", type=str, help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+if args.worker:
+    worker(args)
+else:
+    main(args)
@@ -0,0 +1,108 @@
+"""Report what the embedding pre-filter costs in recall on the benchmark.
+
+For each threshold, reports how many texts would be skipped (and thus how many
+LLM requests would be saved) and how many relevant texts would be lost:
+
+```
+python scripts/prefilter_report.py --thresholds 0.2 0.25 0.3 0.35
+```
+
+Pass --export to save the embeddings of all benchmark texts to a file, which
+can then be used offline with `embeddings="file:embeddings.npz"`.
+"""
+
+import sys
+from pathlib import Path
+
+# Make the modules of the parent folder accessible to the scripts
+# See: https://stackoverflow.com/a/27876800/6451879
+sys.path.append(str(Path(__file__).absolute().parent.parent))
+
+import argparse
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from classifiers.core import Cache, Embeddings, PreFilter
+from sdgclassification.benchmark import Benchmark
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(
+    description="Report the recall cost of the embedding pre-filter"
+)
+parser.add_argument(
+    "--embeddings",
+    type=str,
+    default=PreFilter.DEFAULT_EMBEDDINGS,
+    help=f"embedding model to use (default = {PreFilter.DEFAULT_EMBEDDINGS})",
+)
+parser.add_argument(
+    "--thresholds",
+    type=float,
+    nargs="+",
+    default=[0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4],
+    help="similarity thresholds to report on",
+)
+parser.add_argument(
+    "--sdg",
+    type=int,
+    nargs="*",
+    help="select the SDGs to benchmark against (defaults to all)",
+)
+parser.add_argument(
+    "--export",
+    type=Path,
+    help="save the embeddings of all benchmark texts to this file (.npz)",
+)
+args = parser.parse_args()
+
+# Load benchmark texts
+kwargs = dict()
+if args.sdg is not None:
+    kwargs["sdgs"] = args.sdg
+df = Benchmark(predict_sdgs=lambda text: [], **kwargs).df
+texts = df["text"].unique().tolist()
+
+# Score each unique text against each SDG
+cache = Cache.from_env(default_directory=Path(".cache"))
+embeddings = Embeddings.from_spec(args.embeddings, cache=cache)
+prefilter = PreFilter(embeddings, threshold=0)
+print(f"Scoring {len(texts)} unique texts with {embeddings.model}")
+scores = pd.DataFrame(prefilter.score(texts), index=texts, columns=prefilter.sdgs)
+
+# Similarity of each benchmark row to its SDG and to the closest SDG
+row_scores = scores.loc[df["text"]].to_numpy()
+sdg_index = scores.columns.get_indexer(pd.Index(df["sdg"]))
+sdg_score = row_scores[np.arange(len(df)), sdg_index]
+max_score = row_scores.max(axis=1)
+relevant = df["label"].to_numpy(dtype=bool)
+
+rows = []
+for threshold in args.thresholds:
+    passed = scores.max(axis=1) >= threshold
+    rows.append(
+        {
+            "Threshold": threshold,
+            "Texts skipped (%)": (1 - passed.mean()) * 100,
+            "Recall (%)": (max_score[relevant] >= threshold).mean() * 100,
+            "Candidate recall (%)": (sdg_score[relevant] >= threshold).mean() * 100,
+            "Relevant rows lost": int((max_score[relevant] < threshold).sum()),
+        }
+    )
+
+print(
+    "Recall: share of relevant benchmark rows whose text passes the filter\n"
+    "Candidate recall: share of relevant rows whose SDG is a candidate"
+)
+print(
+    tabulate(
+        rows,
+        headers="keys",
+        tablefmt="psql",
+        showindex=False,
+        floatfmt=(".2f", ".2f", ".2f", ".2f", ".0f"),
+    )
+)
+
+if args.export:
+    embeddings.save(args.export, texts + PreFilter.get_sources())
+    print(f"Saved embeddings to {args.export}")
@@ -0,0 +1,57 @@
+"""Query the index of all runs (see RunIndex).
+
+Show the best configuration of each classifier, including archived ones:
+
+```
+python scripts/runs.py leaderboard --archived
+```
+
+Show all runs of a classifier, by date:
+
+```
+python scripts/runs.py history chatgpt_sdgs
+```
+"""
+
+import sys
+from pathlib import Path
+
+# Make the modules of the parent folder accessible to the scripts
+# See: https://stackoverflow.com/a/27876800/6451879
+sys.path.append(str(Path(__file__).absolute().parent.parent))
+
+import argparse
+from tabulate import tabulate
+from classifiers import RunIndex
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Query the index of all runs")
+subparsers = parser.add_subparsers(dest="command", required=True)
+leaderboard_parser = subparsers.add_parser(
+    "leaderboard", help="accuracy of the best run of each classifier"
+)
+leaderboard_parser.add_argument(
+    "--archived", action="store_true", help="include archived classifiers"
+)
+best_parser = subparsers.add_parser(
+    "best", help="best configuration of each classifier"
+)
+best_parser.add_argument(
+    "--archived", action="store_true", help="include archived classifiers"
+)
+history_parser = subparsers.add_parser("history", help="all runs of a classifier")
+history_parser.add_argument("classifier", type=str)
+args = parser.parse_args()
+
+# Bring the index up to date
+index = RunIndex()
+index.sync()
+
+if args.command == "leaderboard":
+    df = index.leaderboard(archived=args.archived).dropna(how="all", axis=1).round(1)
+elif args.command == "best":
+    df = index.best_runs(archived=args.archived).drop(columns=["directory"])
+else:
+    df = index.history(args.classifier)
+
+print(tabulate(df.to_dict("records"), headers="keys", tablefmt="psql"))
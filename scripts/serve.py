@@ -0,0 +1,291 @@
+"""Classification service that keeps classifiers warm between requests.
+
+Starting `evaluate.py` (or any other script) for every job means paying for
+interpreter startup, imports, opening the cache and creating the OpenAI client
+each time. The service does this once: it loads the classifiers when it starts
+and then classifies texts over HTTP. All requests share one cache per cache
+directory and one connection pool per provider.
+
+```
+python scripts/serve.py --port 8080
+```
+
+Classify a single text (responds with JSON):
+
+```
+curl localhost:8080/classify -d '{"classifier": "chatgpt_sdgs", "config": 3, "text": "..."}'
+```
+
+Classify several texts (streams one line of JSON per text, as NDJSON, in order
+of completion):
+
+```
+curl localhost:8080/classify -d '{"classifier": "chatgpt_sdgs", "texts": ["...", "..."]}'
+```
+
+Each result contains the SDGs and the usage of the requests made for the text
+(see `Usage`). Results of several texts also contain the index of the text.
+`GET /classifiers` lists the classifiers and their configurations.
+"""
+
+import sys
+from pathlib import Path
+
+# Make the modules of the parent folder accessible to the scripts
+# See: https://stackoverflow.com/a/27876800/6451879
+sys.path.append(str(Path(__file__).absolute().parent.parent))
+
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from classifiers import BaseClassifier, Registry, Router
+from classifiers.core import Cache, ClassifierInfo
+
+from typing import Any, Iterable
+
+
+class ClassifierPool:
+    """Classifier instances by classifier and config, created once and reused."""
+
+    registry: Registry
+    classifiers: dict[tuple[str, int], BaseClassifier]
+
+    # Caches by directory, shared by all classifiers that use the directory
+    caches: dict[Path, Cache]
+
+    def __init__(self, registry: Registry) -> None:
+        self.registry = registry
+        self.classifiers = {}
+        self.caches = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str, config: int) -> BaseClassifier:
+        """Get the classifier with the given config, loading it if needed.
+
+        Args:
+            name: Name of the classifier
+            config: The index of the configuration (starting at 1)
+
+        Returns: Classifier
+
+        Raises:
+            LookupError: When the classifier does not exist
+            ValueError: When the config does not exist"""
+        with self.lock:
+            if (name, config) not in self.classifiers:
+                info = self.registry.get(name)
+                if info is None:
+                    raise LookupError(f"Classifier {name} does not exist")
+
+                # Validate the config before importing the classifier
+                info.configurations.get_config(config)
+
+                Classifier = info.load()
+                self.classifiers[(name, config)] = Classifier(
+                    config, cache=self.get_cache(info)
+                )
+
+            return self.classifiers[(name, config)]
+
+    def get_cache(self, info: ClassifierInfo) -> Cache:
+        """Get the cache of the classifier, shared with other classifiers that
+        use the same directory."""
+        cache = Cache.from_env(default_directory=info.directory.joinpath(".cache"))
+        directory = Path(cache.directory).absolute()
+
+        if directory in self.caches:
+            cache.close()
+        else:
+            self.caches[directory] = cache
+
+        return self.caches[directory]
+
+    def warm(self, names: Iterable[str]) -> None:
+        """Load all configurations of the given classifiers.
+
+        Args:
+            names: Names of the classifiers"""
+        for name in names:
+            info = self.registry.get(name)
+            if info is None:
+                raise LookupError(f"Classifier {name} does not exist")
+
+            for config in range(1, len(info.configurations) + 1):
+                self.get(name, config)
+
+
+class ClassificationServer(ThreadingHTTPServer):
+    """HTTP server that classifies texts with warm classifiers."""
+
+    daemon_threads = True
+
+    pool: ClassifierPool
+
+    def __init__(self, host: str, port: int, pool: ClassifierPool) -> None:
+        """Initialize the server.
+
+        Args:
+            host: Host to bind to
+            port: Port to bind to (0 = pick a free port)
+            pool: Classifiers to classify texts with"""
+        super().__init__((host, port), ClassificationRequestHandler)
+        self.pool = pool
+
+    def list_classifiers(self) -> list[dict]:
+        """List the classifiers and their configurations."""
+        return [
+            dict(
+                name=info.name,
+                configurations=[
+                    dict(config=i + 1, **c) for i, c in enumerate(info.configurations)
+                ],
+                loaded=[
+                    config
+                    for name, config in list(self.pool.classifiers)
+                    if name == info.name
+                ],
+            )
+            for info in self.pool.registry.all()
+        ]
+
+
+class ClassificationRequestHandler(BaseHTTPRequestHandler):
+    server: ClassificationServer
+
+    # Keep connections alive, so that clients can send many requests
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        path = self.path.rstrip("/")
+
+        if path == "/health":
+            self.send_json(200, dict(status="ok"))
+        elif path == "/classifiers":
+            self.send_json(200, dict(classifiers=self.server.list_classifiers()))
+        else:
+            self.send_json(404, dict(error=f"{self.path} not found"))
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+
+        if self.path.rstrip("/") != "/classify":
+            return self.send_json(404, dict(error=f"{self.path} not found"))
+
+        try:
+            request = json.loads(data or b"{}")
+            classifier = self.server.pool.get(
+                request["classifier"], int(request.get("config", 1))
+            )
+        except KeyError as e:
+            return self.send_json(400, dict(error=f"Invalid request: no {e}"))
+        except LookupError as e:
+            return self.send_json(404, dict(error=str(e)))
+        except (ValueError, TypeError) as e:
+            return self.send_json(400, dict(error=f"Invalid request: {e}"))
+
+        if "texts" in request:
+            texts = request["texts"]
+            if not isinstance(texts, list) or not all(
+                isinstance(text, str) for text in texts
+            ):
+                error = "Invalid request: texts must be a list of strings"
+                return self.send_json(400, dict(error=error))
+            self.stream_results(classifier, texts)
+        elif "text" in request:
+            if not isinstance(request["text"], str):
+                error = "Invalid request: text must be a string"
+                return self.send_json(400, dict(error=error))
+            self.send_result(classifier, request["text"])
+        else:
+            self.send_json(400, dict(error="Invalid request: no text or texts"))
+
+    def send_result(self, classifier: BaseClassifier, text: str) -> None:
+        """Classify a single text and respond with its result."""
+        try:
+            for _, sdgs, usage in classifier.classify_with_usage([text]):
+                self.send_json(200, dict(sdgs=sdgs, usage=usage.to_dict()))
+        except Exception as e:
+            self.send_json(500, dict(error=f"{type(e).__name__}: {e}"))
+
+    def stream_results(self, classifier: BaseClassifier, texts: list[str]) -> None:
+        """Classify the texts and stream each result as soon as it completes.
+
+        Each text is only classified once, even if it is given several times.
+        A classification error ends the stream with a line with the error."""
+        indices: dict[str, list[int]] = {}
+        for index, text in enumerate(texts):
+            indices.setdefault(text, []).append(index)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for text, sdgs, usage in classifier.classify_with_usage(indices):
+                lines = [
+                    dict(index=index, sdgs=sdgs, usage=usage.to_dict())
+                    for index in indices[text]
+                ]
+                self.send_chunk("".join(json.dumps(line) + "\n" for line in lines))
+        except ConnectionError:
+            # The client went away, which also stops the classification
+            return
+        except Exception as e:
+            error = dict(error=f"{type(e).__name__}: {e}")
+            self.send_chunk(json.dumps(error) + "\n")
+
+        # Last chunk
+        self.send_chunk("")
+
+    def send_chunk(self, content: str) -> None:
+        data = content.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Do not log every request
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(
+        description="Serve LLM classifiers over HTTP, keeping them warm"
+    )
+    parser.add_argument(
+        "classifier",
+        type=str,
+        nargs="*",
+        help="classifiers to load at startup (defaults to all)",
+    )
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    registry = Registry()
+    pool = ClassifierPool(registry)
+
+    # Load the classifiers (and connect to the providers) up front, so that the
+    # first requests do not have to wait for them
+    pool.warm(args.classifier or registry.names())
+    Router.get().connect()
+
+    server = ClassificationServer(args.host, args.port, pool)
+    print(f"Serving {len(pool.classifiers)} classifier configurations")
+    print(f"Listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,273 @@
+"""Evaluate a classifier with several workers, on one machine or on several.
+
+The benchmark texts are put into a queue (see `WorkQueue`), split into shards.
+Any number of workers then claim the shards and classify their texts. When all
+shards are done, the predictions are merged into a single run, exactly as if
+the evaluation had been run by `evaluate.py`.
+
+```
+python scripts/shard.py enqueue chatgpt_sdgs --config 3 --shards 16
+
+# On each machine (or several times on one machine)
+python scripts/shard.py work chatgpt_sdgs --config 3
+
+python scripts/shard.py status chatgpt_sdgs --config 3
+python scripts/shard.py merge chatgpt_sdgs --config 3
+```
+
+By default, the queue is stored in the .queue folder of the classifier. To use
+workers on several machines, pass the same --queue path on a shared file system
+to every command.
+
+A worker that crashes or stops making progress loses its shard when its lease
+expires (--lease, 300 seconds by default) and another worker picks it up. Texts
+that were classified before are not classified again. Shards that fail five
+times are marked as failed. Run `retry` to queue them again.
+"""
+
+import sys
+from pathlib import Path
+
+# Make the modules of the parent folder accessible to the scripts
+# See: https://stackoverflow.com/a/27876800/6451879
+sys.path.append(str(Path(__file__).absolute().parent.parent))
+
+import os
+import time
+import socket
+import argparse
+import subprocess
+from classifiers import Registry, WorkQueue
+from classifiers.core import ClassifierInfo
+
+ROOT = Path(__file__).absolute().parent.parent
+
+
+def get_queue(info: ClassifierInfo, args: argparse.Namespace) -> WorkQueue:
+    """Get the queue of the classifier and config.
+
+    Returns: The queue (which may not have been created yet)"""
+    path = args.queue
+    if path is None:
+        identifier = info.configurations.get_config(args.config).get_identifier()
+        path = info.directory.joinpath(".queue", f"{identifier}.sqlite")
+
+    return WorkQueue(path, lease=args.lease)
+
+
+def print_status(queue: WorkQueue) -> None:
+    """Print the progress of the shards and their errors."""
+    classified, total = queue.count_texts()
+    status = queue.status()
+    print(f"Texts: {classified}/{total} classified")
+    print("Shards: " + ", ".join(f"{n} {name}" for name, n in status.items()))
+
+    for shard, error in queue.errors().items():
+        print(f"Shard {shard}: {error}")
+
+
+def enqueue(info: ClassifierInfo, queue: WorkQueue, args: argparse.Namespace) -> None:
+    from sdgclassification.benchmark import Benchmark
+
+    if queue.path.exists() and not args.restart:
+        print(f"Queue {queue.path} already exists. Pass --restart to replace it.")
+        exit(1)
+
+    kwargs = dict()
+    if args.sdg is not None:
+        kwargs["sdgs"] = args.sdg
+
+    df = Benchmark(predict_sdgs=lambda text: [], **kwargs).df
+    queue.create(
+        df["text"],
+        shards=args.shards,
+        classifier=info.name,
+        config=args.config,
+        sdgs=args.sdg,
+    )
+    print(f"Queued {queue.count_texts()[1]} unique texts in {args.shards} shards")
+    print(f"Queue: {queue.path}")
+
+
+def work(info: ClassifierInfo, queue: WorkQueue, args: argparse.Namespace) -> None:
+    from classifiers import Scheduler
+
+    Scheduler.configure(rpm=args.rpm, tpm=args.tpm)
+    Classifier = info.load()
+    classifier = Classifier(
+        args.config, concurrency=args.concurrency, stream=args.stream or None
+    )
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {worker} started")
+
+    while not queue.is_done():
+        shard = queue.claim(worker)
+        if shard is None:
+            # Other workers hold the remaining shards. Wait in case one of them
+            # stalls, unless only failed shards are left.
+            if queue.status()["leased"] == 0:
+                break
+            time.sleep(args.poll)
+            continue
+
+        texts = queue.get_missing_texts(shard)
+        print(f"Classifying {len(texts)} texts of shard {shard.id}")
+        try:
+            for text, sdgs, usage in classifier.classify_with_usage(texts):
+                if not queue.add(shard, text, sdgs, usage):
+                    print(f"Lost the lease of shard {shard.id}")
+                    break
+            else:
+                queue.complete(shard)
+        except KeyboardInterrupt:
+            queue.release(shard, "Worker was interrupted")
+            raise
+        except Exception as e:
+            print(f"Shard {shard.id} failed: {type(e).__name__}: {e}")
+            queue.release(shard, f"{type(e).__name__}: {e}")
+
+    print_status(queue)
+
+
+def merge(info: ClassifierInfo, queue: WorkQueue, args: argparse.Namespace) -> None:
+    from classifiers import Predictions, Run
+
+    if not queue.is_done():
+        print("Not all shards are done yet.")
+        print_status(queue)
+        exit(1)
+
+    # Add the predictions to the checkpoint of the config, so that evaluate.py
+    # finds all texts classified and only needs to run the benchmark
+    config = info.configurations.get_config(args.config)
+    predictions = Predictions(Run.checkpoint_path(config, info.runs_directory))
+    try:
+        for text, sdgs, usage in queue.get_predictions():
+            predictions.add(text, sdgs, usage)
+    finally:
+        predictions.close()
+
+    selected_sdgs = queue.get_meta().get("sdgs")
+    command = [sys.executable, str(ROOT.joinpath("scripts", "evaluate.py"))]
+    command += [info.name, "--config", str(args.config), "--resume"]
+    if selected_sdgs is not None:
+        command += ["--sdg", *map(str, selected_sdgs)]
+
+    process = subprocess.run(command, cwd=ROOT)
+    if process.returncode != 0:
+        exit(process.returncode)
+
+    # The run has been stored, so the queue is no longer needed
+    queue.path.unlink()
+
+
+def status(info: ClassifierInfo, queue: WorkQueue, args: argparse.Namespace) -> None:
+    print_status(queue)
+
+
+def retry(info: ClassifierInfo, queue: WorkQueue, args: argparse.Namespace) -> None:
+    print(f"Queued {queue.retry_failed()} failed shards again")
+
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(
+    description="Evaluate LLM classifier against benchmark with several workers"
+)
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+commands = dict(
+    enqueue=(enqueue, "split the benchmark texts into shards"),
+    work=(work, "classify the texts of shards until all are done"),
+    status=(status, "show the progress of the shards"),
+    retry=(retry, "queue failed shards again"),
+    merge=(merge, "store the predictions of all shards as a run"),
+)
+for name, (_, description) in commands.items():
+    subparser = subparsers.add_parser(name, help=description)
+    subparser.add_argument("classifier", type=str)
+    subparser.add_argument("--config", type=int, default=1)
+    subparser.add_argument(
+        "--queue",
+        type=Path,
+        help="path of the queue, which must be the same for all commands "
+        "(default = .queue folder of the classifier)",
+    )
+    subparser.add_argument(
+        "--lease",
+        type=float,
+        help="seconds after which the shard of a worker without progress is "
+        f"given to another worker (default = {WorkQueue.LEASE:.0f})",
+    )
+
+subparsers.choices["enqueue"].add_argument(
+    "--shards", type=int, default=16, help="number of shards (default = 16)"
+)
+subparsers.choices["enqueue"].add_argument(
+    "--sdg",
+    type=int,
+    nargs="*",
+    help="select the SDGs to benchmark against (defaults to all)",
+)
+subparsers.choices["enqueue"].add_argument(
+    "--restart",
+    action="store_true",
+    help="replace the queue if it exists, discarding its predictions",
+)
+subparsers.choices["work"].add_argument(
+    "--concurrency",
+    type=int,
+    help="maximum number of texts to classify in parallel",
+)
+subparsers.choices["work"].add_argument(
+    "--rpm",
+    type=float,
+    help="maximum number of requests per minute to send to the model",
+)
+subparsers.choices["work"].add_argument(
+    "--tpm",
+    type=float,
+    help="maximum number of tokens per minute to send to the model",
+)
+subparsers.choices["work"].add_argument(
+    "--stream",
+    action="store_true",
+    help="stream responses and stop them as soon as the answer is complete",
+)
+subparsers.choices["work"].add_argument(
+    "--poll",
+    type=float,
+    default=10,
+    help="seconds to wait for shards held by other workers (default = 10)",
+)
+args = parser.parse_args()
+
+info = Registry().get(args.classifier)
+if info is None:
+    print(f"Classifier {args.classifier} does not exist.")
+    exit(1)
+
+try:
+    queue = get_queue(info, args)
+except ValueError as e:
+    print(e)
+    exit(1)
+
+if args.command != "enqueue" and not queue.path.exists():
+    print(f"Queue {queue.path} does not exist. Run enqueue first.")
+    exit(1)
+
+if args.command != "enqueue":
+    meta = queue.get_meta()
+    if (meta["classifier"], meta["config"]) != (info.name, args.config):
+        print(
+            f"Queue {queue.path} is for {meta['classifier']} "
+            f"(config {meta['config']})."
+        )
+        exit(1)
+
+try:
+    commands[args.command][0](info, queue, args)
+except KeyboardInterrupt:
+    print("\nInterrupted.")
+    exit(1)
@@ -0,0 +1,163 @@
+"""Tune a decision threshold for each SDG on the scores of a run, offline.
+
+Runs evaluated with --scores store a confidence score for each SDG and text
+(see `BaseClassifier.score`). An SDG is predicted for a text if its score is at
+least the SDG's threshold. For each SDG, this script tries every threshold
+between the scores of its benchmark texts, picks the best one and recomputes
+the stats, without making any requests:
+
+```
+python scripts/evaluate.py chatgpt_sdgs --config 1 --scores
+python scripts/tune_thresholds.py chatgpt_sdgs --config 1 --write
+```
+
+The thresholds are tuned on the benchmark itself, so the tuned stats are an
+optimistic estimate. Pass --write to store the thresholds (thresholds.json)
+and the tuned stats (stats.csv) in the tuned/ folder of the run.
+"""
+
+import sys
+from pathlib import Path
+
+# Make the modules of the parent folder accessible to the scripts
+# See: https://stackoverflow.com/a/27876800/6451879
+sys.path.append(str(Path(__file__).absolute().parent.parent))
+
+import json
+import time
+import argparse
+import numpy as np
+from tabulate import tabulate
+from classifiers import Registry, Run
+from sdgclassification.benchmark import Stats
+from sdgclassification.benchmark.Metrics import Metrics, ConfusionMatrix
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(
+    description="Tune a decision threshold for each SDG on the scores of a run"
+)
+parser.add_argument("classifier", type=str)
+parser.add_argument(
+    "--config", type=int, default=1, help="configuration of the run (default = 1)"
+)
+parser.add_argument(
+    "--metric",
+    type=str,
+    choices=["f1", "accuracy"],
+    default="f1",
+    help="metric to maximize for each SDG (default = f1)",
+)
+parser.add_argument(
+    "--write",
+    action="store_true",
+    help="store the thresholds and the tuned stats in the tuned/ folder of the run",
+)
+args = parser.parse_args()
+
+info = Registry().get(args.classifier)
+if info is None:
+    print(f"Classifier {args.classifier} does not exist.")
+    exit(1)
+
+config = info.configurations.get_config(args.config)
+run = Run.load(config, info.runs_directory)
+if run is None:
+    print(f"Config {args.config} of {args.classifier} has no run.")
+    exit(1)
+
+results = run.results
+if "scores" not in results or results["scores"].isna().any():
+    print("The run has no scores. Evaluate it again with --scores.")
+    exit(1)
+
+# Score of each benchmark row for its SDG
+sdgs = results["sdg"].to_numpy(dtype=int)
+expected = results["expected_label"].to_numpy(dtype=bool)
+scores = np.array(results["scores"].tolist(), dtype=float)
+row_scores = scores[np.arange(len(results)), sdgs - 1]
+
+started_at = time.perf_counter()
+thresholds: dict[int, float] = {}
+matrices: list[ConfusionMatrix] = []
+for sdg in range(1, 18):
+    mask = sdgs == sdg
+    sdg_scores, sdg_expected = row_scores[mask], expected[mask]
+    if not mask.any():
+        matrices.append(ConfusionMatrix(tp=0, fp=0, tn=0, fn=0))
+        continue
+
+    # Candidates lie halfway between neighboring scores, plus the extremes of
+    # predicting the SDG for every text and for none
+    values = np.unique(sdg_scores)
+    candidates = np.concatenate(
+        [[0.0], (values[:-1] + values[1:]) / 2, [np.nextafter(values[-1], np.inf)]]
+    )
+
+    # Confusion matrix of every candidate at once (rows x candidates)
+    predicted = sdg_scores[:, None] >= candidates[None, :]
+    tp = (predicted & sdg_expected[:, None]).sum(axis=0)
+    fp = (predicted & ~sdg_expected[:, None]).sum(axis=0)
+    fn = sdg_expected.sum() - tp
+    tn = (~sdg_expected).sum() - fp
+
+    if args.metric == "f1":
+        metric = np.divide(
+            2 * tp, 2 * tp + fp + fn, out=np.zeros(len(tp)), where=tp > 0
+        )
+    else:
+        metric = (tp + tn) / mask.sum()
+
+    best = int(np.argmax(metric))
+    thresholds[sdg] = float(candidates[best])
+    matrices.append(
+        ConfusionMatrix(
+            tp=int(tp[best]), fp=int(fp[best]), tn=int(tn[best]), fn=int(fn[best])
+        )
+    )
+elapsed = time.perf_counter() - started_at
+
+# Tuned stats, with the usage of the run (the requests are the same)
+tuned = Stats([Metrics.calculate_from_confusion_matrix(m) for m in matrices])
+stats = tuned.to_dataframe()
+usage_columns = [column for column in run.stats.columns if column not in stats]
+
+# The SDGs of the tuned stats are numbers, those read from stats.csv strings
+usage = run.stats.set_index(run.stats["sdg"].astype(str))[usage_columns]
+stats[usage_columns] = usage.reindex(stats["sdg"].astype(str)).to_numpy()
+tuned_run = Run(config=config, date=run.date, stats=stats, usage=run.usage)
+
+# Compare the tuned stats with the stats of the run
+before = run.stats.set_index(run.stats["sdg"].astype(str))
+after = stats.set_index(stats["sdg"].astype(str))
+rows = []
+for sdg in after.index[after["n"] > 0]:
+    rows.append(
+        {
+            "SDG": sdg,
+            "Threshold": thresholds.get(int(sdg)) if sdg.isdigit() else None,
+            "F1 before": before.loc[sdg, "f1"],
+            "F1 after": after.loc[sdg, "f1"],
+            "Accuracy before (%)": before.loc[sdg, "accuracy"],
+            "Accuracy after (%)": after.loc[sdg, "accuracy"],
+        }
+    )
+
+print(f"Tuned {len(thresholds)} thresholds in {elapsed * 1000:.1f} ms")
+print(
+    tabulate(
+        rows,
+        headers="keys",
+        tablefmt="psql",
+        showindex=False,
+        floatfmt=("", ".3f", ".2f", ".2f", ".1f", ".1f"),
+    )
+)
+print(tuned_run.stats_table("psql"))
+
+if args.write:
+    directory = info.runs_directory.joinpath(config.get_identifier(), "tuned")
+    directory.mkdir(exist_ok=True)
+    with open(directory.joinpath("thresholds.json"), "w") as f:
+        json.dump(dict(metric=args.metric, thresholds=thresholds), f, indent=4)
+    stats.to_csv(directory.joinpath("stats.csv"), index=False)
+    print(f"Saved thresholds and stats to {directory}")
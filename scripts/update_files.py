@@ -9,24 +9,33 @@ import os
 import shutil
 import inspect
 import re
+from functools import cache
 import pandas as pd
 from jinja2 import Template, StrictUndefined
 from tabulate import tabulate
-from classifiers import BaseClassifier, Run
+from classifiers import ClassifierInfo, Registry, Run, RunIndex
 
-from typing import Union, Type
+from typing import TYPE_CHECKING, Union, Type
 
+if TYPE_CHECKING:
+    from classifiers import BaseClassifier
 
-def update_files(classifier: Union[BaseClassifier, Type[BaseClassifier]]) -> None:
+
+def update_files(
+    classifier: Union["BaseClassifier", Type["BaseClassifier"], ClassifierInfo],
+) -> None:
     """Re-generates the files for the given classifier.
 
     Re-generates README.md and stats.csv files for the classifier.
     Updates the evaluation table in the main README.md.
 
     Args:
-        classifier: Instance or class of classifier"""
+        classifier: Instance or class of classifier, or its metadata (see
+                    `Registry`), which does not require importing it"""
+    if not isinstance(classifier, ClassifierInfo):
+        classifier = ClassifierInfo.from_class(classifier)
 
-    configurations = classifier.CONFIGURATIONS
+    configurations = classifier.configurations
 
     # Load data from all runs
     runs = [
@@ -34,116 +43,96 @@ def update_files(classifier: Union[BaseClassifier, Type[BaseClassifier]]) -> Non
         for c in configurations
     ]
 
-    # Evaluate data across all runs
-    evaluation = pd.DataFrame(
-        index=[c.get_identifier() for c in configurations],
-        columns=["Configuration", "Average", *[f"SDG {x}" for x in range(1, 18)]],
-    )
-    evaluation["Configuration"] = range(1, len(configurations) + 1)
+    # Evaluate data across all runs: one row per config, one column per SDG
+    ids = [c.get_identifier() for c in configurations]
+    columns = ["Average", *[f"SDG {x}" for x in range(1, 18)]]
+    completed = [r for r in runs if r is not None]
 
-    # Fill in data from completed runs
-    for run in [r for r in runs if r is not None]:
-        id = run.config.get_identifier()
+    if completed:
+        stats_df = pd.concat(
+            [r.stats.assign(id=r.config.get_identifier()) for r in completed]
+        )
 
         # Only consider SDGs with at least one text
-        stats_df = run.stats[run.stats.n > 0]
-        for _, row in stats_df.iterrows():
-            label = row.sdg if row.sdg == "Average" else f"SDG {row.sdg}"
-            evaluation.at[id, label] = row.accuracy
-
-    # Re-order columns
-    evaluation = evaluation[
-        [
-            "Configuration",
-            "Average",
-            *[f"SDG {x}" for x in range(1, 18)],
-        ]
-    ]
+        stats_df = stats_df[stats_df.n > 0]
+        sdg = stats_df.sdg.astype(str)
+        stats_df = stats_df.assign(
+            label=sdg.where(sdg == "Average", "SDG " + sdg),
+        )
+        evaluation = stats_df.pivot(index="id", columns="label", values="accuracy")
+        evaluation = evaluation.reindex(index=ids, columns=columns)
+
+        # Add cost and speed, so that configs can be compared by more than
+        # accuracy (only for runs that recorded their usage)
+        usage = pd.DataFrame(
+            [r.usage for r in completed if r.usage],
+            index=[r.config.get_identifier() for r in completed if r.usage],
+        )
+        if "texts" in usage:
+            evaluation["Cost per 1,000 texts ($)"] = (
+                usage["cost"] / usage["texts"] * 1000
+            ).reindex(ids)
+            evaluation["Seconds per text"] = (
+                usage["latency"] / usage["texts"]
+            ).reindex(ids)
+    else:
+        evaluation = pd.DataFrame(index=ids, columns=columns, dtype=float)
+
+    evaluation.insert(0, "Configuration", range(1, len(configurations) + 1))
 
     # Update stats.csv file
     evaluation.to_csv(classifier.directory.joinpath("stats.csv"), index=False)
 
-    # Cast columns to float types
-    evaluation = evaluation.astype(
-        dtype={
-            "Configuration": int,
-            "Average": float,
-            **{f"SDG {x}": float for x in range(1, 18)},
-        }
-    )
-
-    # Round stats to 1 decimal
-    evaluation = evaluation.round(1)
+    # Round stats to 1 decimal (cost and speed to 3 and 2 decimals)
+    decimals = dict.fromkeys(evaluation.columns, 1)
+    decimals.update({"Cost per 1,000 texts ($)": 3, "Seconds per text": 2})
+    evaluation = evaluation.round(decimals)
 
     # Drop empty columns
     evaluation = evaluation.dropna(how="all", axis=1)
     evaluation_data = evaluation.to_dict("records")
 
     # Update README
-    with open(Path("classifiers", "core", "README.md.jinja"), "r") as f:
-        template = Template(f.read(), undefined=StrictUndefined)
-
-    with open(classifier.directory.joinpath("README.md"), "w") as f:
-        f.write(
-            template.render(
-                classifier=classifier.name,
-                docstring=inspect.cleandoc(
-                    classifier.__doc__ or "No documentation provided."
-                ),
-                parameters=classifier.CONFIGURATIONS.parameters,
-                evaluation_table=tabulate(
-                    evaluation_data, headers="keys", tablefmt="pipe"
-                ),
-                configurations=classifier.CONFIGURATIONS,
-                runs=runs,
-            )
-        )
+    template = load_template(Path("classifiers", "core", "README.md.jinja"))
+    write_if_changed(
+        classifier.directory.joinpath("README.md"),
+        template.render(
+            classifier=classifier.name,
+            docstring=inspect.cleandoc(
+                classifier.docstring or "No documentation provided."
+            ),
+            parameters=classifier.configurations.parameters,
+            evaluation_table=tabulate(evaluation_data, headers="keys", tablefmt="pipe"),
+            configurations=classifier.configurations,
+            runs=runs,
+        ),
+    )
 
     # Clean up old runs
     current_config_ids = [c.get_identifier() for c in configurations]
     for dir in os.scandir(classifier.runs_directory):
+        # Skip checkpoints of evaluations in progress (.checkpoints)
+        if dir.name.startswith("."):
+            continue
         if dir.name not in current_config_ids:
             shutil.rmtree(dir)
 
-    # Update main README
-    stats = []
-    for dir in os.scandir("classifiers"):
-        # Only consider directories
-        if not dir.is_dir():
-            continue
-
-        # Skip folders that do not define a <classifier-name.py> file
-        if not Path(dir.path, dir.name + ".py").exists():
-            continue
-
-        # Skip folders that do not have a stats.csv file
-        if not Path(dir.path, "stats.csv").exists():
-            continue
-
-        # Load stats
-        stats_df = pd.read_csv(Path(dir.path, "stats.csv"))
-
-        # Check if stats are in new format (using averages)
-        if "Average" not in stats_df.columns:
-            print(
-                "Info: Updating README: Skipping",
-                dir.name,
-                "because stats are not yet in new format",
-            )
-            continue
-
-        # Add name (as markdown link)
-        stats_df["Classifier"] = f"[{dir.name}](classifiers/{dir.name}/)"
-
-        # Keep highest accuracy only
-        stats_df = stats_df.sort_values(by=["Average"], ascending=False)
-        stats_df = stats_df.drop(columns=["Configuration"])
+    # Update main README with the best configuration of each classifier
+    index = RunIndex()
+    index.sync()
+    overall_stats_df = index.leaderboard()
 
-        # Combine into dataframe
-        stats.append(stats_df[:1])
+    # Only consider classifiers that define a <classifier-name.py> file
+    overall_stats_df = overall_stats_df[
+        overall_stats_df["Classifier"].isin(Registry().names())
+    ]
 
-    # Combine into overall stats
-    overall_stats_df = pd.concat(stats)
+    # Add name (as markdown link)
+    overall_stats_df = overall_stats_df.assign(
+        Classifier=[
+            f"[{name}](classifiers/{name}/)" for name in overall_stats_df["Classifier"]
+        ]
+    )
 
     # Re-order columns
     overall_stats_df = overall_stats_df[
@@ -184,8 +173,31 @@ def update_files(classifier: Union[BaseClassifier, Type[BaseClassifier]]) -> Non
         flags=re.MULTILINE + re.DOTALL,
     )
 
-    with open("README.md", "w") as f:
-        f.write(readme)
+    write_if_changed(Path("README.md"), readme)
+
+
+@cache
+def load_template(path: Path) -> Template:
+    """Load and compile the template (only once per process).
+
+    Args:
+        path: Path of the template
+
+    Returns: Compiled template"""
+    with open(path, "r") as f:
+        return Template(f.read(), undefined=StrictUndefined)
+
+
+def write_if_changed(path: Path, content: str) -> None:
+    """Write the content to the file, unless the file already contains it.
+
+    Args:
+        path: Path of the file
+        content: Content to write"""
+    if path.exists() and path.read_text() == content:
+        return
+
+    path.write_text(content)
 
 
 if __name__ == "__main__":
@@ -196,7 +208,12 @@ if __name__ == "__main__":
     parser.add_argument("classifier", type=str)
     args = parser.parse_args()
 
-    Classifier = BaseClassifier.load(args.classifier)
-    update_files(Classifier)
+    # Read the classifier's configurations without importing it
+    info = Registry().get(args.classifier)
+    if info is None:
+        print(f"Classifier {args.classifier} does not exist.")
+        exit(1)
+
+    update_files(info)
 
-    print(f"Files for {Classifier.name} updated")
+    print(f"Files for {info.name} updated")
@@ -0,0 +1,133 @@
+import shutil
+import socket
+import threading
+import importlib.util
+from pathlib import Path
+import httpx
+import pytest
+from classifiers import Router, OpenAIProvider
+from classifiers.core.Cache import Cache
+from classifiers.core.clients import get_openai_client
+
+from typing import Any, Callable, Iterator
+
+ROOT = Path(__file__).absolute().parent.parent
+
+# The stub server is a script, so it is loaded from its file
+spec = importlib.util.spec_from_file_location(
+    "mock_server", ROOT.joinpath("scripts", "mock_server.py")
+)
+assert spec is not None and spec.loader is not None
+mock_server_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mock_server_module)
+MockServer = mock_server_module.MockServer
+
+# Messages of a chat completion request that the stub server answers
+MESSAGES = [
+    dict(role="system", content="Classify the text by SDG."),
+    dict(role="user", content="Text: Solar panels for rural schools"),
+]
+
+
+@pytest.fixture
+def mock_server() -> Iterator[Callable[..., Any]]:
+    """Starts stub servers (see scripts/mock_server.py) on free ports.
+
+    Returns: Function that takes the options of `MockServer` and returns the
+             running server"""
+    servers = []
+
+    def start(**options: Any) -> Any:
+        server = MockServer(port=0, **options)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def route_to_mock_server(mock_server: Callable[..., Any]) -> Callable[..., Any]:
+    """Routes the chat completions of all classifiers to a stub server.
+
+    Returns: Function that takes the options of `MockServer` and returns the
+             running server"""
+
+    def start(**options: Any) -> Any:
+        server = mock_server(**options)
+        Router.configure([OpenAIProvider("mock", base_url=server.base_url)])
+        return server
+
+    return start
+
+
+@pytest.fixture
+def openai_server(
+    mock_server: Callable[..., Any], monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Any]:
+    """Stub server that the shared OpenAI client sends its requests to, such
+    as the requests of batch jobs and embeddings."""
+    server = mock_server()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    get_openai_client.cache_clear()
+    yield server
+    get_openai_client.cache_clear()
+
+
+def make_error(cls: type, status: int, headers: dict[str, str] = {}) -> Any:
+    """Create an error of the OpenAI client, as if the API responded with it.
+
+    Args:
+        cls: Error class, such as `openai.RateLimitError`
+        status: Status code of the response
+        headers: Headers of the response
+
+    Returns: Error"""
+    request = httpx.Request("POST", "http://localhost/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    return cls("Error", response=response, body=None)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Cache:
+    """Empty cache for a classifier."""
+    return Cache(tmp_path.joinpath(".cache"))
+
+
+@pytest.fixture
+def repo(tmp_path) -> Path:
+    """Copy of the classifiers and scripts (without runs), which scripts can
+    write runs and files to without changing the repo."""
+    repo = tmp_path.joinpath("repo")
+    ignore = shutil.ignore_patterns(
+        "runs", ".cache", "__pycache__", "archive", "runs.sqlite"
+    )
+    shutil.copytree(
+        ROOT.joinpath("classifiers"), repo.joinpath("classifiers"), ignore=ignore
+    )
+    shutil.copytree(ROOT.joinpath("scripts"), repo.joinpath("scripts"), ignore=ignore)
+    shutil.copy(ROOT.joinpath("README.md"), repo)
+    return repo
+
+
+@pytest.fixture
+def unused_url() -> str:
+    """Base URL of a port that nothing listens on."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+@pytest.fixture(autouse=True)
+def reset_router(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """Use a fresh router in every test and never contact OpenAI."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(Router, "EXPLORATION", 0)
+    Router.configure(None)
+    yield
+    Router.configure(None)
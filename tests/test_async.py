@@ -0,0 +1,55 @@
+import asyncio
+from classifiers import BaseClassifier, Usage
+from classifiers.core.clients import get_openai_client, get_async_openai_client
+from classifiers.chatgpt_sdgs.chatgpt_sdgs import Classifier as ChatGPTSDGs
+
+
+class Classifier(BaseClassifier):
+    """Predicts the length of the text and counts how many texts it
+    classifies at the same time."""
+
+    running = 0
+    peak = 0
+
+    async def aclassify(self, text: str) -> list[int]:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return [len(text)]
+
+
+def test_shares_one_client():
+    assert get_openai_client() is get_openai_client()
+
+
+def test_shares_one_async_client_per_event_loop():
+    async def get_clients():
+        return get_async_openai_client(), get_async_openai_client()
+
+    first, second = asyncio.run(get_clients()), asyncio.run(get_clients())
+
+    assert first[0] is first[1]
+    assert second[0] is second[1]
+    assert first[0] is not second[0]
+
+
+def test_limits_the_concurrency(cache):
+    classifier = Classifier(concurrency=3, cache=cache)
+    texts = ["a" * n for n in range(1, 11)]
+
+    assert asyncio.run(classifier.aclassify_many(texts)) == [[n] for n in range(1, 11)]
+    assert classifier.peak == 3
+
+
+def test_classifies_with_native_async_requests(route_to_mock_server, cache):
+    route_to_mock_server()
+    classifier = ChatGPTSDGs(config=3, cache=cache)
+    texts = ["Solar panels", "Clean water", "Decent work"]
+
+    assert asyncio.run(classifier.aclassify_many(texts)) == [[7]] * 3
+
+    # The sync path answers from the cache that the async path filled
+    with Usage.track() as usage:
+        assert classifier.classify_many(texts) == [[7]] * 3
+    assert usage.cache_hits == 3
@@ -0,0 +1,47 @@
+import pytest
+from classifiers import BatchJob, Usage
+from classifiers.chatgpt_sdgs.chatgpt_sdgs import Classifier
+
+TEXTS = ["Solar panels", "Clean water", "Decent work"]
+
+
+@pytest.fixture
+def classifier(cache) -> Classifier:
+    return Classifier(config=3, cache=cache)
+
+
+def test_fills_the_cache(openai_server, classifier, tmp_path):
+    BatchJob(classifier, state=tmp_path.joinpath("batches.json")).run(TEXTS)
+
+    with Usage.track() as usage:
+        assert classifier.classify_many(TEXTS) == [[7]] * 3
+    assert usage.cache_hits == 3
+    assert len(openai_server.batches) == 1
+
+
+def test_only_collects_requests_that_are_not_cached(
+    openai_server, classifier, tmp_path
+):
+    job = BatchJob(classifier, state=tmp_path.joinpath("batches.json"))
+    job.run(TEXTS[:1])
+
+    requests = job.collect_requests(TEXTS)
+
+    assert len(requests) == 2
+    assert classifier.pending_requests is None
+
+
+def test_resumes_submitted_batches(openai_server, classifier, tmp_path):
+    state = tmp_path.joinpath("batches.json")
+    job = BatchJob(classifier, state=state)
+
+    # The job is interrupted after submitting its batch
+    batch_ids = job.submit(job.collect_requests(TEXTS))
+    assert job.get_submitted() == batch_ids
+
+    BatchJob(classifier, state=state).run(TEXTS)
+
+    # The batch is stored instead of being submitted again
+    assert not state.exists()
+    assert list(openai_server.batches) == batch_ids
+    assert not job.collect_requests(TEXTS)
@@ -0,0 +1,84 @@
+import diskcache
+from classifiers.core.Cache import Cache
+
+
+def test_evicts_the_least_recently_used_entries_from_memory(tmp_path):
+    cache = Cache(tmp_path, memory_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert list(cache._memory) == ["a", "c"]
+
+    # Evicted entries are still on disk and return to memory once read
+    assert cache.get("b") == 2
+    assert list(cache._memory) == ["c", "b"]
+
+
+def test_serves_hits_from_memory(tmp_path):
+    cache = Cache(tmp_path)
+    cache.set("a", 1)
+
+    # Change the entry on disk only
+    diskcache.Cache.set(cache, "a", 2)
+
+    assert cache.get("a") == 1
+    assert Cache(tmp_path).get("a") == 2
+
+
+def test_removes_deleted_entries_from_memory(tmp_path):
+    cache = Cache(tmp_path)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    del cache["b"]
+
+    assert cache.get("a") is None and cache.get("b") is None
+    assert not cache._memory
+
+
+def test_keeps_expiring_entries_on_disk_only(tmp_path):
+    cache = Cache(tmp_path)
+    cache.set("a", 1)
+    cache.set("a", 2, expire=60)
+
+    assert "a" not in cache._memory
+    assert cache.get("a") == 2
+
+
+def test_stores_unhashable_keys_on_disk(tmp_path):
+    cache = Cache(tmp_path)
+    cache.set(("a", [1]), 1)
+
+    assert not cache._memory
+    assert cache.get(("a", [1])) == 1
+
+
+def test_disables_the_memory_tier(tmp_path):
+    cache = Cache(tmp_path, memory_size=0)
+    cache.set("a", 1)
+
+    assert not cache._memory
+    assert cache.get("a") == 1
+
+
+def test_shares_entries_through_the_directory(tmp_path):
+    Cache(tmp_path).set("a", 1)
+
+    assert Cache(tmp_path).get("a") == 1
+
+
+def test_reads_the_settings_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLASSIFIERS_CACHE_DIRECTORY", str(tmp_path / "shared"))
+    monkeypatch.setenv("CLASSIFIERS_CACHE_MEMORY_SIZE", "10")
+    monkeypatch.setenv("CLASSIFIERS_CACHE_SIZE_LIMIT", "1000000")
+    monkeypatch.setenv("CLASSIFIERS_CACHE_EVICTION_POLICY", "least-recently-used")
+
+    cache = Cache.from_env(default_directory=tmp_path / "default")
+
+    assert cache.directory == str(tmp_path / "shared")
+    assert cache.memory_size == 10
+    assert cache.size_limit == 1000000
+    assert cache.eviction_policy == "least-recently-used"
@@ -0,0 +1,74 @@
+import time
+import random
+import threading
+import pytest
+from classifiers import BaseClassifier, ConfigSet, Config, Parameters
+
+
+class Classifier(BaseClassifier):
+    """Predicts the length of the text after a random delay and counts how
+    many texts it classifies at the same time."""
+
+    CONFIGURATIONS = ConfigSet(Parameters(), Config(), Config(concurrency=2))
+
+    def __post_init__(self, configuration: Config) -> None:
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def classify(self, text: str) -> list[int]:
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(random.uniform(0.01, 0.05))
+            if text == "fail":
+                raise ValueError(text)
+            return [len(text)]
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+TEXTS = ["a" * n for n in range(1, 13)]
+
+
+def test_keeps_the_order_of_the_texts(cache):
+    classifier = Classifier(concurrency=4, cache=cache)
+
+    assert classifier.classify_many(TEXTS) == [[n] for n in range(1, 13)]
+    assert classifier.peak == 4
+
+
+def test_classifies_one_text_at_a_time_without_concurrency(cache):
+    classifier = Classifier(concurrency=1, cache=cache)
+
+    assert classifier.classify_many(TEXTS[:3]) == [[1], [2], [3]]
+    assert classifier.peak == 1
+
+
+def test_reads_the_concurrency_from_the_configuration(cache):
+    classifier = Classifier(config=2, cache=cache)
+
+    assert classifier.concurrency == 2
+    classifier.classify_many(TEXTS)
+    assert classifier.peak == 2
+
+
+def test_raises_the_errors_of_classify(cache):
+    classifier = Classifier(concurrency=4, cache=cache)
+
+    with pytest.raises(ValueError):
+        classifier.classify_many(TEXTS[:6] + ["fail"] + TEXTS[6:])
+
+
+def test_classifies_no_texts(cache):
+    assert Classifier(cache=cache).classify_many([]) == []
+
+
+def test_yields_texts_as_they_are_classified(cache):
+    classifier = Classifier(concurrency=4, cache=cache)
+
+    results = list(classifier.classify_as_completed(TEXTS))
+
+    assert sorted(results, key=lambda r: len(r[0])) == [(t, [len(t)]) for t in TEXTS]
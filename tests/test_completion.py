@@ -0,0 +1,107 @@
+import pytest
+from diskcache.core import args_to_key
+from classifiers import BaseClassifier, OpenAIProvider, Usage
+from classifiers.core.BaseClassifier import LEGACY_CHAT_COMPLETIONS_CACHE_NAME
+from classifiers.core.Completion import Completion
+from conftest import MESSAGES
+
+from typing import Any
+
+REQUEST: dict[str, Any] = dict(model="gpt-4o-mini", messages=MESSAGES)
+
+# Request of a classifier that derives confidence scores from logprobs
+LOGPROBS_REQUEST: dict[str, Any] = dict(REQUEST, logprobs=True, top_logprobs=5)
+
+
+@pytest.fixture
+def completion(mock_server) -> Completion:
+    server = mock_server()
+    provider = OpenAIProvider("mock", base_url=server.base_url)
+    return provider.create(**REQUEST)
+
+
+@pytest.fixture
+def logprobs_completion(mock_server) -> Completion:
+    server = mock_server()
+    provider = OpenAIProvider("mock", base_url=server.base_url)
+    return provider.create(**LOGPROBS_REQUEST)
+
+
+def test_keeps_logprobs(logprobs_completion):
+    assert logprobs_completion.content and logprobs_completion.logprobs
+    token, logprob, top_logprobs = logprobs_completion.logprobs[0]
+    assert isinstance(token, str) and logprob <= 0
+    assert len(top_logprobs) == 5
+
+
+def test_round_trips_logprobs(logprobs_completion):
+    response = logprobs_completion.to_chat_completion()
+
+    assert Completion.from_json(logprobs_completion.to_json()) == logprobs_completion
+    assert Completion.from_chat_completion(response) == logprobs_completion
+    logprobs = response.choices[0].logprobs
+    assert logprobs is not None and logprobs.content is not None
+    assert len(logprobs.content[0].top_logprobs) == 5
+
+
+def test_round_trips_through_json(completion):
+    assert Completion.from_json(completion.to_json()) == completion
+
+
+def test_round_trips_through_chat_completion(completion):
+    response = completion.to_chat_completion()
+
+    assert response.choices[0].message.content == completion.content
+    assert response.usage is not None
+    assert response.usage.total_tokens == completion.total_tokens
+    assert Completion.from_chat_completion(response) == completion
+
+
+def test_round_trips_through_the_cache(completion, cache):
+    key = Completion.key(**REQUEST)
+    cache.set(key, completion.to_json())
+    cache._memory.clear()
+
+    assert Completion.from_json(cache.get(key)) == completion
+
+
+def test_keys_depend_on_every_parameter():
+    key = Completion.key(**REQUEST)
+
+    assert key.startswith(f"chat.completions:v{Completion.VERSION}:")
+    assert Completion.key(**REQUEST) == key
+    assert Completion.key(**dict(reversed(REQUEST.items()))) == key
+    assert Completion.key(**REQUEST, temperature=0) != key
+    logprobs_key = Completion.key(**LOGPROBS_REQUEST)
+    assert logprobs_key != key
+    assert Completion.key(**{**LOGPROBS_REQUEST, "top_logprobs": 3}) != logprobs_key
+    assert Completion.key(**{**REQUEST, "messages": MESSAGES[:1]}) != key
+    assert Completion.key(**{**REQUEST, "messages": MESSAGES[::-1]}) != key
+
+
+def test_classifier_answers_from_the_cache(route_to_mock_server, cache):
+    route_to_mock_server()
+    classifier = BaseClassifier(cache=cache)
+
+    with Usage.track() as usage:
+        first = classifier.create_chat_completion(**REQUEST)
+        second = classifier.create_chat_completion(**REQUEST)
+
+    assert (usage.cache_misses, usage.cache_hits) == (1, 1)
+    assert second.choices[0].message.content == first.choices[0].message.content
+
+
+def test_migrates_responses_in_the_old_format(completion, cache):
+    legacy_key = args_to_key(
+        (LEGACY_CHAT_COMPLETIONS_CACHE_NAME,), (), REQUEST, False, ()
+    )
+    cache.set(legacy_key, completion.to_chat_completion())
+    classifier = BaseClassifier(cache=cache)
+
+    with Usage.track() as usage:
+        response = classifier.create_chat_completion(**REQUEST)
+
+    assert usage.cache_hits == 1
+    assert response.choices[0].message.content == completion.content
+    assert cache.get(legacy_key) is None
+    assert cache.get(Completion.key(**REQUEST)) == completion.to_json()
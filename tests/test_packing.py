@@ -0,0 +1,38 @@
+from classifiers import BaseClassifier, ConfigSet, Config, Parameters, Usage
+from classifiers.chatgpt_sdgs.chatgpt_sdgs import Classifier as ChatGPTSDGs
+
+TEXTS = ["Solar panels", "Clean water", "Decent work", "Life below water", "Peace"]
+
+
+def test_groups_texts_into_packs(cache):
+    class Classifier(BaseClassifier):
+        CONFIGURATIONS = ConfigSet(Parameters(), Config(pack_size=2))
+
+    classifier = Classifier(cache=cache)
+
+    assert classifier.pack_size == 2
+    assert classifier.get_packs(TEXTS) == [TEXTS[:2], TEXTS[2:4], TEXTS[4:]]
+
+
+def test_classifies_several_texts_per_request(route_to_mock_server, cache):
+    route_to_mock_server()
+    classifier = ChatGPTSDGs(config=3, concurrency=1, cache=cache)
+    classifier.pack_size = 2
+
+    with Usage.track() as usage:
+        assert classifier.classify_many(TEXTS) == [[7]] * 5
+
+    # Two packs of two texts and a single text
+    assert usage.requests == 3
+
+
+def test_falls_back_to_single_texts(route_to_mock_server, cache):
+    # The response lacks the SDGs of the second text of each pack
+    route_to_mock_server(content='{"1": [3], "sdgs": [4]}')
+    classifier = ChatGPTSDGs(config=3, concurrency=1, cache=cache)
+    classifier.pack_size = 2
+
+    with Usage.track() as usage:
+        assert classifier.classify_many(TEXTS[:2]) == [[4], [4]]
+
+    assert usage.requests == 3
@@ -0,0 +1,72 @@
+import pytest
+from classifiers import Config, Predictions, Run
+
+
+def test_lists_each_missing_text_once():
+    predictions = Predictions()
+    predictions.add("b", [2])
+
+    assert predictions.missing(["a", "b", "a", "c", "c"]) == ["a", "c"]
+
+
+def test_shares_predictions_between_duplicates():
+    predictions = Predictions()
+    texts = ["a", "b", "a"]
+
+    missing = predictions.missing(texts)
+    predictions.update(missing, [[1], [2]])
+
+    assert [predictions.get(text) for text in texts] == [[1], [2], [1]]
+    assert len(predictions) == 2
+    assert "a" in predictions and "c" not in predictions
+    assert predictions.missing(texts) == []
+
+
+def test_raises_for_unclassified_texts():
+    with pytest.raises(KeyError):
+        Predictions().get("a")
+
+
+def test_requires_one_prediction_per_text():
+    with pytest.raises(ValueError):
+        Predictions().update(["a", "b"], [[1]])
+
+
+def test_resumes_from_the_checkpoint(tmp_path):
+    checkpoint = tmp_path.joinpath("checkpoints", "run.jsonl")
+    predictions = Predictions(checkpoint)
+    predictions.update(["a", "b"], [[1], [2]])
+    predictions.close()
+
+    resumed = Predictions(checkpoint)
+
+    assert resumed.missing(["a", "b", "c"]) == ["c"]
+    assert resumed.get("b") == [2]
+
+
+def test_skips_an_incomplete_last_line(tmp_path):
+    checkpoint = tmp_path.joinpath("run.jsonl")
+    predictions = Predictions(checkpoint)
+    predictions.update(["a", "b"], [[1], [2]])
+    predictions.close()
+
+    # The process was killed while writing the second prediction
+    content = checkpoint.read_text()
+    checkpoint.write_text(content[: content.index("\n") + 10])
+
+    resumed = Predictions(checkpoint)
+    assert resumed.missing(["a", "b"]) == ["b"]
+    resumed.add("b", [2])
+    resumed.close()
+
+    assert Predictions(checkpoint).missing(["a", "b"]) == []
+
+
+def test_keeps_checkpoints_outside_of_run_directories(tmp_path):
+    config = Config(model="gpt-4o-mini")
+    checkpoint = Run.checkpoint_path(config, tmp_path)
+    Predictions(checkpoint).close()
+
+    assert checkpoint.exists()
+    assert not tmp_path.joinpath(config.get_identifier()).exists()
+    assert Run.load(config, tmp_path) is None
@@ -0,0 +1,83 @@
+import asyncio
+import numpy as np
+import pytest
+from classifiers import PreFilter, Usage
+from classifiers.core.Completion import Completion
+from classifiers.core.Embeddings import Embeddings
+from classifiers.chatgpt_sdgs.chatgpt_sdgs import Classifier
+
+TEXTS = ["Solar panels for rural schools", "Clean drinking water in cities"]
+
+
+@pytest.fixture
+def prefilter(openai_server, cache) -> PreFilter:
+    # The stub server embeds texts as hashed bags of words
+    embeddings = Embeddings.from_spec("openai:text-embedding-3-small", cache=cache)
+    return PreFilter(embeddings, threshold=0)
+
+
+@pytest.fixture
+def classifier(route_to_mock_server, prefilter, cache) -> Classifier:
+    route_to_mock_server()
+    classifier = Classifier(config=3, concurrency=1, cache=cache)
+    classifier.prefilter = prefilter
+    return classifier
+
+
+def get_top_candidates(prefilter: PreFilter, text: str, count: int) -> list[int]:
+    """Set the threshold so that the text has the given number of candidates."""
+    scores = prefilter.score([text])[0]
+    prefilter.threshold = float(np.sort(scores)[-count])
+    return sorted(np.array(prefilter.sdgs)[scores >= prefilter.threshold].tolist())
+
+
+def is_cached(classifier: Classifier, text: str, candidates: list[int]) -> bool:
+    key = Completion.key(**classifier.get_request(text, candidates=candidates))
+    return classifier.cache.get(key) is not None
+
+
+def test_builds_a_centroid_per_sdg(prefilter):
+    assert prefilter.sdgs == list(range(1, 18))
+    assert np.allclose(np.linalg.norm(prefilter.centroids, axis=1), 1)
+
+
+def test_skips_texts_without_candidates(classifier, prefilter):
+    prefilter.threshold = 1.01
+
+    with Usage.track() as usage:
+        assert classifier.classify_many(TEXTS) == [[], []]
+    assert usage.requests == 0
+
+
+def test_narrows_the_prompt_to_the_candidates(classifier, prefilter):
+    candidates = get_top_candidates(prefilter, TEXTS[0], 3)
+    assert len(candidates) == 3
+
+    assert classifier.classify_many(TEXTS[:1]) == [[7]]
+    assert is_cached(classifier, TEXTS[0], candidates)
+    assert not is_cached(classifier, TEXTS[0], None)
+
+    prompt = classifier.get_request(TEXTS[0], candidates)["messages"][0]["content"]
+    assert prompt.endswith(
+        f"Only the following SDGs may be relevant to the text: "
+        f"{', '.join(map(str, candidates))}. Do not return any other SDGs."
+    )
+
+
+def test_narrows_the_prompt_asynchronously(classifier, prefilter):
+    candidates = get_top_candidates(prefilter, TEXTS[0], 3)
+
+    assert asyncio.run(classifier.aclassify_many(TEXTS[:1])) == [[7]]
+    assert is_cached(classifier, TEXTS[0], candidates)
+
+
+def test_narrows_texts_of_packs_that_fall_back(
+    route_to_mock_server, classifier, prefilter
+):
+    # The response lacks the SDGs of the second text of each pack
+    route_to_mock_server(content='{"1": [3], "sdgs": [4]}')
+    classifier.pack_size = 2
+
+    assert classifier.classify_many(TEXTS) == [[4], [4]]
+    for text, candidates in zip(TEXTS, prefilter.get_candidates(TEXTS)):
+        assert is_cached(classifier, text, candidates)
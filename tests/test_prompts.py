@@ -0,0 +1,50 @@
+import os
+import pytest
+from jinja2 import UndefinedError
+from classifiers.core.Prompts import Prompts
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path.joinpath("prompts.yaml")
+    path.write_text('system: "Classify the text."\nuser: "Texts: {{ texts }}"\n')
+    return path
+
+
+def test_loads_each_file_once(path):
+    assert Prompts.load(path) is Prompts.load(path)
+
+
+def test_reloads_modified_files(path):
+    prompts = Prompts.load(path)
+    path.write_text('system: "Classify the texts."\n')
+    os.utime(path, ns=(prompts.mtime + 10**9, prompts.mtime + 10**9))
+
+    reloaded = Prompts.load(path)
+
+    assert reloaded is not prompts
+    assert reloaded.render("system") == "Classify the texts."
+
+
+def test_renders_cached_prompts_with_the_original_arguments(path):
+    prompts = Prompts.load(path)
+
+    assert prompts.render("user", texts=["a", "b"]) == "Texts: ['a', 'b']"
+    assert prompts.render("user", texts=("a", "b")) == "Texts: ('a', 'b')"
+    assert prompts.render("user", texts=["a", "b"]) == "Texts: ['a', 'b']"
+    assert prompts.render("user", texts={"a": 1}) == "Texts: {'a': 1}"
+
+    info = prompts._render_cached.cache_info()
+    assert (info.hits, info.misses) == (1, 3)
+
+
+def test_renders_unhashable_arguments(path):
+    prompts = Prompts.load(path)
+
+    assert prompts.render("user", texts=bytearray(b"a")) == "Texts: bytearray(b'a')"
+    assert prompts._render_cached.cache_info().currsize == 0
+
+
+def test_rejects_missing_arguments(path):
+    with pytest.raises(UndefinedError):
+        Prompts.load(path).render("user")
@@ -0,0 +1,110 @@
+import sys
+import subprocess
+from pathlib import Path
+import pytest
+from classifiers import Registry, ClassifierInfo
+
+SOURCE = '''
+import module_that_does_not_exist
+
+
+class Classifier(BaseClassifier):
+    """Classifies texts by {model}."""
+
+    CONFIGURATIONS = ConfigSet(
+        Parameters(model="Model", temperature="Temperature"),
+        Config(model="{model}", temperature=1),
+        Config(model="{model}", temperature=0),
+    )
+'''
+
+COMPUTED_SOURCE = '''
+from classifiers import BaseClassifier, ConfigSet, Config, Parameters
+
+MODELS = ["gpt-4o", "gpt-4o-mini"]
+
+
+class Classifier(BaseClassifier):
+    """Classifies texts by each model."""
+
+    CONFIGURATIONS = ConfigSet(
+        Parameters(model="Model"), *[Config(model=model) for model in MODELS]
+    )
+'''
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch) -> Registry:
+    """Registry of classifiers in a package of their own."""
+    root = tmp_path.joinpath("fake_classifiers")
+    for name, source in [
+        ("gpt4o", SOURCE.format(model="gpt-4o")),
+        ("computed", COMPUTED_SOURCE),
+    ]:
+        root.joinpath(name).mkdir(parents=True)
+        root.joinpath(name, f"{name}.py").write_text(source)
+
+    # Not a classifier: no <name>.py file
+    root.joinpath("core").mkdir()
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return Registry(root)
+
+
+def get_models(info: ClassifierInfo) -> list[str]:
+    return [config.model for config in info.configurations]
+
+
+def test_lists_the_classifiers(registry):
+    assert registry.names() == ["computed", "gpt4o"]
+    assert [info.name for info in registry.all()] == ["computed", "gpt4o"]
+    assert registry.get("core") is None
+    assert registry.get("missing") is None
+
+
+def test_reads_the_metadata_without_importing(registry):
+    info = registry.get("gpt4o")
+
+    assert info is not None
+    assert info.module == "fake_classifiers.gpt4o.gpt4o"
+    assert info.directory == Path("fake_classifiers", "gpt4o")
+    assert info.docstring == "Classifies texts by gpt-4o."
+    assert get_models(info) == ["gpt-4o", "gpt-4o"]
+    assert info.configurations.get_config(2).temperature == 0
+    assert info.module not in sys.modules
+
+    # The module can only be imported now
+    with pytest.raises(ModuleNotFoundError):
+        info.load()
+
+
+def test_imports_classifiers_with_computed_configurations(registry):
+    info = registry.get("computed")
+
+    assert info is not None
+    assert get_models(info) == ["gpt-4o", "gpt-4o-mini"]
+    assert info.module in sys.modules
+    assert info.load().__doc__ == info.docstring
+
+
+def test_matches_the_metadata_of_imported_classifiers():
+    for info in Registry().all():
+        imported = ClassifierInfo.from_class(info.load())
+
+        assert (info.name, info.module) == (imported.name, imported.module)
+        assert info.docstring == imported.docstring
+        assert list(info.configurations) == list(imported.configurations)
+
+
+def test_does_not_import_heavy_dependencies():
+    code = (
+        "import sys\n"
+        "from classifiers import Registry\n"
+        "Registry().all()\n"
+        "print(*[m for m in ['openai', 'pandas', 'yaml'] if m in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert output.stdout.strip() == ""
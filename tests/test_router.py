@@ -0,0 +1,116 @@
+import time
+import asyncio
+import pytest
+from classifiers import Router, Provider, OpenAIProvider, Usage
+from openai import BadRequestError, InternalServerError
+from conftest import MESSAGES, make_error
+
+
+def test_fails_over_to_the_next_provider(mock_server, unused_url):
+    server = mock_server()
+    down = OpenAIProvider("down", base_url=unused_url)
+    up = OpenAIProvider("up", base_url=server.base_url)
+    router = Router([down, up])
+
+    with Usage.track() as usage:
+        completion = router.create(model="gpt-4o-mini", messages=MESSAGES)
+
+    assert completion.content
+    assert (down.error_count, up.request_count) == (1, 1)
+    assert usage.retries == 1
+
+    # The provider that failed is tried last from now on
+    assert router.get_providers("gpt-4o-mini") == [up, down]
+
+
+def test_fails_over_asynchronously(mock_server, unused_url):
+    server = mock_server()
+    down = OpenAIProvider("down", base_url=unused_url)
+    up = OpenAIProvider("up", base_url=server.base_url)
+    router = Router([down, up])
+
+    completion = asyncio.run(router.acreate(model="gpt-4o-mini", messages=MESSAGES))
+
+    assert completion.content
+    assert (down.error_count, up.request_count) == (1, 1)
+
+
+def test_raises_when_all_providers_fail(mock_server):
+    server = mock_server(error_rate=1)
+    router = Router([OpenAIProvider("flaky", base_url=server.base_url)])
+
+    with pytest.raises(InternalServerError):
+        router.create(model="gpt-4o-mini", messages=MESSAGES)
+
+
+def test_does_not_fail_over_invalid_requests(mock_server):
+    server = mock_server()
+
+    class InvalidProvider(OpenAIProvider):
+        def create(self, parser=None, **kwargs):
+            raise make_error(BadRequestError, 400)
+
+    invalid = InvalidProvider("invalid", base_url=server.base_url)
+    up = OpenAIProvider("up", base_url=server.base_url)
+    router = Router([invalid, up])
+
+    # The request would fail with any provider
+    with pytest.raises(BadRequestError):
+        router.create(model="gpt-4o-mini", messages=MESSAGES)
+
+    assert invalid.error_count == up.request_count == 0
+
+
+def test_cools_down_after_several_failures(mock_server, monkeypatch):
+    monkeypatch.setattr(Provider, "COOLDOWN", 0.2)
+    flaky_server, server = mock_server(error_rate=1), mock_server()
+    flaky = OpenAIProvider("flaky", base_url=flaky_server.base_url)
+    router = Router([flaky])
+
+    for _ in range(Provider.MAX_FAILURES):
+        assert flaky.is_available
+        with pytest.raises(Exception):
+            router.create(model="gpt-4o-mini", messages=MESSAGES)
+
+    assert not flaky.is_available
+    assert 0.2 <= flaky.available_at - time.monotonic() <= 0.2 * 1.2
+
+    # Requests go to the other providers while the provider cools down
+    up = OpenAIProvider("up", base_url=server.base_url)
+    router = Router([flaky, up])
+    assert router.get_providers("gpt-4o-mini") == [up, flaky]
+
+    time.sleep(0.25)
+    assert flaky.is_available
+
+    # A success ends the streak of failures
+    flaky.record_success(0.1)
+    assert flaky.failures == 0
+
+
+def test_only_routes_to_providers_of_the_model(mock_server):
+    server = mock_server()
+    mini = OpenAIProvider("mini", base_url=server.base_url, models=["gpt-4o-mini"])
+    local = OpenAIProvider(
+        "local", base_url=server.base_url, models={"llama-3-8b": "llama3"}
+    )
+    router = Router([mini, local])
+
+    assert router.get_providers("llama-3-8b") == [local]
+    assert router.create(model="llama-3-8b", messages=MESSAGES).model == "llama3"
+    with pytest.raises(LookupError):
+        router.get_providers("gpt-4o")
+
+
+def test_rejects_providers_that_serve_a_model_under_different_names():
+    with pytest.raises(ValueError):
+        Router(
+            [
+                OpenAIProvider("openai"),
+                OpenAIProvider(
+                    "local",
+                    base_url="http://localhost:8000/v1",
+                    models={"gpt-4o-mini": "llama3"},
+                ),
+            ]
+        )
@@ -0,0 +1,86 @@
+import json
+import pandas as pd
+import pytest
+from classifiers import Config, Run
+from classifiers.core.Run import write_results, read_results, get_text_id
+
+TEXTS = ["Clean water for all", "Affordable energy"]
+
+
+@pytest.fixture
+def results() -> pd.DataFrame:
+    return pd.DataFrame(
+        dict(
+            id=["a", "a", "b"],
+            text=[TEXTS[0], TEXTS[0], TEXTS[1]],
+            sdg=[6, 7, 7],
+            expected_label=[True, False, True],
+            predictions=[[6], [6], [7, 13]],
+            scores=[[0.9] * 17, [0.9] * 17, None],
+            predicted_label=[True, False, True],
+            is_correct=[True, True, True],
+        )
+    )
+
+
+def test_round_trips_through_parquet(results, tmp_path):
+    write_results(tmp_path, results)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "results.parquet",
+        "texts.parquet",
+    ]
+    # Each text is stored once
+    assert len(pd.read_parquet(tmp_path.joinpath("texts.parquet"))) == 2
+
+    pd.testing.assert_frame_equal(read_results(tmp_path), results)
+
+
+def test_replaces_csv_results(results, tmp_path):
+    results.to_csv(tmp_path.joinpath("results.csv"), index=False)
+
+    write_results(tmp_path, results)
+
+    assert not tmp_path.joinpath("results.csv").exists()
+    pd.testing.assert_frame_equal(read_results(tmp_path), results)
+
+
+def test_reads_csv_results_with_texts(results, tmp_path):
+    # Format of the earliest runs: one file, lists as Python literals
+    legacy = results.drop(columns=["scores"])
+    legacy.to_csv(tmp_path.joinpath("results.csv"), index=False)
+
+    pd.testing.assert_frame_equal(read_results(tmp_path), legacy)
+
+
+def test_reads_csv_results_with_separate_texts(results, tmp_path):
+    # Format of runs without pyarrow: texts in a file of their own, lists as
+    # JSON (null for missing scores)
+    legacy = results.drop(columns=["text"])
+    legacy.insert(1, "text_id", results["text"].map(get_text_id))
+    for column in ["predictions", "scores"]:
+        legacy[column] = legacy[column].map(json.dumps)
+    legacy.to_csv(tmp_path.joinpath("results.csv"), index=False)
+    texts = pd.DataFrame(dict(text_id=map(get_text_id, TEXTS), text=TEXTS))
+    texts.to_csv(tmp_path.joinpath("texts.csv"), index=False)
+
+    pd.testing.assert_frame_equal(read_results(tmp_path), results)
+
+
+def test_loads_results_once_they_are_accessed(results, tmp_path):
+    config = Config(model="gpt-4o-mini")
+    stats = pd.DataFrame(dict(sdg=["Average", 6, 7], n=[3, 1, 2], accuracy=[100.0] * 3))
+    Run(config=config, date="May 10, 2024", stats=stats, results=results).write_files(
+        tmp_path
+    )
+
+    run = Run.load(config, tmp_path)
+
+    assert run is not None
+    assert run._results is None
+    pd.testing.assert_frame_equal(run.results, results)
+    assert run._results is not None
+
+
+def test_loads_no_run_without_stats(tmp_path):
+    assert Run.load(Config(model="gpt-4o-mini"), tmp_path) is None
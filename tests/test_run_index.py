@@ -0,0 +1,131 @@
+import os
+import json
+import pandas as pd
+import pytest
+from classifiers import Config, Run, RunIndex
+
+from typing import Callable
+
+RESULTS = pd.DataFrame(
+    dict(
+        id=["a"],
+        text=["Clean water for all"],
+        sdg=[6],
+        expected_label=[True],
+        predictions=[[6]],
+        scores=[None],
+        predicted_label=[True],
+        is_correct=[True],
+    )
+)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch) -> RunIndex:
+    # Runs add themselves to the index at the default root
+    monkeypatch.setattr(RunIndex, "ROOT", tmp_path)
+    return RunIndex()
+
+
+@pytest.fixture
+def write_run(index) -> Callable[..., Run]:
+    """Writes a run of a classifier with the given average accuracy."""
+
+    def write(
+        classifier: str,
+        model: str,
+        accuracy: float,
+        date: str = "May 10, 2024",
+        archived: bool = False,
+    ) -> Run:
+        root = index.root.joinpath("archive") if archived else index.root
+        stats = pd.DataFrame(
+            dict(sdg=["Average", 6, 7], n=[2, 1, 1], accuracy=[accuracy, 100, 0])
+        )
+        usage = dict(texts=2, prompt_tokens=100, completion_tokens=10, cost=0.5)
+        run = Run(
+            config=Config(model=model),
+            date=date,
+            stats=stats,
+            results=RESULTS,
+            usage=usage,
+        )
+        run.write_files(root.joinpath(classifier, "runs"))
+        return run
+
+    return write
+
+
+def test_adds_runs_when_they_are_written(index, write_run):
+    write_run("chatgpt_sdgs", "gpt-4o", 80)
+
+    runs = index.query("SELECT classifier, archived, date, day, cost FROM runs")
+
+    assert runs.to_dict("records") == [
+        dict(
+            classifier="chatgpt_sdgs",
+            archived=0,
+            date="May 10, 2024",
+            day="2024-05-10",
+            cost=0.5,
+        )
+    ]
+    assert index.sync() == 0
+
+
+def test_picks_the_best_run_of_each_classifier(index, write_run):
+    write_run("chatgpt_sdgs", "gpt-4o", 80)
+    write_run("chatgpt_sdgs", "gpt-4o-mini", 90)
+    write_run("topics_hmc", "gpt-4o", 70)
+    write_run("old", "gpt-4", 95, archived=True)
+
+    best = index.best_runs()
+    assert best["classifier"].tolist() == ["chatgpt_sdgs", "topics_hmc"]
+    assert json.loads(best["config"][0]) == dict(model="gpt-4o-mini")
+    assert index.best_runs(archived=True)["classifier"].tolist()[-1] == "old"
+
+    leaderboard = index.leaderboard()
+    assert leaderboard["Classifier"].tolist() == ["chatgpt_sdgs", "topics_hmc"]
+    assert leaderboard["Average"].tolist() == [90, 70]
+    assert leaderboard["SDG 6"].tolist() == [100, 100]
+    assert leaderboard["SDG 1"].isna().all()
+
+
+def test_syncs_with_the_runs_on_disk(index, write_run):
+    write_run("chatgpt_sdgs", "gpt-4o", 80)
+    run = write_run("chatgpt_sdgs", "gpt-4o-mini", 90)
+    index.path.unlink()
+
+    # Rebuilt from the runs
+    assert index.sync() == 2
+    assert index.sync() == 0
+
+    # Changed stats are indexed again
+    directory = index.root.joinpath("chatgpt_sdgs", "runs", run.config.get_identifier())
+    stats = run.stats.assign(accuracy=[50, 100, 0])
+    stats.to_csv(directory.joinpath("stats.csv"), index=False)
+    os.utime(directory.joinpath("stats.csv"), ns=(0, 1))
+    assert index.sync() == 1
+    assert index.best_runs()["accuracy"].tolist() == [80]
+
+    # Deleted runs are removed
+    for path in directory.iterdir():
+        path.unlink()
+    directory.rmdir()
+    assert index.sync() == 0
+    assert index.history("chatgpt_sdgs")["accuracy"].tolist() == [80]
+
+
+def test_lists_the_history_of_a_classifier(index, write_run):
+    write_run("chatgpt_sdgs", "gpt-4o", 80, date="June 1, 2024")
+    write_run("chatgpt_sdgs", "gpt-4o-mini", 90, date="May 10, 2024")
+
+    history = index.history("chatgpt_sdgs")
+
+    assert history["date"].tolist() == ["May 10, 2024", "June 1, 2024"]
+    assert history["texts"].tolist() == [2, 2]
+
+
+def test_ignores_runs_outside_of_the_root(index, tmp_path):
+    assert index.get_key(tmp_path.parent) is None
+    assert not index.add(tmp_path.parent, {}, pd.DataFrame())
@@ -0,0 +1,97 @@
+import time
+import pytest
+from openai import BadRequestError, InternalServerError, RateLimitError
+from classifiers import OpenAIProvider, Scheduler, Usage
+from conftest import MESSAGES, make_error
+
+
+def test_retries_after_rate_limit(mock_server):
+    # The server accepts one request per second
+    server = mock_server(rpm=60)
+    provider = OpenAIProvider("mock", base_url=server.base_url)
+    scheduler = Scheduler("gpt-4o-mini")
+
+    started_at = time.monotonic()
+    with Usage.track() as usage:
+        for _ in range(2):
+            completion = scheduler.call(
+                provider.create, model="gpt-4o-mini", messages=MESSAGES
+            )
+            assert completion.content
+
+    # The second request is retried once the server accepts it again
+    assert scheduler.retry_count == usage.retries == 1
+    assert time.monotonic() - started_at >= 0.9
+
+
+def test_pauses_all_requests_while_rate_limited():
+    scheduler = Scheduler("gpt-4o-mini")
+    error = make_error(RateLimitError, 429, {"retry-after": "2"})
+
+    delay = scheduler._get_backoff(error, 0)
+
+    assert delay is not None and 2 <= delay <= 3
+    assert scheduler._reserve(10) > 1
+
+
+def test_reads_retry_after_headers():
+    scheduler = Scheduler("gpt-4o-mini")
+
+    def get_retry_after(headers):
+        return scheduler._get_retry_after(make_error(RateLimitError, 429, headers))
+
+    assert get_retry_after({"retry-after-ms": "1500"}) == 1.5
+    assert get_retry_after({"retry-after": "3"}) == 3
+    assert get_retry_after({"retry-after-ms": "200", "retry-after": "3"}) == 0.2
+    assert get_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) is None
+    assert get_retry_after({}) is None
+
+
+def test_only_retries_rate_limits_and_server_errors():
+    scheduler = Scheduler("gpt-4o-mini", max_retries=2)
+
+    assert scheduler._get_backoff(make_error(InternalServerError, 500), 0) is not None
+    assert scheduler._get_backoff(make_error(BadRequestError, 400), 0) is None
+    assert scheduler._get_backoff(ValueError(), 0) is None
+    assert scheduler._get_backoff(make_error(RateLimitError, 429), 2) is None
+
+
+def test_raises_after_the_last_retry():
+    scheduler = Scheduler("gpt-4o-mini", max_retries=2, max_backoff=0)
+    attempts = []
+
+    def create(**kwargs):
+        attempts.append(kwargs)
+        raise make_error(InternalServerError, 500)
+
+    with pytest.raises(InternalServerError):
+        scheduler.call(create, model="gpt-4o-mini", messages=MESSAGES)
+
+    assert len(attempts) == 3
+
+
+def test_waits_for_the_request_budget():
+    scheduler = Scheduler("gpt-4o-mini", rpm=60)
+
+    # The budget starts full and refills by one request per second
+    assert all(scheduler._reserve(10) == 0 for _ in range(60))
+    assert 0.9 <= scheduler._reserve(10) <= 1
+
+
+def test_reports_the_peak_saturation():
+    scheduler = Scheduler("gpt-4o-mini", rpm=100)
+    for _ in range(50):
+        scheduler._reserve(10)
+
+    assert 0.49 <= scheduler.peak_saturation <= 0.51
+    assert "50% peak saturation" in scheduler.summary()
+    assert "saturation" not in Scheduler("gpt-4o-mini").summary()
+
+
+def test_estimates_the_tokens_of_a_request():
+    tokens = Scheduler.estimate_tokens(model="gpt-4o-mini", messages=MESSAGES)
+    capped = Scheduler.estimate_tokens(
+        model="gpt-4o-mini", messages=MESSAGES, max_tokens=1
+    )
+
+    assert tokens - capped == Scheduler.DEFAULT_COMPLETION_TOKENS - 1
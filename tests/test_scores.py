@@ -0,0 +1,129 @@
+import sys
+import subprocess
+import pandas as pd
+import pytest
+from sdgclassification.benchmark import Metrics, Stats
+from classifiers import (
+    BaseClassifier,
+    Config,
+    ConfigSet,
+    OpenAIProvider,
+    Parameters,
+    PreFilter,
+    Run,
+    Usage,
+)
+from classifiers.core.Embeddings import Embeddings
+from classifiers.chatgpt_sdgs.chatgpt_sdgs import Classifier as ChatGPTSDGs
+from conftest import MESSAGES
+
+TEXT = "Solar panels for rural schools"
+
+
+class Classifier(BaseClassifier):
+    CONFIGURATIONS = ConfigSet(
+        Parameters(model="ChatGPT model"),
+        Config(model="gpt-4o-mini"),
+        Config(model="gpt-4o-mini", scores=True, pack_size=4),
+    )
+
+
+def test_configurations_may_request_scores(cache):
+    assert not Classifier(config=1, cache=cache).scores
+
+    classifier = Classifier(config=2, cache=cache)
+
+    # Packed responses have no logprobs per text
+    assert classifier.scores and classifier.pack_size == 1
+    assert not Classifier.supports_scores and ChatGPTSDGs.supports_scores
+
+
+def test_derives_scores_from_logprobs(mock_server):
+    server = mock_server(content='{"sdgs": [3, 12]}')
+    provider = OpenAIProvider("mock", base_url=server.base_url)
+    request = dict(model="gpt-4o-mini", messages=MESSAGES)
+
+    completion = provider.create(**request, logprobs=True, top_logprobs=5)
+    scores = BaseClassifier.get_scores_from_logprobs(completion.to_chat_completion())
+
+    assert len(scores) == 17
+    assert scores[2] >= 0.5 and scores[11] >= 0.5
+    assert all(0 <= score <= 1 for score in scores)
+
+    # The other SDGs score the probability of the alternatives
+    assert 0 < sorted(scores)[-3] < 0.5
+
+    with pytest.raises(Exception, match="no logprobs"):
+        response = provider.create(**request).to_chat_completion()
+        BaseClassifier.get_scores_from_logprobs(response)
+
+
+@pytest.fixture
+def classifier(route_to_mock_server, cache) -> ChatGPTSDGs:
+    route_to_mock_server()
+    return ChatGPTSDGs(config=3, scores=True, cache=cache)
+
+
+def test_scores_classified_texts_from_the_cache(classifier):
+    assert classifier.classify(TEXT) == [7]
+
+    with Usage.track() as usage:
+        scores = classifier.get_scores(TEXT)
+
+    assert (usage.cache_hits, usage.cache_misses) == (1, 0)
+    assert max(scores) == scores[6] >= 0.5
+
+
+def test_scores_texts_without_candidates_zero(classifier, openai_server, cache):
+    embeddings = Embeddings.from_spec("openai:text-embedding-3-small", cache=cache)
+    classifier.prefilter = PreFilter(embeddings, threshold=1.01)
+
+    with Usage.track() as usage:
+        assert classifier.classify_many([TEXT]) == [[]]
+        assert classifier.get_scores(TEXT) == [0.0] * 17
+
+    assert usage.requests == 0
+
+
+def test_tunes_thresholds_and_keeps_the_usage(repo):
+    # Run of config 1 of chatgpt_sdgs with scores: one text that is about
+    # the SDG and one that is not, for each SDG
+    sdgs = [sdg for sdg in range(1, 18) for _ in range(2)]
+    expected = [True, False] * 17
+    results = pd.DataFrame(
+        dict(
+            id=[f"t{i}" for i in range(34)],
+            text=[f"Text {i}" for i in range(34)],
+            sdg=sdgs,
+            expected_label=expected,
+            predictions=[[sdg] for sdg in sdgs],
+            scores=[[0.9 if label else 0.6] * 17 for label in expected],
+            predicted_label=[True] * 34,
+            is_correct=expected,
+        )
+    )
+    stats = Stats(
+        [Metrics.calculate([True, False], [True, True]) for _ in range(17)]
+    ).to_dataframe()
+    usage = pd.DataFrame(
+        [Usage(requests=2, cost=sdg / 100).to_dict() for sdg in range(18)]
+    )
+    stats = pd.concat([stats, usage], axis=1)
+    config = Config(model="gpt-4-0125-preview")
+    runs_directory = repo.joinpath("classifiers", "chatgpt_sdgs", "runs")
+    Run(config=config, date="May 10, 2024", stats=stats, results=results).write_files(
+        runs_directory
+    )
+
+    subprocess.run(
+        [sys.executable, "scripts/tune_thresholds.py", "chatgpt_sdgs", "--write"],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+    tuned = pd.read_csv(
+        runs_directory.joinpath(config.get_identifier(), "tuned", "stats.csv")
+    )
+    assert tuned["accuracy"].tolist() == [100.0] * 18
+    pd.testing.assert_frame_equal(tuned[usage.columns], usage, check_dtype=False)
@@ -0,0 +1,111 @@
+import json
+import threading
+import httpx
+import pytest
+from classifiers import Registry
+from scripts.serve import ClassificationServer, ClassifierPool
+
+from typing import Iterator
+
+TEXTS = [
+    "Solar panels for rural schools",
+    "Clean water",
+    "Solar panels for rural schools",
+]
+
+
+@pytest.fixture
+def pool(route_to_mock_server, tmp_path, monkeypatch) -> ClassifierPool:
+    route_to_mock_server()
+    monkeypatch.setenv("CLASSIFIERS_CACHE_DIRECTORY", str(tmp_path.joinpath(".cache")))
+    return ClassifierPool(Registry())
+
+
+@pytest.fixture
+def client(pool) -> Iterator[httpx.Client]:
+    server = ClassificationServer("127.0.0.1", 0, pool)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    port = server.server_address[1]
+
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+        yield client
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_classifies_a_text(client):
+    response = client.post(
+        "/classify", json=dict(classifier="chatgpt_sdgs", config=3, text=TEXTS[0])
+    )
+
+    assert response.status_code == 200
+    assert response.json()["sdgs"] == [7]
+    assert response.json()["usage"]["requests"] == 1
+
+
+def test_streams_the_results_of_several_texts(client):
+    response = client.post(
+        "/classify", json=dict(classifier="chatgpt_sdgs", config=3, texts=TEXTS)
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert all(line["sdgs"] == [7] for line in lines)
+
+    # Duplicate texts are classified once
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[0] == {**by_index[2], "index": 0}
+    assert by_index[0]["usage"]["requests"] == by_index[1]["usage"]["requests"] == 1
+
+
+@pytest.mark.parametrize(
+    "request_body, status",
+    [
+        (dict(text="a"), 400),
+        (dict(classifier="chatgpt_sdgs"), 400),
+        (dict(classifier="chatgpt_sdgs", text=["a"]), 400),
+        (dict(classifier="chatgpt_sdgs", text=None), 400),
+        (dict(classifier="chatgpt_sdgs", texts="a"), 400),
+        (dict(classifier="chatgpt_sdgs", texts=["a", 1]), 400),
+        (dict(classifier="chatgpt_sdgs", config=99, text="a"), 400),
+        (dict(classifier="chatgpt_sdgs", config="first", text="a"), 400),
+        (dict(classifier="missing", text="a"), 404),
+    ],
+)
+def test_rejects_invalid_requests(client, request_body, status):
+    response = client.post("/classify", json=request_body)
+
+    assert response.status_code == status
+    assert "error" in response.json()
+
+
+def test_responds_404_to_unknown_paths(client):
+    assert client.get("/missing").status_code == 404
+    assert client.post("/missing", json={}).status_code == 404
+    assert client.get("/health").json() == dict(status="ok")
+
+
+def test_lists_the_classifiers_and_loaded_configurations(client):
+    client.post("/classify", json=dict(classifier="chatgpt_sdgs", config=3, text="a"))
+
+    classifiers = {
+        c["name"]: c for c in client.get("/classifiers").json()["classifiers"]
+    }
+
+    assert set(classifiers) == set(Registry().names())
+    assert classifiers["chatgpt_sdgs"]["loaded"] == [3]
+    assert classifiers["chatgpt_sdgs"]["configurations"][2]["config"] == 3
+
+
+def test_keeps_classifiers_warm(pool):
+    classifier = pool.get("chatgpt_sdgs", 3)
+
+    assert pool.get("chatgpt_sdgs", 3) is classifier
+    assert pool.get("chatgpt_sdgs", 1).cache is classifier.cache
+    with pytest.raises(LookupError):
+        pool.get("missing", 1)
+    with pytest.raises(ValueError):
+        pool.get("chatgpt_sdgs", 99)
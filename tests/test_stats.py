@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sdgclassification.benchmark import Metrics, Stats
+from classifiers import Config, Run, Usage
+from classifiers.core.Run import format_numbers
+from scripts.update_files import load_template, write_if_changed
+
+
+@pytest.fixture
+def stats() -> Stats:
+    # SDG 17 has no texts, the others a few texts with some errors
+    metrics = []
+    for sdg in range(1, 17):
+        expected = [True] * sdg + [False] * 3
+        predicted = ([True, False] * (sdg + 3))[: len(expected)]
+        metrics.append(Metrics.calculate(expected, predicted))
+    return Stats(metrics + [Metrics.calculate([], [])])
+
+
+@pytest.fixture
+def run(stats: Stats) -> Run:
+    return Run(config=Config(), date="2024-01-01", stats=stats.to_dataframe())
+
+
+@pytest.mark.parametrize("tablefmt", ["github", "psql", "pipe"])
+def test_formats_stats_like_the_benchmark(stats, run, tablefmt):
+    assert run.stats_table(tablefmt) == stats.format(tablefmt)
+    assert run.stats_table(tablefmt, 3, 4) == stats.format(tablefmt, 3, 4)
+
+
+def test_leaves_out_sdgs_without_texts_and_usage(stats, run):
+    usage = pd.DataFrame([Usage(requests=1, cost=0.5).to_dict()] * 18)
+    run.stats = pd.concat([run.stats, usage], axis=1)
+
+    table = run.stats_table("github")
+
+    assert table == stats.format("github")
+    assert "| 17 " not in table
+
+
+def test_formats_numbers():
+    values = pd.DataFrame(dict(a=[1, 2.345], b=[np.float64(0.5), 10]))
+
+    assert format_numbers(values, 1).tolist() == [["1.0", "0.5"], ["2.3", "10.0"]]
+    assert format_numbers(values, 0).tolist() == [["1", "0"], ["2", "10"]]
+
+
+def test_only_writes_files_that_changed(tmp_path):
+    path = tmp_path.joinpath("README.md")
+
+    write_if_changed(path, "Stats")
+    mtime = path.stat().st_mtime_ns
+    write_if_changed(path, "Stats")
+    assert path.stat().st_mtime_ns == mtime
+
+    write_if_changed(path, "New stats")
+    assert path.read_text() == "New stats"
+
+
+def test_compiles_each_template_once(tmp_path):
+    path = tmp_path.joinpath("README.md.jinja")
+    path.write_text("# {{ classifier }}")
+
+    template = load_template(path)
+    path.write_text("Changed")
+
+    assert load_template(path) is template
+    assert template.render(classifier="chatgpt_sdgs") == "# chatgpt_sdgs"
@@ -0,0 +1,76 @@
+import pytest
+from classifiers import JsonObjectParser, IdListParser
+
+
+def feed(parser, deltas):
+    """Feed the deltas until the parser sees a complete answer.
+
+    Returns: Number of deltas fed or None (if the answer is incomplete)"""
+    for i, delta in enumerate(deltas, start=1):
+        if parser.feed(delta):
+            return i
+    return None
+
+
+@pytest.mark.parametrize(
+    "deltas, content",
+    [
+        (['{"sdgs": [1, 5]}'], '{"sdgs": [1, 5]}'),
+        (['{"sd', 'gs": [1', ", 5]", "}", " Because"], '{"sdgs": [1, 5]}'),
+        (['```json\n{"sdgs": []}\n```'], '```json\n{"sdgs": []}'),
+        (['Answer: {"a": "}{"}', " more"], 'Answer: {"a": "}{"}'),
+        (['{"a": "say \\"}\\""}'], '{"a": "say \\"}\\""}'),
+        (['{"a": "\\\\"}'], '{"a": "\\\\"}'),
+        (['{"a": {"b": [1]}}, {"c": 2}'], '{"a": {"b": [1]}}'),
+        (['{not json} {"sdgs": [3]}'], '{not json} {"sdgs": [3]}'),
+    ],
+)
+def test_json_object_parser_finds_the_object(deltas, content):
+    parser = JsonObjectParser()
+
+    assert feed(parser, deltas) is not None
+    assert parser.content == content
+
+
+def test_json_object_parser_stops_at_the_end_of_the_object():
+    parser = JsonObjectParser()
+
+    assert feed(parser, ['{"sdgs": [2]', "}", "\n\nExplanation"]) == 2
+
+
+@pytest.mark.parametrize(
+    "deltas",
+    [
+        ['{"sdgs": [1, 5]'],
+        ['{"a": "}'],
+        ["no object at all"],
+        ['"}" {"a": 1'],
+        [],
+    ],
+)
+def test_json_object_parser_waits_for_a_complete_object(deltas):
+    parser = JsonObjectParser()
+
+    assert feed(parser, deltas) is None
+    assert parser.content == "".join(deltas)
+
+
+@pytest.mark.parametrize(
+    "deltas, content",
+    [
+        (["1, 5, 7\nExplanation"], "1, 5, 7"),
+        (["SDGs: 1", "2, 1", "3. These"], "SDGs: 12, 13"),
+        (["3, ", "\n", "Because"], "3"),
+        (["4", ","], None),
+        (["No SDGs"], None),
+    ],
+)
+def test_id_list_parser(deltas, content):
+    parser = IdListParser()
+
+    if content is None:
+        assert feed(parser, deltas) is None
+        assert parser.content == "".join(deltas)
+    else:
+        assert feed(parser, deltas) is not None
+        assert parser.content == content
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from classifiers import (
+    BaseClassifier,
+    Config,
+    ConfigSet,
+    JsonObjectParser,
+    Parameters,
+    Usage,
+)
+from classifiers.core.Completion import Completion
+from classifiers.chatgpt_sdgs.chatgpt_sdgs import Classifier as ChatGPTSDGs
+
+TEXT = "Solar panels for rural schools"
+
+# The model explains its answer after the JSON object
+EXPLANATION = "\n\nThe text is about access to affordable and clean energy. " * 20
+
+
+class Classifier(BaseClassifier):
+    CONFIGURATIONS = ConfigSet(
+        Parameters(model="ChatGPT model"),
+        Config(model="gpt-4o-mini"),
+        Config(model="gpt-4o-mini", stream=True),
+    )
+
+
+def test_configurations_may_enable_streaming(cache):
+    assert not Classifier(config=1, cache=cache).stream
+    assert Classifier(config=2, cache=cache).stream
+    assert not Classifier(config=2, stream=False, cache=cache).stream
+
+
+@pytest.fixture
+def classifier(route_to_mock_server, cache) -> ChatGPTSDGs:
+    route_to_mock_server(explanation=EXPLANATION)
+    return ChatGPTSDGs(config=3, stream=True, cache=cache)
+
+
+def get_cached(classifier: ChatGPTSDGs) -> Completion:
+    return Completion.from_json(
+        classifier.cache.get(Completion.key(**classifier.get_request(TEXT)))
+    )
+
+
+def test_stops_the_stream_once_the_answer_is_complete(classifier):
+    with Usage.track() as usage:
+        assert classifier.classify(TEXT) == [7]
+
+    # Only the answer is cached, so replays are identical
+    completion = get_cached(classifier)
+    assert completion.content == '{"sdgs": [7]}'
+    assert completion.finish_reason == "stop"
+    assert usage.completion_tokens < 20
+    assert usage.unmetered == 1
+
+    with Usage.track() as usage:
+        assert classifier.classify(TEXT) == [7]
+    assert usage.cache_hits == 1
+
+
+def test_stops_the_stream_asynchronously(classifier):
+    assert asyncio.run(classifier.aclassify(TEXT)) == [7]
+
+    assert get_cached(classifier).content == '{"sdgs": [7]}'
+
+
+def test_waits_for_the_full_response_without_streaming(classifier):
+    classifier.stream = False
+
+    response = classifier.create_chat_completion(
+        parser=JsonObjectParser, **classifier.get_request(TEXT)
+    )
+
+    assert response.choices[0].message.content == '{"sdgs": [7]}' + EXPLANATION
+    assert get_cached(classifier).content.endswith(EXPLANATION)
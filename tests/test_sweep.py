@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+import pandas as pd
+import pytest
+from classifiers import Config, ConfigSet, Parameters
+from conftest import MockServer
+
+from typing import Any, Callable, Iterator
+
+PARAMETERS = Parameters(model="Model", temperature="Temperature")
+
+
+def test_creates_every_combination_of_values():
+    configurations = ConfigSet.grid(
+        PARAMETERS, model=["gpt-4o-mini", "gpt-4o"], temperature=[0, 1]
+    )
+
+    assert list(configurations) == [
+        Config(model="gpt-4o-mini", temperature=0),
+        Config(model="gpt-4o-mini", temperature=1),
+        Config(model="gpt-4o", temperature=0),
+        Config(model="gpt-4o", temperature=1),
+    ]
+
+
+def test_validates_the_combinations():
+    # No value for the temperature
+    with pytest.raises(Exception, match="not valid"):
+        ConfigSet.grid(PARAMETERS, model=["gpt-4o-mini"])
+
+    with pytest.raises(Exception, match="not unique"):
+        ConfigSet.grid(PARAMETERS, model=["gpt-4o", "gpt-4o"], temperature=[0])
+
+    # Optional parameters may be part of the grid
+    configurations = ConfigSet.grid(
+        PARAMETERS, model=["gpt-4o"], temperature=[0], concurrency=[1, 4]
+    )
+    assert [c.concurrency for c in configurations] == [1, 4]
+
+
+class CountingServer(MockServer):
+    """Stub server that counts how many chat completions it handles at once."""
+
+    def __init__(self, **options: Any) -> None:
+        super().__init__(**options)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.count = 0
+
+    def create_chat_completion(self, request: dict) -> dict:
+        with self.lock:
+            self.running += 1
+            self.count += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(0.05)
+            return super().create_chat_completion(request)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def evaluate(repo, tmp_path) -> Iterator[Callable[..., CountingServer]]:
+    """Runs scripts/evaluate.py against a stub server in the copy of the repo.
+
+    Returns: Function that takes the arguments of the script and returns the
+             stub server"""
+
+    # Benchmark of six texts about SDG 7 and 13
+    benchmark = tmp_path.joinpath("benchmark.csv")
+    pd.DataFrame(
+        dict(
+            id=[f"t{i}" for i in range(6)],
+            text=[f"Text {i}" for i in range(6)],
+            sdg=[7, 7, 7, 13, 13, 13],
+            label=[True, True, False, True, False, False],
+        )
+    ).to_csv(benchmark, index=False)
+
+    servers = []
+
+    def run(*args: str) -> CountingServer:
+        server = CountingServer(port=0)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+
+        env = dict(
+            os.environ,
+            OPENAI_API_KEY="test",
+            OPENAI_BASE_URL=server.base_url,
+            SDGCLASSIFICATION_BENCHMARK_CSV=str(benchmark),
+            CLASSIFIERS_CACHE_DIRECTORY=str(
+                tmp_path.joinpath(".cache", str(len(servers)))
+            ),
+        )
+        env.pop("CLASSIFIERS_PROVIDERS", None)
+        subprocess.run(
+            [sys.executable, "scripts/evaluate.py", *args],
+            cwd=repo,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+        return server
+
+    yield run
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_evaluates_several_configurations_in_one_process(evaluate, repo):
+    server = evaluate("chatgpt_sdgs", "--config", "1", "3", "--concurrency", "2")
+
+    # Each config classifies every text once, one text at a time
+    assert server.count == 12
+    assert server.peak == 2
+
+    runs_directory = repo.joinpath("classifiers", "chatgpt_sdgs", "runs")
+    runs = [p.name for p in runs_directory.iterdir() if not p.name.startswith(".")]
+    stats = pd.read_csv(repo.joinpath("classifiers", "chatgpt_sdgs", "stats.csv"))
+    assert len(runs) == 2
+    assert stats["Average"].notna().tolist() == [True, False, True]
+
+
+def test_caps_the_concurrency_of_all_configurations(evaluate):
+    # Without --concurrency, the cap is the default concurrency of 8 texts,
+    # so each of the three configs classifies two texts at a time
+    server = evaluate("chatgpt_sdgs", "--all-configs")
+
+    assert server.count == 18
+    assert 3 <= server.peak <= 6
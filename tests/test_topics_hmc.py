@@ -0,0 +1,83 @@
+import time
+import asyncio
+import pytest
+from frozendict import frozendict
+from classifiers import Usage
+from classifiers.chatgpt_topics_hmc.chatgpt_topics_hmc import (
+    Classifier,
+    Subtopics,
+    Topics,
+)
+
+
+@pytest.fixture
+def classifier(cache) -> Classifier:
+    classifier = Classifier(config=1, cache=cache)
+
+    # A second subtopic tree, so that several stages can run at once
+    classifier.subtopics = frozendict(
+        {
+            **classifier.subtopics,
+            "water and sanitation": Subtopics(
+                prompt="system_energy_subtopics",
+                topics=Topics.from_list(["drinking water", "sanitation"], sdg=6),
+            ),
+        }
+    )
+    return classifier
+
+
+def test_skips_the_subtopics_of_topics_that_were_not_found(
+    route_to_mock_server, classifier
+):
+    # Topic 7 (jobs, work, and economy) has no subtopics
+    route_to_mock_server(content="7")
+
+    with Usage.track() as usage:
+        assert classifier.classify("Decent work") == []
+    assert usage.requests == 1
+
+
+def test_checks_the_subtopics_of_each_topic_that_was_found(
+    route_to_mock_server, classifier
+):
+    # Topics 1 (energy) and 11 (water), subtopic 1 of each tree
+    route_to_mock_server(content="1, 11")
+
+    with Usage.track() as usage:
+        assert classifier.classify("Solar pumps for wells") == [6, 7]
+    assert usage.requests == 3
+
+    assert asyncio.run(classifier.aclassify("Solar pumps for wells")) == [6, 7]
+
+
+def test_checks_the_subtopics_in_parallel(route_to_mock_server, classifier):
+    route_to_mock_server(content="1, 11", latency=0.3)
+
+    started_at = time.monotonic()
+    classifier.classify("Solar pumps for wells")
+
+    # One round for the topics and one for both subtopic trees
+    assert time.monotonic() - started_at < 0.8
+
+
+def test_parses_topic_ids():
+    topics = Topics.from_list(["energy: wind, solar", "water", "work"])
+
+    assert topics.labels == ("energy", "water", "work")
+    assert topics.parse("1, 3") == ["energy", "work"]
+    assert topics.parse(" 3,1\n3 ") == ["work", "energy"]
+    assert topics.parse("0") == []
+    assert topics.parse("2, 4, x, -1") == ["water"]
+
+
+def test_does_not_change_the_topics(route_to_mock_server, classifier):
+    route_to_mock_server(content="1, 11")
+    topics = classifier.topics
+    subtopics = dict(classifier.subtopics)
+
+    for _ in range(2):
+        assert classifier.classify("Solar pumps for wells") == [6, 7]
+
+    assert classifier.topics == topics and len(topics) == 21
+    assert dict(classifier.subtopics) == subtopics
@@ -0,0 +1,112 @@
+import threading
+import pandas as pd
+import pytest
+from classifiers import Config, Predictions, Run, Usage
+
+
+def test_records_requests_in_all_enclosing_records():
+    with Usage.track() as outer:
+        Usage.record_request("gpt-4o-mini", False, 0.5, 1000, 100)
+        with Usage.track() as inner:
+            Usage.record_request("gpt-4o-mini", True, 0.1, 1000, 100)
+
+    assert (outer.requests, outer.cache_hits, outer.cache_misses) == (2, 1, 1)
+    assert (inner.requests, inner.cache_hits) == (1, 1)
+    assert outer.prompt_tokens == 2000
+    assert outer.latency == pytest.approx(0.6)
+
+
+def test_ignores_requests_outside_of_tracking():
+    Usage.record_request("gpt-4o-mini", False, 0.5, 1000, 100)
+
+    with Usage.track() as usage:
+        pass
+
+    assert usage == Usage()
+
+
+def test_counts_requests_without_token_counts_as_unmetered():
+    with Usage.track() as usage:
+        Usage.record_request("gpt-4o", False, 0.5)
+
+    assert (usage.requests, usage.unmetered, usage.prompt_tokens) == (1, 1, 0)
+    assert usage.cost == 0
+
+
+def test_prices_models_by_the_longest_prefix():
+    assert Usage.get_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == 0.15
+    assert Usage.get_cost("gpt-4o-2024-08-06", 1_000_000, 1_000_000) == 12.5
+    assert Usage.get_cost("gpt-4-0613", 0, 1_000_000) == 60
+    assert Usage.get_cost("llama3", 1_000_000, 1_000_000) == 0
+    assert Usage.get_cost(None, 1_000_000, 1_000_000) == 0
+
+
+def test_propagates_tracking_to_other_threads():
+    with Usage.track() as usage:
+        record = Usage.propagate(Usage.record_request)
+        threads = [
+            threading.Thread(target=record, args=("gpt-4o-mini", False, 0.1, 10, 1))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert (usage.requests, usage.prompt_tokens) == (4, 40)
+
+
+def test_splits_and_adds_usage():
+    usage = Usage(requests=1, prompt_tokens=100, cost=0.5, latency=2)
+
+    part = usage.split(4)
+
+    assert (part.requests, part.prompt_tokens, part.cost) == (0.25, 25, 0.125)
+    assert part + part + part + part == usage
+    assert Usage.from_dict({**usage.to_dict(), "texts": 1}) == usage
+
+
+def test_stores_the_usage_of_each_text(tmp_path):
+    checkpoint = tmp_path.joinpath("run.jsonl")
+    predictions = Predictions(checkpoint)
+    predictions.add("a", [1], Usage(requests=1, cost=0.5))
+    predictions.add("b", [2])
+    predictions.close()
+
+    resumed = Predictions(checkpoint)
+    table = resumed.get_usage_table(["a", "b", "a"])
+
+    assert resumed.get_usage("a") == Usage(requests=1, cost=0.5)
+    assert resumed.get_usage("b") is None
+    assert table.index.tolist() == ["a", "b"]
+    assert table.loc["a", "cost"] == 0.5
+    assert table.loc["b"].isna().all()
+
+
+def test_summarizes_the_usage_of_a_run():
+    usage = Usage(
+        requests=4,
+        cache_hits=1,
+        retries=2,
+        unmetered=1,
+        prompt_tokens=1500,
+        completion_tokens=20,
+        cost=1.25,
+        latency=10,
+    )
+    run = Run(
+        config=Config(model="gpt-4o-mini"),
+        date="May 10, 2024",
+        stats=pd.DataFrame(),
+        usage=dict(texts=2, **usage.to_dict()),
+    )
+
+    assert run.usage_summary() == (
+        "4 requests for 2 texts (25% from cache, 2 retries), "
+        "1,500 prompt tokens and 20 completion tokens, "
+        "$1.25 in total ($625.00 per 1,000 texts), 5.00s per text, "
+        "1 requests without token counts (not included in tokens and cost)"
+    )
+    assert (
+        Run(config=run.config, date=run.date, stats=run.stats).usage_summary() is None
+    )
@@ -0,0 +1,67 @@
+import time
+import pytest
+from classifiers import Usage, WorkQueue
+
+TEXTS = ["Clean water for all", "Affordable energy", "Decent work"]
+
+
+@pytest.fixture
+def queue(tmp_path) -> WorkQueue:
+    queue = WorkQueue(tmp_path.joinpath("queue.db"), lease=0.05, max_attempts=2)
+    queue.create(TEXTS, shards=1, classifier="chatgpt_sdgs")
+    return queue
+
+
+def test_classifies_shards(queue):
+    shard = queue.claim("a")
+    assert shard is not None
+    assert queue.claim("b") is None
+    assert queue.get_meta()["classifier"] == "chatgpt_sdgs"
+
+    for text in queue.get_missing_texts(shard):
+        assert queue.add(shard, text, [6], Usage(requests=1))
+    queue.complete(shard)
+
+    assert queue.is_done()
+    assert queue.count_texts() == (3, 3)
+    assert [sdgs for _, sdgs, _ in queue.get_predictions()] == [[6]] * 3
+
+
+def test_frees_shards_when_the_lease_expires(queue):
+    stalled = queue.claim("a")
+    assert stalled is not None
+    assert queue.add(stalled, TEXTS[0], [6])
+
+    time.sleep(0.1)
+    shard = queue.claim("b")
+
+    # The other worker only classifies the texts that are still missing
+    assert shard is not None and shard.id == stalled.id
+    assert queue.get_missing_texts(shard) == TEXTS[1:]
+
+    # The stalled worker learns that it has lost the shard
+    assert not queue.renew(stalled)
+    assert not queue.add(stalled, TEXTS[1], [7])
+    assert queue.renew(shard)
+
+
+def test_renewing_keeps_the_lease(queue):
+    shard = queue.claim("a")
+
+    for _ in range(3):
+        time.sleep(0.03)
+        assert queue.renew(shard)
+    assert queue.claim("b") is None
+
+
+def test_fails_shards_that_expire_too_often(queue):
+    for worker in ["a", "b"]:
+        assert queue.claim(worker) is not None
+        time.sleep(0.1)
+
+    assert queue.claim("c") is None
+    assert queue.status()["failed"] == 1
+    assert queue.errors() == {0: "Lease expired too many times"}
+
+    assert queue.retry_failed() == 1
+    assert queue.claim("c") is not None